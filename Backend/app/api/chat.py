@@ -1,57 +1,73 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import time
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.user import User
-from app.schemas.chat import ChatRequest, ChatResponse
-from app.repositories.course_repository import CourseRepository
-from app.repositories.enrollment_repository import EnrollmentRepository
-from app.utils.security import get_current_student, get_current_user
-from app.services.vector_store import vector_store_service
+from app.schemas.chat import ChatBatchItem, ChatBatchRequest, ChatRequest, ChatResponse
+from app.utils.security import ensure_enrolled, get_current_student, get_current_user
+from app.services.ollama_scheduler import SchedulerBusyError
+from app.services.stage_timing import stage_histograms, stage_timer, timings_exposed
+from app.services.lazy import vector_store_service
 
 router = APIRouter(prefix="/chat", tags=["AI Chat"])
 
 
+def _busy(error: SchedulerBusyError) -> HTTPException:
+    """Build the 429 response for a request rejected by the Ollama scheduler."""
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="The assistant is busy, please try again shortly",
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+
 @router.post("/", response_model=ChatResponse)
-def chat_with_course_materials(
+async def chat_with_course_materials(
     chat_request: ChatRequest,
+    response: Response,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Chat with course materials using RAG pipeline.
     Student must be enrolled in the course to chat.
+    Stage durations are recorded for /metrics, and with SERVER_TIMING_ENABLED
+    also returned in the Server-Timing header and timings_ms.
     """
-    course_repo = CourseRepository(db)
-    enrollment_repo = EnrollmentRepository(db)
-    
-    # Check if course exists
-    course = course_repo.get_by_id(chat_request.course_id)
-    if not course:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Course not found"
-        )
-    
-    # Check if student is enrolled
-    if not enrollment_repo.is_student_enrolled(current_user.id, chat_request.course_id):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You must be enrolled in this course to chat"
-        )
+    started_at = time.perf_counter()
+    timer = stage_timer()
+    with timer.stage("enrollment_check"):
+        await run_in_threadpool(ensure_enrolled, db, current_user.id, chat_request.course_id, "chat")
     
     # Query RAG pipeline
     try:
-        answer, retrieved_count = vector_store_service.query_course_materials(
+        result = await vector_store_service.query_course_materials(
             query=chat_request.question,
-            course_id=chat_request.course_id
+            course_id=chat_request.course_id,
+            user_id=current_user.id,
+            timer=timer
         )
         
+        if timer.enabled:
+            timer.add("total", time.perf_counter() - started_at)
+            stage_histograms.observe("chat", timer)
+        if timings_exposed(timer):
+            response.headers["Server-Timing"] = timer.server_timing()
+        
         return ChatResponse(
-            answer=answer,
+            answer=result.answer,
             course_id=chat_request.course_id,
-            retrieved_chunks=retrieved_count
+            retrieved_chunks=result.retrieved_chunks,
+            cached=result.cached,
+            coalesced=result.coalesced,
+            prompt_tokens_before=result.prompt_tokens_before,
+            prompt_tokens_after=result.prompt_tokens_after,
+            timings_ms=timer.milliseconds() if timings_exposed(timer) else None
         )
+    except SchedulerBusyError as e:
+        raise _busy(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -68,23 +84,41 @@ async def chat_with_course_materials_streaming(
     """
     Chat with course materials using RAG pipeline with streaming response.
     Student must be enrolled in the course to chat.
+    With SERVER_TIMING_ENABLED, the Server-Timing header covers the stages before the first byte.
     """
-    course_repo = CourseRepository(db)
-    enrollment_repo = EnrollmentRepository(db)
+    started_at = time.perf_counter()
+    timer = stage_timer()
+    with timer.stage("enrollment_check"):
+        await run_in_threadpool(ensure_enrolled, db, current_user.id, chat_request.course_id, "chat")
     
-    # Check if course exists
-    course = course_repo.get_by_id(chat_request.course_id)
-    if not course:
+    # Serve a previously generated answer in one chunk
+    try:
+        cached = await vector_store_service.find_cached_answer(
+            query=chat_request.question,
+            course_id=chat_request.course_id,
+            user_id=current_user.id,
+            timer=timer
+        )
+        if cached is None:
+            # Reject before the 200 status line is sent
+            vector_store_service.check_generation_admission()
+    except SchedulerBusyError as e:
+        raise _busy(e)
+    except Exception as e:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Course not found"
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error processing chat request: {str(e)}"
         )
     
-    # Check if student is enrolled
-    if not enrollment_repo.is_student_enrolled(current_user.id, chat_request.course_id):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You must be enrolled in this course to chat"
+    headers = {"Server-Timing": timer.server_timing()} if timings_exposed(timer) else {}
+    if cached is not None:
+        if timer.enabled:
+            timer.add("total", time.perf_counter() - started_at)
+            stage_histograms.observe("chat_stream", timer)
+        return StreamingResponse(
+            iter([cached.answer]),
+            media_type="text/plain",
+            headers={"X-Answer-Cached": "true", **headers}
         )
     
     # Query RAG pipeline with streaming
@@ -92,13 +126,51 @@ async def chat_with_course_materials_streaming(
         async def generate():
             async for chunk in vector_store_service.query_course_materials_streaming(
                 query=chat_request.question,
-                course_id=chat_request.course_id
+                course_id=chat_request.course_id,
+                user_id=current_user.id,
+                timer=timer
             ):
                 yield chunk
+            
+            if timer.enabled:
+                timer.add("total", time.perf_counter() - started_at)
+                stage_histograms.observe("chat_stream", timer)
         
-        return StreamingResponse(generate(), media_type="text/plain")
+        return StreamingResponse(generate(), media_type="text/plain", headers=headers)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error processing chat request: {str(e)}"
         )
+
+
+@router.post("/batch")
+async def chat_batch_with_course_materials(
+    batch_request: ChatBatchRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Answer many questions about a course in one request.
+    Results are streamed as NDJSON, one line per question in completion order.
+    Student must be enrolled in the course to chat.
+    """
+    await run_in_threadpool(ensure_enrolled, db, current_user.id, batch_request.course_id, "chat")
+    
+    async def generate():
+        async for index, result in vector_store_service.answer_questions(
+            queries=batch_request.questions,
+            course_id=batch_request.course_id,
+            user_id=current_user.id
+        ):
+            item = ChatBatchItem(index=index, question=batch_request.questions[index])
+            if isinstance(result, Exception):
+                item.error = f"Error processing chat request: {str(result)}"
+            else:
+                item.answer = result.answer
+                item.retrieved_chunks = result.retrieved_chunks
+                item.cached = result.cached
+                item.coalesced = result.coalesced
+            yield item.model_dump_json() + "\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
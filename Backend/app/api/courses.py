@@ -8,8 +8,7 @@ from app.repositories.course_repository import CourseRepository
 from app.repositories.enrollment_repository import EnrollmentRepository
 from app.repositories.file_repository import CourseMaterialFileRepository
 from app.utils.security import get_current_user, get_current_teacher
-from app.services.vector_store import vector_store_service
-from app.services.file_service import file_service
+from app.services.lazy import file_service, vector_store_service
 
 router = APIRouter(prefix="/courses", tags=["Courses"])
 
@@ -153,6 +152,7 @@ def delete_course(
     
     # Delete vector store documents
     vector_store_service.delete_course_documents(course_id)
+    vector_store_service.invalidate_course(course_id)
     
     # Delete physical files
     file_service.delete_course_files(course_id)
@@ -1,21 +1,37 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from fastapi.responses import FileResponse
+import gzip
+import os
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import quote
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
+from app.config import settings
 from app.database import get_db
+from app.models.course_material_file import CourseMaterialFile
 from app.models.user import User, UserRole
-from app.schemas.file import CourseMaterialFileResponse, FileUploadResponse
+from app.schemas.file import (
+    CourseMaterialFileResponse,
+    CourseMaterialStatsResponse,
+    FileUploadResponse,
+    FileReplaceResponse
+)
+from app.schemas.ingestion_job import IngestionJobResponse
 from app.repositories.course_repository import CourseRepository
 from app.repositories.file_repository import CourseMaterialFileRepository
 from app.repositories.enrollment_repository import EnrollmentRepository
+from app.repositories.ingestion_job_repository import IngestionJobRepository
 from app.utils.security import get_current_teacher, get_current_user
-from app.services.file_service import file_service
-from app.services.vector_store import vector_store_service
+from app.services.ingestion_queue import ingestion_queue
+from app.services.lazy import file_service, vector_store_service
 
 router = APIRouter(prefix="/files", tags=["Course Materials"])
 
 
-@router.post("/upload/{course_id}", response_model=FileUploadResponse)
+@router.post(
+    "/upload/{course_id}",
+    response_model=FileUploadResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
 async def upload_course_materials(
     course_id: int,
     files: List[UploadFile] = File(...),
@@ -25,6 +41,8 @@ async def upload_course_materials(
     """
     Upload multiple course material files (teachers only).
     Supports batch upload of PDF and TXT files.
+    Files are saved immediately and indexed in the background;
+    poll /files/jobs/{job_id} for the indexing status.
     """
     course_repo = CourseRepository(db)
     file_repo = CourseMaterialFileRepository(db)
@@ -43,50 +61,76 @@ async def upload_course_materials(
             detail="Only the course teacher can upload materials"
         )
     
+    job_repo = IngestionJobRepository(db)
+    
     uploaded_files = []
     failed_files = []
+    jobs = []
     
     for file in files:
         try:
-            # Create file record first to get ID
+            # Save file to disk
+            file_path, unique_filename, file_size, content_hash = await file_service.save_file(file, course_id)
+            
+            # Create file record and its ingestion job
             db_file = file_repo.create(
                 course_id=course_id,
-                filename="",  # Will be updated after processing
+                filename=unique_filename,
                 original_filename=file.filename,
-                file_path="",  # Will be updated after processing
-                file_size=0,  # Will be updated after processing
-                mime_type=file.content_type or "application/octet-stream"
+                file_path=file_path,
+                file_size=file_size,
+                mime_type=file.content_type or "application/octet-stream",
+                content_hash=content_hash
             )
-            
-            # Process and index file
-            file_path, unique_filename, file_size, chunks_indexed = await file_service.process_and_index_file(
-                file=file,
-                course_id=course_id,
-                file_id=db_file.id
-            )
-            
-            # Update file record with actual values
-            db_file.filename = unique_filename
-            db_file.file_path = file_path
-            db_file.file_size = file_size
-            db.commit()
-            db.refresh(db_file)
+            job = job_repo.create(file_id=db_file.id, course_id=course_id)
             
             uploaded_files.append(db_file)
+            jobs.append(job)
             
         except Exception as e:
-            failed_files.append(f"{file.filename}: {str(e)}")
+            failed_files.append(f"{file.filename}: {str(getattr(e, 'detail', e))}")
             # Rollback this file's database entry if it was created
             db.rollback()
             continue
     
+    for job in jobs:
+        ingestion_queue.enqueue(job.id, course_id)
+    
     return FileUploadResponse(
         uploaded_files=uploaded_files,
         total_files=len(uploaded_files),
-        failed_files=failed_files
+        failed_files=failed_files,
+        jobs=jobs
     )
 
 
+@router.get("/jobs/{job_id}", response_model=IngestionJobResponse)
+def get_ingestion_job(
+    job_id: int,
+    current_user: User = Depends(get_current_teacher),
+    db: Session = Depends(get_db)
+):
+    """Get the indexing status of an uploaded file (teacher only)."""
+    job_repo = IngestionJobRepository(db)
+    course_repo = CourseRepository(db)
+    
+    job = job_repo.get_by_id(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ingestion job not found"
+        )
+    
+    course = course_repo.get_by_id(job.course_id)
+    if course.teacher_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only the course teacher can view ingestion jobs"
+        )
+    
+    return job
+
+
 @router.get("/course/{course_id}", response_model=List[CourseMaterialFileResponse])
 def list_course_materials(
     course_id: int,
@@ -111,15 +155,32 @@ def list_course_materials(
     return files
 
 
-@router.get("/download/{file_id}")
-def download_file(
-    file_id: int,
+@router.get("/course/{course_id}/stats", response_model=CourseMaterialStatsResponse)
+def get_course_material_stats(
+    course_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    """Get chunk counts, size and last index time of a course's materials."""
+    course_repo = CourseRepository(db)
+    file_repo = CourseMaterialFileRepository(db)
+    
+    course = course_repo.get_by_id(course_id)
+    if not course:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Course not found"
+        )
+    
+    return file_repo.get_course_stats(course_id)
+
+
+def _get_downloadable_file(file_id: int, current_user: User, db: Session) -> CourseMaterialFile:
     """
-    Download a course material file content.
-    Returns the content as text/plain.
+    Get a file the user may download: the course teacher or an enrolled student.
+    
+    Raises:
+        HTTPException: If the file does not exist or the user has no access
     """
     file_repo = CourseMaterialFileRepository(db)
     course_repo = CourseRepository(db)
@@ -132,32 +193,197 @@ def download_file(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="File not found"
         )
-        
+    
     # Check permissions
     course = course_repo.get_by_id(db_file.course_id)
     
     # If teacher, must own course
     if current_user.role == UserRole.TEACHER:
         if course.teacher_id != current_user.id:
-                raise HTTPException(
+            raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not authorized to access this file"
             )
     # If student, must be enrolled
     else:
-            if not enrollment_repo.is_student_enrolled(current_user.id, course.id):
-                raise HTTPException(
+        if not enrollment_repo.is_student_enrolled(current_user.id, course.id):
+            raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You must be enrolled in this course to access materials"
             )
-            
+    
+    return db_file
+
+
+def _cache_headers(etag: Optional[str]) -> Dict[str, str]:
+    """Caching headers of a download. Content is only cached by the user's own client."""
+    headers = {"Cache-Control": f"private, max-age={settings.DOWNLOAD_CACHE_MAX_AGE_SECONDS}"}
+    if etag:
+        headers["ETag"] = etag
+    return headers
+
+
+def _is_not_modified(request: Request, etag: Optional[str]) -> bool:
+    """Whether the client's If-None-Match already names the current content."""
+    if_none_match = request.headers.get("if-none-match")
+    if not etag or not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def _accepts_gzip(request: Request) -> bool:
+    """Whether the client accepts a gzip content coding."""
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            quality = params.strip().removeprefix("q=")
+            try:
+                return not quality or float(quality) > 0
+            except ValueError:
+                return False
+    return False
+
+
+def _content_disposition(filename: str) -> str:
+    """Attachment header for a filename, encoded as RFC 5987 if it is not plain ASCII."""
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def _iter_gzip(path: str) -> Iterator[bytes]:
+    """Decompress a gzip file piece by piece."""
+    with gzip.open(path, 'rb') as f:
+        while chunk := f.read(settings.UPLOAD_CHUNK_SIZE):
+            yield chunk
+
+
+@router.get("/download/{file_id}")
+def download_file(
+    file_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Download a course material file as uploaded, with its own media type.
+    Use /download/{file_id}/text for its extracted text.
+    """
+    db_file = _get_downloadable_file(file_id, current_user, db)
+    
+    etag = f'"{db_file.content_hash}"' if db_file.content_hash else None
+    headers = _cache_headers(etag)
+    if _is_not_modified(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    headers["Content-Disposition"] = _content_disposition(db_file.original_filename)
     return FileResponse(
-        path=db_file.file_path, 
-        media_type="text/plain", 
-        filename=db_file.original_filename
+        path=db_file.file_path,
+        media_type=file_service.media_type(db_file.filename),
+        headers=headers
     )
 
 
+@router.get("/download/{file_id}/text")
+async def download_file_text(
+    file_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Download the text of a course material file as UTF-8 text/plain.
+    A PDF's text comes from the rendition stored when it was indexed and is
+    sent gzip-encoded to clients that accept it.
+    """
+    db_file = _get_downloadable_file(file_id, current_user, db)
+    
+    filename = os.path.splitext(db_file.original_filename)[0] + ".txt"
+    media_type = file_service.media_type(filename)
+    is_pdf = os.path.splitext(db_file.filename)[1].lower() == ".pdf"
+    gzipped = is_pdf and _accepts_gzip(request)
+    
+    # Each encoding is a distinct representation, so it has its own ETag
+    etag = None
+    if db_file.content_hash:
+        etag = f'"{db_file.content_hash}-text{"-gzip" if gzipped else ""}"'
+    headers = _cache_headers(etag)
+    if is_pdf:
+        headers["Vary"] = "Accept-Encoding"
+    if _is_not_modified(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    headers["Content-Disposition"] = _content_disposition(filename)
+    if not is_pdf:
+        return FileResponse(path=db_file.file_path, media_type=media_type, headers=headers)
+    
+    rendition_path = await file_service.get_text_rendition(db_file.file_path)
+    if gzipped:
+        headers["Content-Encoding"] = "gzip"
+        return FileResponse(path=rendition_path, media_type=media_type, headers=headers)
+    return StreamingResponse(_iter_gzip(rendition_path), media_type=media_type, headers=headers)
+
+
+@router.put("/{file_id}", response_model=FileReplaceResponse)
+async def replace_course_material(
+    file_id: int,
+    response: Response,
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_teacher),
+    db: Session = Depends(get_db)
+):
+    """
+    Replace the content of a course material file (teacher only).
+    Only chunks that changed are re-embedded; the ingestion job reports
+    how many stored chunks were reused and removed.
+    Returns 200 if the content is unchanged, otherwise 202 with the job.
+    """
+    course_repo = CourseRepository(db)
+    file_repo = CourseMaterialFileRepository(db)
+    job_repo = IngestionJobRepository(db)
+    
+    # Get file
+    db_file = file_repo.get_by_id(file_id)
+    if not db_file:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+    
+    # Check if user is the course teacher
+    course = course_repo.get_by_id(db_file.course_id)
+    if course.teacher_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only the course teacher can replace materials"
+        )
+    
+    file_path, unique_filename, file_size, content_hash = await file_service.save_file(file, db_file.course_id)
+    
+    if content_hash == db_file.content_hash:
+        file_service.delete_file(file_path)
+        return FileReplaceResponse(file=db_file, unchanged=True)
+    
+    # Point the record at the new content, then drop the old copy
+    old_file_path = db_file.file_path
+    db_file.filename = unique_filename
+    db_file.original_filename = file.filename
+    db_file.file_path = file_path
+    db_file.file_size = file_size
+    db_file.mime_type = file.content_type or "application/octet-stream"
+    db_file.content_hash = content_hash
+    db.commit()
+    file_service.delete_file(old_file_path)
+    
+    job = job_repo.create(file_id=db_file.id, course_id=db_file.course_id)
+    ingestion_queue.enqueue(job.id, db_file.course_id)
+    
+    response.status_code = status.HTTP_202_ACCEPTED
+    return FileReplaceResponse(file=db_file, job=job)
+
+
 @router.delete("/{file_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_course_material(
     file_id: int,
@@ -185,7 +411,8 @@ def delete_course_material(
         )
     
     # Delete from vector store
-    vector_store_service.delete_file_documents(file_id)
+    vector_store_service.delete_file_documents(db_file.course_id, file_id)
+    vector_store_service.invalidate_course(db_file.course_id)
     
     # Delete physical file
     file_service.delete_file(db_file.file_path)
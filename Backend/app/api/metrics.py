@@ -0,0 +1,26 @@
+from fastapi import APIRouter
+from app.services.ingestion_queue import ingestion_queue
+from app.services.lazy import answer_cache, context_assembler, embedding_cache, query_embedding_cache
+from app.services.ollama_scheduler import embedding_scheduler, generation_scheduler
+from app.services.request_coalescer import chat_coalescer
+from app.services.stage_timing import stage_histograms
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get("/")
+def get_metrics():
+    """Get runtime counters for caches and background work."""
+    return {
+        "embedding_cache": embedding_cache.stats(),
+        "query_embedding_cache": query_embedding_cache.stats(),
+        "answer_cache": answer_cache.stats(),
+        "ingestion_queue": ingestion_queue.stats(),
+        "chat_coalescing": chat_coalescer.stats(),
+        "context_assembly": context_assembler.stats(),
+        "stage_timings": stage_histograms.stats(),
+        "ollama_scheduler": {
+            "generation": generation_scheduler.stats(),
+            "embedding": embedding_scheduler.stats()
+        }
+    }
@@ -0,0 +1,73 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import get_db
+from app.models.user import User
+from app.schemas.search import SearchRequest, SearchHit, SearchResponse
+from app.utils.security import ensure_enrolled, get_current_user
+from app.services.ollama_scheduler import SchedulerBusyError
+from app.services.lazy import vector_store_service
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+
+@router.post("/", response_model=SearchResponse)
+async def search_course_materials(
+    search_request: SearchRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Find the course material passages most relevant to a query.
+    Runs retrieval only, without generating an answer.
+    Student must be enrolled in the course to search.
+    """
+    await run_in_threadpool(ensure_enrolled, db, current_user.id, search_request.course_id, "search its materials")
+    
+    if search_request.offset + search_request.limit > settings.SEARCH_MAX_RESULTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Results are limited to the top {settings.SEARCH_MAX_RESULTS} matches"
+        )
+    
+    try:
+        nodes, has_more = await vector_store_service.search_course_materials(
+            query=search_request.query,
+            course_id=search_request.course_id,
+            limit=search_request.limit,
+            offset=search_request.offset,
+            user_id=current_user.id
+        )
+    except SchedulerBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Search is busy, please try again shortly",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error processing search request: {str(e)}"
+        )
+    
+    hits = [
+        SearchHit(
+            chunk_id=node.node.node_id,
+            file_id=node.node.metadata.get("file_id"),
+            filename=node.node.metadata.get("filename"),
+            score=node.score,
+            text=node.node.get_content(),
+            start_char_idx=node.node.start_char_idx,
+            end_char_idx=node.node.end_char_idx
+        )
+        for node in nodes
+    ]
+    
+    return SearchResponse(
+        course_id=search_request.course_id,
+        hits=hits,
+        offset=search_request.offset,
+        limit=search_request.limit,
+        has_more=has_more
+    )
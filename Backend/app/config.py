@@ -10,22 +10,73 @@ class Settings(BaseSettings):
     # File Storage
     UPLOAD_DIR: str = "./uploads"
     MAX_FILE_SIZE: int = 52428800
+    UPLOAD_CHUNK_SIZE: int = 1048576
+    # Browsers may reuse a downloaded file this long before revalidating it by ETag
+    DOWNLOAD_CACHE_MAX_AGE_SECONDS: int = 300
     
     # Ollama
     OLLAMA_BASE_URL: str = "http://localhost:11434"
     OLLAMA_CHAT_MODEL: str = "qwen2.5:0.5b"
     OLLAMA_EMBEDDING_MODEL: str = "nomic-embed-text"
     OLLAMA_REQUEST_TIMEOUT: int = 120
+    OLLAMA_MAX_CONNECTIONS: int = 256
+    OLLAMA_MAX_CONCURRENT_GENERATIONS: int = 4
+    OLLAMA_MAX_QUEUED_GENERATIONS: int = 64
+    OLLAMA_MAX_CONCURRENT_EMBEDDINGS: int = 8
+    OLLAMA_MAX_QUEUED_EMBEDDINGS: int = 256
     
     # ChromaDB
     CHROMA_PERSIST_DIR: str = "./chroma_db"
     CHROMA_COLLECTION_NAME: str = "course_materials"
+    VECTOR_BACKEND: str = "chroma"
+    NUMPY_VECTOR_STORE_DIR: str = "./numpy_vector_store"
+    # With VECTOR_BACKEND="remote", API workers share one vector service process
+    VECTOR_SERVICE_SOCKET: str = "./vector_service.sock"
+    VECTOR_SERVICE_BACKEND: str = "chroma"
+    VECTOR_SERVICE_MAX_CONNECTIONS: int = 32
+    VECTOR_SERVICE_TIMEOUT_SECONDS: float = 30.0
     
     # RAG
     CHUNK_SIZE: int = 1024
     CHUNK_OVERLAP: int = 200
     TOP_K_RETRIEVAL: int = 5
     SIMILARITY_METRIC: str = "cosine"
+    EMBEDDING_BATCH_SIZE: int = 32
+    EMBEDDING_CONCURRENCY: int = 4
+    EMBEDDING_CACHE_PATH: str = "./embedding_cache/embeddings.db"
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 200000
+    QUERY_EMBEDDING_CACHE_SIZE: int = 10000
+    QUERY_EMBEDDING_CACHE_SHARED: bool = False
+    RETRIEVER_CACHE_SIZE: int = 256
+    CONTEXT_TOKEN_BUDGET: int = 3072
+    SEARCH_MAX_RESULTS: int = 100
+    CONTEXT_DUPLICATE_THRESHOLD: float = 0.9
+    CHAT_BATCH_CONCURRENCY: int = 4
+    
+    # Answer cache
+    ANSWER_CACHE_PATH: str = "./answer_cache/answers.db"
+    ANSWER_CACHE_MAX_ENTRIES_PER_COURSE: int = 1000
+    ANSWER_CACHE_TTL_SECONDS: int = 604800
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: float = 0.95
+    
+    # Stage timing (/metrics histograms)
+    STAGE_TIMING_ENABLED: bool = True
+    # Also return the stage durations to clients (Server-Timing header, ChatResponse.timings_ms)
+    SERVER_TIMING_ENABLED: bool = False
+    
+    # Ingestion jobs
+    INGESTION_WORKERS: int = 2
+    INGESTION_MAX_JOBS_PER_COURSE: int = 1
+    INGESTION_MAX_ATTEMPTS: int = 3
+    INGESTION_RETRY_DELAY_SECONDS: float = 5.0
+    EXTRACTION_PROCESSES: int = 2
+    EXTRACTION_WINDOW_PAGES: int = 16
+    EXTRACTION_WINDOW_BYTES: int = 262144
+    
+    # Startup warm-up: load services, models and course indexes before /ready reports ready
+    WARMUP_ENABLED: bool = True
+    WARMUP_MAX_COURSES: int = 20
+    WARMUP_TIMEOUT_SECONDS: float = 120.0
     
     # API
     API_V1_PREFIX: str = "/api/v1"
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
@@ -23,7 +23,34 @@ def get_db():
         db.close()
 
 
+# Columns added to existing tables after their first release, as (table, column, SQL type).
+# create_all only creates missing tables, so init_db adds these to older databases.
+ADDED_COLUMNS = [
+    ("course_material_files", "content_hash", "VARCHAR(64)"),
+    ("course_material_files", "chunk_count", "INTEGER NOT NULL DEFAULT 0"),
+    ("course_material_files", "indexed_at", "TIMESTAMP")
+]
+
+# Indexes on the added columns, as (index, table, column)
+ADDED_INDEXES = [
+    ("ix_course_material_files_content_hash", "course_material_files", "content_hash")
+]
+
+
+def _add_missing_columns():
+    """Add the columns in ADDED_COLUMNS to tables created before them. Safe to run repeatedly."""
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table, column, column_type in ADDED_COLUMNS:
+            existing = {existing_column["name"] for existing_column in inspector.get_columns(table)}
+            if column not in existing:
+                connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}"))
+        for index, table, column in ADDED_INDEXES:
+            connection.execute(text(f"CREATE INDEX IF NOT EXISTS {index} ON {table} ({column})"))
+
+
 def init_db():
-    """Initialize database tables."""
-    from app.models import user, course, enrollment, course_material_file
+    """Initialize database tables and add columns missing from older databases."""
+    from app.models import user, course, enrollment, course_material_file, ingestion_job
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
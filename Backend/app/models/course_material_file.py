@@ -16,10 +16,14 @@ class CourseMaterialFile(Base):
     file_path = Column(String, nullable=False)
     file_size = Column(BigInteger, nullable=False)
     mime_type = Column(String, nullable=False)
+    content_hash = Column(String(64), index=True)
+    chunk_count = Column(Integer, default=0, nullable=False)
     uploaded_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    indexed_at = Column(DateTime)
     
     # Relationships
     course = relationship("Course", back_populates="material_files")
+    ingestion_jobs = relationship("IngestionJob", back_populates="file", cascade="all, delete-orphan")
     
     def __repr__(self):
         return f"<CourseMaterialFile {self.filename} course_id={self.course_id}>"
@@ -0,0 +1,41 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy.orm import relationship
+import enum
+from app.database import Base
+
+
+class IngestionJobStatus(str, enum.Enum):
+    """Ingestion job state enumeration."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class IngestionJob(Base):
+    """Ingestion job model tracking the extraction and indexing of an uploaded file."""
+    
+    __tablename__ = "ingestion_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    file_id = Column(Integer, ForeignKey("course_material_files.id", ondelete="CASCADE"), nullable=False, index=True)
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), nullable=False)
+    status = Column(SQLEnum(IngestionJobStatus), default=IngestionJobStatus.QUEUED, nullable=False, index=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    chunks_indexed = Column(Integer, default=0, nullable=False)
+    chunks_reused = Column(Integer, default=0, nullable=False)
+    chunks_removed = Column(Integer, default=0, nullable=False)
+    elapsed_seconds = Column(Float)
+    embedding_cache_hits = Column(Integer, default=0, nullable=False)
+    embedding_cache_misses = Column(Integer, default=0, nullable=False)
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    
+    # Relationships
+    file = relationship("CourseMaterialFile", back_populates="ingestion_jobs")
+    
+    def __repr__(self):
+        return f"<IngestionJob {self.id} file_id={self.file_id} ({self.status})>"
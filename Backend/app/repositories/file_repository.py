@@ -1,4 +1,6 @@
+from datetime import datetime
 from typing import List, Optional
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.models.course_material_file import CourseMaterialFile
 
@@ -40,6 +42,38 @@ class CourseMaterialFileRepository:
             .count()
         )
     
+    def get_course_stats(self, course_id: int) -> dict:
+        """Get file count, chunk count, total bytes and last index time for a course."""
+        file_count, chunk_count, total_bytes, last_indexed_at = (
+            self.db.query(
+                func.count(CourseMaterialFile.id),
+                func.coalesce(func.sum(CourseMaterialFile.chunk_count), 0),
+                func.coalesce(func.sum(CourseMaterialFile.file_size), 0),
+                func.max(CourseMaterialFile.indexed_at)
+            )
+            .filter(CourseMaterialFile.course_id == course_id)
+            .one()
+        )
+        return {
+            "course_id": course_id,
+            "file_count": file_count,
+            "chunk_count": chunk_count,
+            "total_bytes": total_bytes,
+            "last_indexed_at": last_indexed_at
+        }
+    
+    def get_recently_indexed_course_ids(self, limit: int) -> List[int]:
+        """Get the IDs of courses with indexed chunks, most recently indexed first."""
+        rows = (
+            self.db.query(CourseMaterialFile.course_id)
+            .filter(CourseMaterialFile.chunk_count > 0)
+            .group_by(CourseMaterialFile.course_id)
+            .order_by(func.max(CourseMaterialFile.indexed_at).desc())
+            .limit(limit)
+            .all()
+        )
+        return [course_id for course_id, in rows]
+    
     def create(
         self,
         course_id: int,
@@ -47,7 +81,8 @@ class CourseMaterialFileRepository:
         original_filename: str,
         file_path: str,
         file_size: int,
-        mime_type: str
+        mime_type: str,
+        content_hash: Optional[str] = None
     ) -> CourseMaterialFile:
         """Create a new file record."""
         db_file = CourseMaterialFile(
@@ -56,13 +91,21 @@ class CourseMaterialFileRepository:
             original_filename=original_filename,
             file_path=file_path,
             file_size=file_size,
-            mime_type=mime_type
+            mime_type=mime_type,
+            content_hash=content_hash
         )
         self.db.add(db_file)
         self.db.commit()
         self.db.refresh(db_file)
         return db_file
     
+    def set_indexed(self, file: CourseMaterialFile, chunk_count: int) -> CourseMaterialFile:
+        """Record the number of chunks stored for a file after indexing."""
+        file.chunk_count = chunk_count
+        file.indexed_at = datetime.utcnow()
+        self.db.commit()
+        return file
+    
     def delete(self, file: CourseMaterialFile) -> None:
         """Delete a file record."""
         self.db.delete(file)
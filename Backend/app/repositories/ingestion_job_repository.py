@@ -0,0 +1,86 @@
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from app.models.ingestion_job import IngestionJob, IngestionJobStatus
+
+
+class IngestionJobRepository:
+    """Repository for IngestionJob entity operations."""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def get_by_id(self, job_id: int) -> Optional[IngestionJob]:
+        """Get job by ID."""
+        return self.db.query(IngestionJob).filter(IngestionJob.id == job_id).first()
+    
+    def get_by_status(self, status: IngestionJobStatus) -> List[IngestionJob]:
+        """Get all jobs in a given state, oldest first."""
+        return (
+            self.db.query(IngestionJob)
+            .filter(IngestionJob.status == status)
+            .order_by(IngestionJob.id)
+            .all()
+        )
+    
+    def create(self, file_id: int, course_id: int) -> IngestionJob:
+        """Create a new queued job."""
+        job = IngestionJob(
+            file_id=file_id,
+            course_id=course_id,
+            status=IngestionJobStatus.QUEUED
+        )
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+    
+    def mark_running(self, job: IngestionJob) -> IngestionJob:
+        """Mark a job as started and count the attempt."""
+        job.status = IngestionJobStatus.RUNNING
+        job.attempts += 1
+        job.started_at = datetime.utcnow()
+        job.error = None
+        self.db.commit()
+        return job
+    
+    def mark_completed(
+        self,
+        job: IngestionJob,
+        chunks_indexed: int,
+        chunks_reused: int,
+        chunks_removed: int,
+        elapsed_seconds: float,
+        embedding_cache_hits: int,
+        embedding_cache_misses: int
+    ) -> IngestionJob:
+        """Mark a job as completed with its indexing statistics."""
+        job.status = IngestionJobStatus.COMPLETED
+        job.chunks_indexed = chunks_indexed
+        job.chunks_reused = chunks_reused
+        job.chunks_removed = chunks_removed
+        job.elapsed_seconds = elapsed_seconds
+        job.embedding_cache_hits = embedding_cache_hits
+        job.embedding_cache_misses = embedding_cache_misses
+        job.finished_at = datetime.utcnow()
+        self.db.commit()
+        return job
+    
+    def mark_failed(self, job: IngestionJob, error: str, retry: bool) -> IngestionJob:
+        """Record a failed attempt, requeueing the job if it may be retried."""
+        job.status = IngestionJobStatus.QUEUED if retry else IngestionJobStatus.FAILED
+        job.error = error
+        if not retry:
+            job.finished_at = datetime.utcnow()
+        self.db.commit()
+        return job
+    
+    def requeue_interrupted(self) -> int:
+        """Requeue jobs left running by a previous process. Returns the number requeued."""
+        count = (
+            self.db.query(IngestionJob)
+            .filter(IngestionJob.status == IngestionJobStatus.RUNNING)
+            .update({IngestionJob.status: IngestionJobStatus.QUEUED}, synchronize_session=False)
+        )
+        self.db.commit()
+        return count
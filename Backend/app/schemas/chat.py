@@ -1,3 +1,4 @@
+from typing import Annotated
 from pydantic import BaseModel, Field
 
 
@@ -12,3 +13,27 @@ class ChatResponse(BaseModel):
     answer: str
     course_id: int
     retrieved_chunks: int = 0
+    cached: bool = False
+    coalesced: bool = False
+    prompt_tokens_before: int | None = None
+    prompt_tokens_after: int | None = None
+    timings_ms: dict[str, float] | None = None
+
+
+class ChatBatchRequest(BaseModel):
+    """Batch chat request schema."""
+    course_id: int = Field(..., gt=0)
+    questions: list[Annotated[str, Field(min_length=1, max_length=2000)]] = Field(
+        ..., min_length=1, max_length=100
+    )
+
+
+class ChatBatchItem(BaseModel):
+    """One answered question of a batch chat request, sent as one NDJSON line."""
+    index: int
+    question: str
+    answer: str | None = None
+    retrieved_chunks: int = 0
+    cached: bool = False
+    coalesced: bool = False
+    error: str | None = None
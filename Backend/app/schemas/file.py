@@ -1,5 +1,6 @@
 from datetime import datetime
 from pydantic import BaseModel
+from app.schemas.ingestion_job import IngestionJobResponse
 
 
 class CourseMaterialFileResponse(BaseModel):
@@ -10,14 +11,34 @@ class CourseMaterialFileResponse(BaseModel):
     original_filename: str
     file_size: int
     mime_type: str
+    content_hash: str | None = None
+    chunk_count: int = 0
     uploaded_at: datetime
+    indexed_at: datetime | None = None
     
     class Config:
         from_attributes = True
 
 
+class CourseMaterialStatsResponse(BaseModel):
+    """Aggregated indexing statistics for a course's materials."""
+    course_id: int
+    file_count: int
+    chunk_count: int
+    total_bytes: int
+    last_indexed_at: datetime | None = None
+
+
 class FileUploadResponse(BaseModel):
     """File upload response schema."""
     uploaded_files: list[CourseMaterialFileResponse]
     total_files: int
     failed_files: list[str] = []
+    jobs: list[IngestionJobResponse] = []
+
+
+class FileReplaceResponse(BaseModel):
+    """File replace response schema."""
+    file: CourseMaterialFileResponse
+    unchanged: bool = False
+    job: IngestionJobResponse | None = None
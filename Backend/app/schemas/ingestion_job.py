@@ -0,0 +1,25 @@
+from datetime import datetime
+from pydantic import BaseModel
+from app.models.ingestion_job import IngestionJobStatus
+
+
+class IngestionJobResponse(BaseModel):
+    """Ingestion job response schema."""
+    id: int
+    file_id: int
+    course_id: int
+    status: IngestionJobStatus
+    attempts: int
+    chunks_indexed: int
+    chunks_reused: int
+    chunks_removed: int
+    elapsed_seconds: float | None = None
+    embedding_cache_hits: int
+    embedding_cache_misses: int
+    error: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    
+    class Config:
+        from_attributes = True
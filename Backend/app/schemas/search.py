@@ -0,0 +1,29 @@
+from pydantic import BaseModel, Field
+
+
+class SearchRequest(BaseModel):
+    """Course materials search request schema."""
+    course_id: int = Field(..., gt=0)
+    query: str = Field(..., min_length=1, max_length=2000)
+    limit: int = Field(10, ge=1, le=50)
+    offset: int = Field(0, ge=0)
+
+
+class SearchHit(BaseModel):
+    """A chunk of course material matching a search."""
+    chunk_id: str
+    file_id: int | None = None
+    filename: str | None = None
+    score: float | None = None
+    text: str
+    start_char_idx: int | None = None
+    end_char_idx: int | None = None
+
+
+class SearchResponse(BaseModel):
+    """Course materials search response schema."""
+    course_id: int
+    hits: list[SearchHit]
+    offset: int
+    limit: int
+    has_more: bool = False
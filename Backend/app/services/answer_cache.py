@@ -0,0 +1,325 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.config import settings
+
+
+def normalize_question(question: str) -> str:
+    """Normalize a question for exact matching: case, whitespace and trailing punctuation."""
+    normalized = re.sub(r"\s+", " ", question.strip().lower())
+    return normalized.rstrip("?!. ")
+
+
+@dataclass
+class CachedAnswer:
+    """An answer previously generated for a course."""
+    answer: str
+    retrieved_chunks: int
+
+
+class AnswerCache:
+    """
+    Persistent per-course cache of generated chat answers.
+
+    Answers are found either by exact match on the normalized question or by
+    cosine similarity of the question embedding above similarity_threshold.
+    Each entry records the embedding model its question was embedded with,
+    and only entries of the current model take part in similarity lookups,
+    so changing OLLAMA_EMBEDDING_MODEL never compares vectors of different
+    models. Entries expire after ttl_seconds, and each course keeps at most
+    max_entries_per_course answers, evicting the least recently used.
+    Course entries must be invalidated whenever the course materials change.
+
+    Each invalidation also advances the course's epoch, kept in the database
+    so it is shared by every worker process. An answer is only stored if the
+    epoch read before retrieving its context is still current, so a
+    generation that overlaps a change of the materials never caches an
+    answer built from the old ones.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries_per_course: int,
+        ttl_seconds: int,
+        similarity_threshold: float,
+        embedding_model: str
+    ):
+        """
+        Initialize the answer cache.
+
+        Args:
+            path: Path to the SQLite database backing the cache
+            max_entries_per_course: Maximum number of answers kept per course
+            ttl_seconds: Lifetime of a cached answer
+            similarity_threshold: Minimum cosine similarity for a near-duplicate hit
+            embedding_model: Name of the model question embeddings come from
+        """
+        self._embedding_model = embedding_model
+        self._max_entries_per_course = max_entries_per_course
+        self._ttl_seconds = ttl_seconds
+        self._similarity_threshold = similarity_threshold
+        self._lock = threading.Lock()
+        # course_id -> (question hashes, creation times, row-normalized embedding matrix)
+        self._vectors: Dict[int, Tuple[List[str], np.ndarray, np.ndarray]] = {}
+        self._exact_hits = 0
+        self._similar_hits = 0
+        self._misses = 0
+        self._stale_puts = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS answers (
+                course_id INTEGER NOT NULL,
+                question_hash TEXT NOT NULL,
+                embedding BLOB,
+                embedding_model TEXT,
+                answer TEXT NOT NULL,
+                retrieved_chunks INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (course_id, question_hash)
+            )
+            """
+        )
+        columns = [row[1] for row in self._connection.execute("PRAGMA table_info(answers)")]
+        if "embedding_model" not in columns:
+            # Databases created before the column existed; their embeddings' model is unknown
+            self._connection.execute("ALTER TABLE answers ADD COLUMN embedding_model TEXT")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS course_epochs ("
+            "course_id INTEGER PRIMARY KEY, epoch INTEGER NOT NULL)"
+        )
+        self._connection.commit()
+
+    @staticmethod
+    def _hash_question(question: str) -> str:
+        return hashlib.sha256(normalize_question(question).encode("utf-8")).hexdigest()
+
+    def _fetch(self, course_id: int, question_hash: str) -> Optional[CachedAnswer]:
+        """Read a live entry and mark it used, dropping it if expired. Caller holds the lock."""
+        row = self._connection.execute(
+            "SELECT answer, retrieved_chunks, created_at FROM answers "
+            "WHERE course_id = ? AND question_hash = ?",
+            (course_id, question_hash)
+        ).fetchone()
+        if row is None:
+            return None
+
+        answer, retrieved_chunks, created_at = row
+        now = time.time()
+        if now - created_at > self._ttl_seconds:
+            self._connection.execute(
+                "DELETE FROM answers WHERE course_id = ? AND question_hash = ?",
+                (course_id, question_hash)
+            )
+            self._connection.commit()
+            self._vectors.pop(course_id, None)
+            return None
+
+        self._connection.execute(
+            "UPDATE answers SET last_used = ? WHERE course_id = ? AND question_hash = ?",
+            (now, course_id, question_hash)
+        )
+        self._connection.commit()
+        return CachedAnswer(answer=answer, retrieved_chunks=retrieved_chunks)
+
+    def _read_epoch(self, course_id: int) -> int:
+        """Read the course's epoch. Caller holds the lock."""
+        row = self._connection.execute(
+            "SELECT epoch FROM course_epochs WHERE course_id = ?", (course_id,)
+        ).fetchone()
+        return row[0] if row is not None else 0
+
+    def epoch(self, course_id: int) -> int:
+        """
+        Get the course's invalidation epoch, to pass to put.
+
+        Read it before retrieving the context an answer is generated from.
+
+        Args:
+            course_id: The course ID
+
+        Returns:
+            The current epoch
+        """
+        with self._lock:
+            return self._read_epoch(course_id)
+
+    def _course_vectors(self, course_id: int) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """Load the course's question embeddings of the current model into memory. Caller holds the lock."""
+        if course_id not in self._vectors:
+            rows = self._connection.execute(
+                "SELECT question_hash, created_at, embedding FROM answers "
+                "WHERE course_id = ? AND embedding IS NOT NULL AND embedding_model = ?",
+                (course_id, self._embedding_model)
+            ).fetchall()
+            hashes = [question_hash for question_hash, _, _ in rows]
+            created_at = np.array([created for _, created, _ in rows], dtype=np.float64)
+            if rows:
+                matrix = np.vstack([np.frombuffer(blob, dtype=np.float32) for _, _, blob in rows])
+                matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+            else:
+                matrix = np.empty((0, 0), dtype=np.float32)
+            self._vectors[course_id] = (hashes, created_at, matrix)
+        return self._vectors[course_id]
+
+    def get_exact(self, course_id: int, question: str) -> Optional[CachedAnswer]:
+        """
+        Look up an answer by normalized question text.
+
+        Args:
+            course_id: The course ID
+            question: The user's question
+
+        Returns:
+            The cached answer, or None on a miss
+        """
+        with self._lock:
+            cached = self._fetch(course_id, self._hash_question(question))
+            if cached is not None:
+                self._exact_hits += 1
+            return cached
+
+    def get_similar(self, course_id: int, embedding: List[float]) -> Optional[CachedAnswer]:
+        """
+        Look up the answer to the most similar previous question that has not expired.
+
+        Args:
+            course_id: The course ID
+            embedding: Embedding of the user's question
+
+        Returns:
+            The cached answer if its question is similar enough, otherwise None
+        """
+        with self._lock:
+            hashes, created_at, matrix = self._course_vectors(course_id)
+            query = np.asarray(embedding, dtype=np.float32)
+            if hashes and matrix.shape[1] == query.shape[0]:
+                query = query / max(float(np.linalg.norm(query)), 1e-12)
+                scores = matrix @ query
+                # Expired entries must not shadow a live one that is almost as similar
+                scores[time.time() - created_at > self._ttl_seconds] = -np.inf
+                best = int(np.argmax(scores))
+                if scores[best] >= self._similarity_threshold:
+                    cached = self._fetch(course_id, hashes[best])
+                    if cached is not None:
+                        self._similar_hits += 1
+                        return cached
+
+            self._misses += 1
+            return None
+
+    def put(
+        self,
+        course_id: int,
+        question: str,
+        embedding: Optional[List[float]],
+        answer: str,
+        retrieved_chunks: int,
+        epoch: int
+    ) -> bool:
+        """
+        Store a generated answer, unless the course was invalidated since epoch was read.
+
+        Args:
+            course_id: The course ID
+            question: The user's question
+            embedding: Embedding of the question, used for near-duplicate lookups
+            answer: The generated answer
+            retrieved_chunks: Number of chunks the answer was generated from
+            epoch: The course's epoch read before retrieving the answer's context
+
+        Returns:
+            Whether the answer was stored
+        """
+        blob = np.asarray(embedding, dtype=np.float32).tobytes() if embedding is not None else None
+        now = time.time()
+        with self._lock:
+            # Take the write lock first, so no other process invalidates between the check and the insert
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                if self._read_epoch(course_id) != epoch:
+                    self._connection.rollback()
+                    self._stale_puts += 1
+                    return False
+
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO answers (course_id, question_hash, embedding, embedding_model, "
+                    "answer, retrieved_chunks, created_at, last_used) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        course_id, self._hash_question(question), blob, self._embedding_model,
+                        answer, retrieved_chunks, now, now
+                    )
+                )
+                self._connection.execute(
+                    "DELETE FROM answers WHERE course_id = ? AND question_hash IN ("
+                    "SELECT question_hash FROM answers WHERE course_id = ? "
+                    "ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (course_id, course_id, self._max_entries_per_course)
+                )
+                self._connection.commit()
+            except BaseException:
+                self._connection.rollback()
+                raise
+            self._vectors.pop(course_id, None)
+            return True
+
+    def invalidate(self, course_id: int) -> None:
+        """
+        Drop every cached answer for a course and advance its epoch.
+
+        Args:
+            course_id: The course ID
+        """
+        with self._lock:
+            self._connection.execute("DELETE FROM answers WHERE course_id = ?", (course_id,))
+            self._connection.execute(
+                "INSERT INTO course_epochs (course_id, epoch) VALUES (?, 1) "
+                "ON CONFLICT (course_id) DO UPDATE SET epoch = epoch + 1",
+                (course_id,)
+            )
+            self._connection.commit()
+            self._vectors.pop(course_id, None)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dictionary with exact hits, similar hits, misses, hit rate, current size
+            and answers not stored because the course changed during their generation
+        """
+        with self._lock:
+            (entries,) = self._connection.execute("SELECT COUNT(*) FROM answers").fetchone()
+            hits = self._exact_hits + self._similar_hits
+            lookups = hits + self._misses
+            return {
+                "exact_hits": self._exact_hits,
+                "similar_hits": self._similar_hits,
+                "misses": self._misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "entries": entries,
+                "stale_puts": self._stale_puts
+            }
+
+
+# Singleton instance
+answer_cache = AnswerCache(
+    path=settings.ANSWER_CACHE_PATH,
+    max_entries_per_course=settings.ANSWER_CACHE_MAX_ENTRIES_PER_COURSE,
+    ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+    similarity_threshold=settings.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+    embedding_model=settings.OLLAMA_EMBEDDING_MODEL
+)
@@ -0,0 +1,211 @@
+import re
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Set
+from llama_index.core.schema import MetadataMode, NodeWithScore, TextNode
+from llama_index.core.utils import get_tokenizer
+from app.config import settings
+
+
+@dataclass
+class AssembledContext:
+    """Context selected for a prompt, with prompt sizes before and after assembly."""
+    prompt: str
+    chunks_used: int
+    prompt_tokens_before: int
+    prompt_tokens_after: int
+
+
+class ContextAssembler:
+    """
+    Turns retrieved chunks into a compact QA prompt context.
+
+    Chunks from the same file whose character ranges overlap or touch are
+    merged into one passage, passages whose word shingles are mostly
+    contained in a higher-scoring passage are dropped, and the remaining
+    passages are packed in score order up to a token budget. Token counts
+    use the llama_index default tokenizer, an approximation of the chat
+    model's own tokenizer.
+    """
+
+    # Largest gap in characters between two chunks of a file that still counts as adjacent
+    MAX_MERGE_GAP = 1
+    # Words per shingle for near-duplicate detection
+    SHINGLE_SIZE = 3
+
+    def __init__(self, token_budget: int, duplicate_threshold: float):
+        """
+        Initialize the context assembler.
+
+        Args:
+            token_budget: Maximum number of context tokens in the prompt
+            duplicate_threshold: Shingle containment above which a passage is a near-duplicate
+        """
+        self._token_budget = token_budget
+        self._duplicate_threshold = duplicate_threshold
+        self._tokenize = get_tokenizer()
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._tokens_before = 0
+        self._tokens_after = 0
+        self._chunks_in = 0
+        self._chunks_out = 0
+
+    def count_tokens(self, text: str) -> int:
+        """Count the tokens of a text."""
+        return len(self._tokenize(text))
+
+    def _merge(self, nodes: List[NodeWithScore]) -> List[NodeWithScore]:
+        """Merge overlapping or adjacent chunks of the same file, keeping the best score."""
+        positioned: Dict[object, List[NodeWithScore]] = {}
+        merged: List[NodeWithScore] = []
+        for node in nodes:
+            file_id = node.node.metadata.get("file_id")
+            if file_id is None or node.node.start_char_idx is None or node.node.end_char_idx is None:
+                merged.append(node)
+            else:
+                positioned.setdefault(file_id, []).append(node)
+
+        for file_nodes in positioned.values():
+            file_nodes.sort(key=lambda n: n.node.start_char_idx)
+            current = file_nodes[0]
+            text = current.node.get_content()
+            start, end, score = current.node.start_char_idx, current.node.end_char_idx, current.score
+
+            for node in file_nodes[1:]:
+                next_text = node.node.get_content()
+                next_start, next_end = node.node.start_char_idx, node.node.end_char_idx
+                overlap = end - next_start
+                if 0 < overlap <= len(next_text) and text.endswith(next_text[:overlap]):
+                    text += next_text[overlap:]
+                elif 0 <= -overlap <= self.MAX_MERGE_GAP:
+                    text += " " * -overlap + next_text
+                elif overlap > 0 and next_end <= end and next_text in text:
+                    pass
+                else:
+                    merged.append(self._with_text(current, text, start, end, score))
+                    current, text, start, score = node, next_text, next_start, node.score
+                    end = next_end
+                    continue
+                end = max(end, next_end)
+                score = max(score or 0.0, node.score or 0.0)
+
+            merged.append(self._with_text(current, text, start, end, score))
+
+        merged.sort(key=lambda n: n.score or 0.0, reverse=True)
+        return merged
+
+    @staticmethod
+    def _with_text(node: NodeWithScore, text: str, start: int, end: int, score: Optional[float]) -> NodeWithScore:
+        """Copy a chunk with new text and character range, keeping its metadata settings."""
+        if text == node.node.get_content() and score == node.score:
+            return node
+        source = node.node
+        merged = TextNode(
+            text=text,
+            metadata=dict(source.metadata),
+            excluded_embed_metadata_keys=list(source.excluded_embed_metadata_keys),
+            excluded_llm_metadata_keys=list(source.excluded_llm_metadata_keys),
+            start_char_idx=start,
+            end_char_idx=end
+        )
+        return NodeWithScore(node=merged, score=score)
+
+    def _shingles(self, text: str) -> Set[tuple]:
+        words = re.findall(r"\w+", text.lower())
+        size = self.SHINGLE_SIZE
+        if len(words) < size:
+            return {tuple(words)}
+        return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+    def _drop_duplicates(self, nodes: List[NodeWithScore]) -> List[NodeWithScore]:
+        """Drop passages mostly contained in a higher-scoring kept passage."""
+        kept: List[NodeWithScore] = []
+        kept_shingles: List[Set[tuple]] = []
+        for node in nodes:
+            shingles = self._shingles(node.node.get_content())
+            duplicate = any(
+                len(shingles & other) / max(1, min(len(shingles), len(other))) >= self._duplicate_threshold
+                for other in kept_shingles
+            )
+            if not duplicate:
+                kept.append(node)
+                kept_shingles.append(shingles)
+        return kept
+
+    def _pack(self, passages: List[str]) -> List[str]:
+        """Take passages in order while they fit the token budget, truncating the first if needed."""
+        packed = []
+        used = 0
+        for passage in passages:
+            tokens = self.count_tokens(passage)
+            if used + tokens <= self._token_budget:
+                packed.append(passage)
+                used += tokens
+            elif not packed:
+                # Always keep the best passage, cut to the budget
+                keep = int(len(passage) * self._token_budget / tokens)
+                packed.append(passage[:keep])
+                used = self._token_budget
+        return packed
+
+    def assemble(self, nodes: List[NodeWithScore], render: Callable[[str], str]) -> AssembledContext:
+        """
+        Build the prompt for a set of retrieved chunks.
+
+        Args:
+            nodes: Retrieved chunks, best first
+            render: Fills the prompt template with a context string
+
+        Returns:
+            The assembled prompt with token counts of the naive and the assembled prompt
+        """
+        naive_prompt = render("\n\n".join(
+            node.node.get_content(metadata_mode=MetadataMode.LLM) for node in nodes
+        ))
+
+        passages = self._drop_duplicates(self._merge(nodes))
+        packed = self._pack([
+            node.node.get_content(metadata_mode=MetadataMode.LLM) for node in passages
+        ])
+        prompt = render("\n\n".join(packed))
+
+        assembled = AssembledContext(
+            prompt=prompt,
+            chunks_used=len(packed),
+            prompt_tokens_before=self.count_tokens(naive_prompt),
+            prompt_tokens_after=self.count_tokens(prompt)
+        )
+        with self._lock:
+            self._requests += 1
+            self._tokens_before += assembled.prompt_tokens_before
+            self._tokens_after += assembled.prompt_tokens_after
+            self._chunks_in += len(nodes)
+            self._chunks_out += len(packed)
+        return assembled
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get prompt size counters.
+
+        Returns:
+            Dictionary with assembled prompt count, total tokens before and after and the share saved
+        """
+        with self._lock:
+            return {
+                "prompts": self._requests,
+                "chunks_retrieved": self._chunks_in,
+                "passages_used": self._chunks_out,
+                "prompt_tokens_before": self._tokens_before,
+                "prompt_tokens_after": self._tokens_after,
+                "tokens_saved_rate": (
+                    1 - self._tokens_after / self._tokens_before if self._tokens_before else 0.0
+                )
+            }
+
+
+# Singleton instance
+context_assembler = ContextAssembler(
+    token_budget=settings.CONTEXT_TOKEN_BUDGET,
+    duplicate_threshold=settings.CONTEXT_DUPLICATE_THRESHOLD
+)
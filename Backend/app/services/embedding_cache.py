@@ -0,0 +1,326 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional
+from app.config import settings
+from app.utils.lru_cache import LRUCache
+
+
+class EmbeddingCache:
+    """
+    Persistent, size-bounded cache of text embeddings.
+
+    Entries are keyed by (embedding model name, SHA-256 of the text) so identical
+    chunks are only embedded once, whichever file or course they come from.
+    When the cache grows past max_entries the least recently used entries are evicted
+    in one batch, down to EVICTION_LOW_WATER of max_entries.
+    """
+
+    # Fraction of max_entries kept after an eviction, so evictions run in batches
+    EVICTION_LOW_WATER = 0.9
+
+    def __init__(self, path: str, max_entries: int):
+        """
+        Initialize the embedding cache.
+
+        Args:
+            path: Path to the SQLite database backing the cache
+            max_entries: Maximum number of embeddings to keep
+        """
+        self._path = path
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)"
+        )
+        self._connection.commit()
+
+        # Running entry count, recounted exactly only when it crosses max_entries.
+        # Rows written by other workers sharing the file are picked up at that recount.
+        (self._entries,) = self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+
+    @staticmethod
+    def hash_text(text: str) -> str:
+        """Return the content hash used as cache key for a text."""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(
+        self,
+        model: str,
+        texts: List[str],
+        track_stats: bool = True
+    ) -> List[Optional[List[float]]]:
+        """
+        Look up embeddings for a list of texts.
+
+        Args:
+            model: The embedding model name
+            texts: The texts to look up
+            track_stats: Whether the lookup counts towards the hit/miss counters
+
+        Returns:
+            List aligned with texts, holding the cached embedding or None on a miss
+        """
+        hashes = [self.hash_text(text) for text in texts]
+        if not hashes:
+            return []
+
+        placeholders = ",".join("?" for _ in hashes)
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT text_hash, embedding FROM embeddings "
+                f"WHERE model = ? AND text_hash IN ({placeholders})",
+                [model, *hashes]
+            ).fetchall()
+            found = {text_hash: blob for text_hash, blob in rows}
+
+            if found:
+                self._connection.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                    [(time.time(), model, text_hash) for text_hash in found]
+                )
+                self._connection.commit()
+
+            if track_stats:
+                hits = sum(1 for text_hash in hashes if text_hash in found)
+                self._hits += hits
+                self._misses += len(hashes) - hits
+
+        return [
+            array("f", found[text_hash]).tolist() if text_hash in found else None
+            for text_hash in hashes
+        ]
+
+    def put_many(
+        self,
+        model: str,
+        texts: List[str],
+        embeddings: List[List[float]]
+    ) -> None:
+        """
+        Store embeddings for a list of texts.
+
+        Args:
+            model: The embedding model name
+            texts: The embedded texts
+            embeddings: The embeddings, aligned with texts
+        """
+        if not texts:
+            return
+
+        now = time.time()
+        rows = [
+            (model, self.hash_text(text), array("f", embedding).tobytes(), now)
+            for text, embedding in zip(texts, embeddings)
+        ]
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, embedding, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                rows
+            )
+            # Replaced rows are counted too, so this can only overestimate
+            self._entries += len(rows)
+            if self._entries > self._max_entries:
+                self._evict()
+            self._connection.commit()
+
+    def _evict(self) -> None:
+        """
+        Drop the least recently used entries once over max_entries. Caller holds the lock.
+
+        The count is refreshed first; when the cache really is full it is cut down to
+        the low-water mark, so the next eviction is only due after many more inserts.
+        """
+        (count,) = self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        if count > self._max_entries:
+            overflow = count - int(self._max_entries * self.EVICTION_LOW_WATER)
+            self._connection.execute(
+                "DELETE FROM embeddings WHERE rowid IN "
+                "(SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                (overflow,)
+            )
+            self._evictions += overflow
+            count -= overflow
+        self._entries = count
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dictionary with hits, misses, hit rate, evictions and current size
+        """
+        with self._lock:
+            (entries,) = self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "entries": entries,
+                "max_entries": self._max_entries
+            }
+
+
+class QueryEmbeddingCache:
+    """
+    In-process LRU cache of query embeddings keyed by (model, normalized text).
+
+    When a shared EmbeddingCache is given, misses fall back to it and new
+    embeddings are written to it, so workers sharing the same database file
+    also share query embeddings.
+    """
+
+    # Model-name suffix that keeps query entries apart from document chunks in the shared store
+    SHARED_NAMESPACE = "#query"
+
+    def __init__(self, max_size: int, shared: Optional[EmbeddingCache] = None):
+        """
+        Initialize the query embedding cache.
+
+        Args:
+            max_size: Maximum number of embeddings kept in memory
+            shared: Optional persistent cache shared across workers
+        """
+        self._entries = LRUCache(max_size=max_size)
+        self._shared = shared
+        self._lock = threading.Lock()
+        self._memory_hits = 0
+        self._shared_hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Collapse whitespace so trivially different retries share an entry."""
+        return re.sub(r"\s+", " ", text).strip()
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        """
+        Look up the embedding of a query.
+
+        Args:
+            model: The embedding model name
+            text: The normalized query text
+
+        Returns:
+            The cached embedding, or None on a miss
+        """
+        embedding = self._entries.get((model, text))
+        if embedding is not None:
+            with self._lock:
+                self._memory_hits += 1
+            return embedding
+
+        if self._shared is not None:
+            embedding = self._shared.get_many(
+                model + self.SHARED_NAMESPACE,
+                [text],
+                track_stats=False
+            )[0]
+            if embedding is not None:
+                self._entries.put((model, text), embedding)
+                with self._lock:
+                    self._shared_hits += 1
+                return embedding
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def put(self, model: str, text: str, embedding: List[float]) -> None:
+        """
+        Store the embedding of a query.
+
+        Args:
+            model: The embedding model name
+            text: The normalized query text
+            embedding: The query embedding
+        """
+        self.put_many(model, [text], [embedding])
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Look up the embeddings of several queries.
+
+        Args:
+            model: The embedding model name
+            texts: The normalized query texts
+
+        Returns:
+            List aligned with texts, holding the cached embedding or None on a miss
+        """
+        return [self.get(model, text) for text in texts]
+
+    def put_many(self, model: str, texts: List[str], embeddings: List[List[float]]) -> None:
+        """
+        Store the embeddings of several queries, in one write to the shared store.
+
+        Args:
+            model: The embedding model name
+            texts: The normalized query texts
+            embeddings: The query embeddings, aligned with texts
+        """
+        for text, embedding in zip(texts, embeddings):
+            self._entries.put((model, text), embedding)
+        if self._shared is not None:
+            self._shared.put_many(model + self.SHARED_NAMESPACE, texts, embeddings)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dictionary with memory hits, shared hits, misses, hit rate and current size
+        """
+        with self._lock:
+            hits = self._memory_hits + self._shared_hits
+            lookups = hits + self._misses
+            counters = {
+                "memory_hits": self._memory_hits,
+                "shared_hits": self._shared_hits,
+                "misses": self._misses,
+                "hit_rate": hits / lookups if lookups else 0.0
+            }
+        entries = self._entries.stats()
+        counters["entries"] = entries["entries"]
+        counters["max_entries"] = entries["max_entries"]
+        counters["shared"] = self._shared is not None
+        return counters
+
+
+# Singleton instances
+embedding_cache = EmbeddingCache(
+    path=settings.EMBEDDING_CACHE_PATH,
+    max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES
+)
+
+query_embedding_cache = QueryEmbeddingCache(
+    max_size=settings.QUERY_EMBEDDING_CACHE_SIZE,
+    shared=embedding_cache if settings.QUERY_EMBEDDING_CACHE_SHARED else None
+)
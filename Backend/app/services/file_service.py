@@ -1,12 +1,19 @@
+import asyncio
+import gzip
+import hashlib
+import multiprocessing
 import os
+import threading
+import time
 import uuid
 import aiofiles
-from typing import List, Tuple
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
 from fastapi import UploadFile, HTTPException, status
-from pypdf import PdfReader
-from io import BytesIO
+from llama_index.core.schema import BaseNode
 from app.config import settings
-from app.services.vector_store import vector_store_service
+from app.services import text_processing
+from app.services.vector_store import vector_store_service, IndexingResult
 
 
 class FileService:
@@ -18,10 +25,17 @@ class FileService:
         'text/plain',
         'application/octet-stream'  # Sometimes PDFs are uploaded as this
     }
+    # Served media types, by extension rather than the client-reported upload MIME type
+    MEDIA_TYPES = {
+        '.pdf': 'application/pdf',
+        '.txt': 'text/plain; charset=utf-8'
+    }
     
     def __init__(self):
         """Initialize file service."""
         os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+        self._extraction_executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
     
     def _validate_file(self, file: UploadFile) -> None:
         """
@@ -64,16 +78,23 @@ class FileService:
         self,
         file: UploadFile,
         course_id: int
-    ) -> Tuple[str, str, int]:
+    ) -> Tuple[str, str, int, str]:
         """
         Save uploaded file to disk.
         
+        The upload is streamed in UPLOAD_CHUNK_SIZE pieces into a temporary file,
+        hashed as it arrives and aborted as soon as it exceeds MAX_FILE_SIZE.
+        The temporary file is renamed into place only once fully written.
+        
         Args:
             file: The uploaded file
             course_id: The course ID
             
         Returns:
-            Tuple of (file_path, unique_filename, file_size)
+            Tuple of (file_path, unique_filename, file_size, content_hash)
+            
+        Raises:
+            HTTPException: If the file is invalid or too large
         """
         # Validate file
         self._validate_file(file)
@@ -85,27 +106,78 @@ class FileService:
         # Generate unique filename
         unique_filename = self._generate_unique_filename(file.filename)
         file_path = os.path.join(course_dir, unique_filename)
+        temp_path = f"{file_path}.part"
         
-        # Save file
+        # Stream file to disk
         file_size = 0
-        async with aiofiles.open(file_path, 'wb') as f:
-            content = await file.read()
-            file_size = len(content)
+        hasher = hashlib.sha256()
+        try:
+            async with aiofiles.open(temp_path, 'wb') as f:
+                while chunk := await file.read(settings.UPLOAD_CHUNK_SIZE):
+                    file_size += len(chunk)
+                    
+                    # Check file size
+                    if file_size > settings.MAX_FILE_SIZE:
+                        raise HTTPException(
+                            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"File too large. Maximum size: {settings.MAX_FILE_SIZE} bytes"
+                        )
+                    
+                    hasher.update(chunk)
+                    await f.write(chunk)
             
-            # Check file size
-            if file_size > settings.MAX_FILE_SIZE:
-                raise HTTPException(
-                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                    detail=f"File too large. Maximum size: {settings.MAX_FILE_SIZE} bytes"
-                )
+            os.replace(temp_path, file_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        
+        return file_path, unique_filename, file_size, hasher.hexdigest()
+    
+    def media_type(self, filename: str) -> str:
+        """
+        Get the media type a stored file is served with.
+        
+        Args:
+            filename: The stored or original filename
             
-            await f.write(content)
+        Returns:
+            The media type
+        """
+        file_ext = os.path.splitext(filename)[1].lower()
+        return self.MEDIA_TYPES.get(file_ext, 'application/octet-stream')
+    
+    def _get_extraction_executor(self) -> Optional[ProcessPoolExecutor]:
+        """
+        Get the process pool used for text extraction and chunking, creating it on first use.
+        
+        Returns:
+            The process pool, or None if EXTRACTION_PROCESSES is 0 and work runs in a thread
+        """
+        if settings.EXTRACTION_PROCESSES <= 0:
+            return None
         
-        return file_path, unique_filename, file_size
+        with self._executor_lock:
+            if self._extraction_executor is None:
+                # Forking this multithreaded process could copy a lock held by another
+                # thread into a worker and deadlock it. Workers are forked instead from a
+                # clean single-threaded server that has already imported text_processing,
+                # the only module they run. Platforms without forkserver (Windows) spawn
+                # fresh interpreters
+                if "forkserver" in multiprocessing.get_all_start_methods():
+                    context = multiprocessing.get_context("forkserver")
+                    context.set_forkserver_preload(["app.services.text_processing"])
+                else:
+                    context = multiprocessing.get_context("spawn")
+                self._extraction_executor = ProcessPoolExecutor(
+                    max_workers=settings.EXTRACTION_PROCESSES,
+                    mp_context=context
+                )
+            return self._extraction_executor
     
     def extract_text(self, file_path: str) -> str:
         """
-        Extract text from a file.
+        Extract text from a file, reading a PDF's text rendition if it has one.
         
         Args:
             file_path: Path to the file
@@ -116,65 +188,199 @@ class FileService:
         Raises:
             HTTPException: If text extraction fails
         """
-        file_ext = os.path.splitext(file_path)[1].lower()
-        
         try:
-            if file_ext == '.pdf':
-                return self._extract_text_from_pdf(file_path)
-            elif file_ext == '.txt':
-                return self._extract_text_from_txt(file_path)
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Unsupported file type: {file_ext}"
-                )
+            rendition_path = text_processing.text_rendition_path(file_path)
+            if os.path.exists(rendition_path):
+                with gzip.open(rendition_path, 'rt', encoding='utf-8', newline='') as f:
+                    return f.read()
+            return text_processing.extract_text(file_path)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to extract text from file: {str(e)}"
             )
     
-    def _extract_text_from_pdf(self, file_path: str) -> str:
+    def iter_chunk_batches(
+        self,
+        file_path: str,
+        course_id: int,
+        file_id: int,
+        filename: str
+    ) -> Iterator[List[BaseNode]]:
         """
-        Extract text from PDF file.
+        Extract and chunk a saved file window by window in the extraction process pool.
+        
+        Each window covers EXTRACTION_WINDOW_PAGES pages of a PDF or
+        EXTRACTION_WINDOW_BYTES of a text file. While the caller embeds and
+        stores one window's chunks, the next window is already being extracted,
+        so at most two windows of a file are in memory at once, however large it is.
+        
+        The first extraction of a PDF also writes its text rendition. Later
+        ones, such as retries or re-indexing with another embedding model,
+        chunk the rendition instead of parsing the PDF again. The rendition
+        holds the same text, so the chunks are identical.
         
         Args:
-            file_path: Path to the PDF file
+            file_path: Path to the saved file
+            course_id: The course ID
+            file_id: The file ID from database
+            filename: The original filename
             
-        Returns:
-            Extracted text
+        Yields:
+            The chunk nodes of each window, not yet embedded
+            
+        Raises:
+            HTTPException: If text extraction fails
         """
-        text_content = []
+        executor = self._get_extraction_executor()
         
-        with open(file_path, 'rb') as f:
-            pdf_reader = PdfReader(f)
+        source_path = file_path
+        rendition = None
+        rendition_path = text_processing.text_rendition_path(file_path)
+        temp_path = f"{rendition_path}.{uuid.uuid4().hex}.part"
+        if os.path.splitext(file_path)[1].lower() == '.pdf':
+            if os.path.exists(rendition_path):
+                source_path = rendition_path
+            else:
+                rendition = gzip.open(temp_path, 'wb', compresslevel=6)
+        
+        def submit(cursor: text_processing.ExtractionCursor) -> Future:
+            args = (
+                source_path, cursor, course_id, file_id, filename,
+                settings.CHUNK_SIZE, settings.CHUNK_OVERLAP,
+                settings.EXTRACTION_WINDOW_PAGES, settings.EXTRACTION_WINDOW_BYTES
+            )
+            if executor is not None:
+                return executor.submit(text_processing.split_window, *args)
+            future = Future()
+            try:
+                future.set_result(text_processing.split_window(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        
+        pending = submit(text_processing.ExtractionCursor())
+        try:
+            while True:
+                try:
+                    nodes, cursor, text = pending.result()
+                except ValueError as e:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=str(e)
+                    )
+                except Exception as e:
+                    raise HTTPException(
+                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                        detail=f"Failed to extract text from file: {str(e)}"
+                    )
+                
+                if not cursor.done:
+                    pending = submit(cursor)
+                if rendition is not None:
+                    rendition.write(text.encode('utf-8'))
+                    if cursor.done:
+                        rendition.close()
+                        os.replace(temp_path, rendition_path)
+                        rendition = None
+                if nodes:
+                    yield nodes
+                if cursor.done:
+                    return
+        finally:
+            pending.cancel()
+            if rendition is not None:
+                rendition.close()
+                os.remove(temp_path)
+    
+    async def get_text_rendition(self, file_path: str) -> str:
+        """
+        Get the text rendition of a saved PDF, extracting it if it does not exist yet.
+        
+        Renditions are normally written when the file is first indexed, so
+        extraction only happens here for files indexed before renditions existed
+        or still being indexed.
+        
+        Args:
+            file_path: Path to the saved PDF
+            
+        Returns:
+            Path of the gzipped text rendition
             
-            for page in pdf_reader.pages:
-                text = page.extract_text()
-                if text:
-                    text_content.append(text)
+        Raises:
+            HTTPException: If text extraction fails
+        """
+        rendition_path = text_processing.text_rendition_path(file_path)
+        if os.path.exists(rendition_path):
+            return rendition_path
         
-        return '\n\n'.join(text_content)
+        executor = self._get_extraction_executor()
+        args = (file_path, settings.EXTRACTION_WINDOW_PAGES)
+        try:
+            if executor is not None:
+                return await asyncio.wrap_future(executor.submit(text_processing.write_text_rendition, *args))
+            return await asyncio.to_thread(text_processing.write_text_rendition, *args)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to extract text from file: {str(e)}"
+            )
     
-    def _extract_text_from_txt(self, file_path: str) -> str:
+    async def index_saved_file(
+        self,
+        file_path: str,
+        course_id: int,
+        file_id: int,
+        filename: str
+    ) -> IndexingResult:
         """
-        Extract text from TXT file.
+        Extract text from a saved file and index it in the vector store.
+        
+        Extraction and chunking run window by window in the process pool and
+        embedding in the vector store's thread pool, so the event loop is never
+        blocked and memory stays flat for large files. Each window's chunks are
+        stored as soon as they are embedded, so the first ones are searchable
+        before the whole file is processed. Chunks already stored for the file
+        are diffed against the new ones, so re-indexing a replaced or partially
+        indexed file only embeds new chunks.
         
         Args:
-            file_path: Path to the TXT file
+            file_path: Path to the saved file
+            course_id: The course ID
+            file_id: The file ID from database
+            filename: The original filename
             
         Returns:
-            Extracted text
+            Indexing statistics
         """
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return f.read()
+        start_time = time.perf_counter()
+        
+        indexing_result = await asyncio.to_thread(
+            vector_store_service.reindex_file,
+            self.iter_chunk_batches(file_path, course_id, file_id, filename),
+            course_id,
+            file_id
+        )
+        
+        indexing_result.elapsed_seconds = time.perf_counter() - start_time
+        return indexing_result
     
     async def process_and_index_file(
         self,
         file: UploadFile,
         course_id: int,
         file_id: int
-    ) -> Tuple[str, str, int, int]:
+    ) -> Tuple[str, str, int, IndexingResult]:
         """
         Process file: save, extract text, and index in vector store.
         
@@ -184,43 +390,34 @@ class FileService:
             file_id: The file ID from database
             
         Returns:
-            Tuple of (file_path, unique_filename, file_size, chunks_indexed)
+            Tuple of (file_path, unique_filename, file_size, indexing_result)
         """
         # Save file
-        file_path, unique_filename, file_size = await self.save_file(file, course_id)
+        file_path, unique_filename, file_size, _ = await self.save_file(file, course_id)
         
         try:
-            # Extract text
-            text_content = self.extract_text(file_path)
+            indexing_result = await self.index_saved_file(file_path, course_id, file_id, file.filename)
             
-            # Index in vector store
-            chunks_indexed = vector_store_service.index_document(
-                text=text_content,
-                course_id=course_id,
-                file_id=file_id,
-                filename=file.filename
-            )
-            
-            return file_path, unique_filename, file_size, chunks_indexed
+            return file_path, unique_filename, file_size, indexing_result
         
         except Exception as e:
             # Clean up file if indexing fails
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            self.delete_file(file_path)
             raise e
     
     def delete_file(self, file_path: str) -> None:
         """
-        Delete a file from disk.
+        Delete a file and its text rendition from disk.
         
         Args:
             file_path: Path to the file
         """
-        try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-        except Exception as e:
-            print(f"Error deleting file {file_path}: {e}")
+        for path in (file_path, text_processing.text_rendition_path(file_path)):
+            try:
+                if os.path.exists(path):
+                    os.remove(path)
+            except Exception as e:
+                print(f"Error deleting file {path}: {e}")
     
     def delete_course_files(self, course_id: int) -> None:
         """
@@ -236,6 +433,13 @@ class FileService:
                 shutil.rmtree(course_dir)
         except Exception as e:
             print(f"Error deleting course directory {course_dir}: {e}")
+    
+    def shutdown(self) -> None:
+        """Stop the extraction worker processes."""
+        with self._executor_lock:
+            if self._extraction_executor is not None:
+                self._extraction_executor.shutdown(wait=False, cancel_futures=True)
+                self._extraction_executor = None
 
 
 # Singleton instance
@@ -0,0 +1,291 @@
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from app.config import settings
+from app.database import SessionLocal
+from app.models.ingestion_job import IngestionJobStatus
+from app.repositories.file_repository import CourseMaterialFileRepository
+from app.repositories.ingestion_job_repository import IngestionJobRepository
+from app.services.lazy import file_service, vector_store_service
+
+if TYPE_CHECKING:
+    from app.services.vector_store import IndexingResult
+
+
+class IngestionQueue:
+    """
+    Background worker pool that extracts and indexes uploaded files.
+
+    Jobs are persisted as IngestionJob rows before they are queued, so the
+    database is the source of truth: on startup, jobs left running by a
+    previous process are requeued together with every queued job.
+    At most max_jobs_per_course jobs of the same course run at once, and a
+    failed job is retried with exponential backoff up to max_attempts times.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        max_jobs_per_course: int,
+        max_attempts: int,
+        retry_delay_seconds: float
+    ):
+        """
+        Initialize the ingestion queue.
+
+        Args:
+            workers: Number of jobs processed concurrently
+            max_jobs_per_course: Maximum number of concurrent jobs per course
+            max_attempts: Attempts before a job is marked failed
+            retry_delay_seconds: Delay before the first retry, doubled on each attempt
+        """
+        self._workers = workers
+        self._max_jobs_per_course = max_jobs_per_course
+        self._max_attempts = max_attempts
+        self._retry_delay_seconds = retry_delay_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        # Per-course semaphores, kept only while a job of the course runs or waits
+        self._course_slots: Dict[int, asyncio.Semaphore] = {}
+        self._course_slot_users: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._retried = 0
+
+    async def start(self) -> int:
+        """
+        Start the workers and resume unfinished jobs.
+
+        Returns:
+            Number of jobs resumed from a previous run
+        """
+        self._queue = asyncio.Queue()
+        pending = await asyncio.to_thread(self._recover)
+        for item in pending:
+            self._queue.put_nowait(item)
+
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self._workers)]
+        return len(pending)
+
+    async def stop(self) -> None:
+        """Stop the workers. Interrupted jobs are resumed on the next start."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def enqueue(self, job_id: int, course_id: int) -> None:
+        """
+        Queue a persisted job for processing. Must be called from the event loop.
+
+        Args:
+            job_id: The ingestion job ID
+            course_id: The course the job belongs to
+        """
+        self._queue.put_nowait((job_id, course_id))
+
+    def _recover(self) -> List[Tuple[int, int]]:
+        """Requeue interrupted jobs and list every queued job."""
+        db = SessionLocal()
+        try:
+            job_repo = IngestionJobRepository(db)
+            interrupted = job_repo.requeue_interrupted()
+            if interrupted:
+                print(f"Resuming {interrupted} interrupted ingestion jobs")
+            return [
+                (job.id, job.course_id)
+                for job in job_repo.get_by_status(IngestionJobStatus.QUEUED)
+            ]
+        finally:
+            db.close()
+
+    async def _worker(self) -> None:
+        """Process queued jobs until cancelled."""
+        while True:
+            job_id, course_id = await self._queue.get()
+            try:
+                async with self._course_slot(course_id):
+                    with self._lock:
+                        self._running += 1
+                    try:
+                        retry_attempt = await self._run_job(job_id)
+                    finally:
+                        with self._lock:
+                            self._running -= 1
+
+                if retry_attempt is not None:
+                    delay = self._retry_delay_seconds * 2 ** (retry_attempt - 1)
+                    asyncio.get_running_loop().call_later(
+                        delay, self._queue.put_nowait, (job_id, course_id)
+                    )
+            except Exception as e:
+                print(f"Error processing ingestion job {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    @asynccontextmanager
+    async def _course_slot(self, course_id: int):
+        """Hold one of the course's job slots, dropping its semaphore once no job uses it."""
+        slot = self._course_slots.get(course_id)
+        if slot is None:
+            slot = self._course_slots[course_id] = asyncio.Semaphore(self._max_jobs_per_course)
+        self._course_slot_users[course_id] = self._course_slot_users.get(course_id, 0) + 1
+        try:
+            async with slot:
+                yield
+        finally:
+            self._course_slot_users[course_id] -= 1
+            if not self._course_slot_users[course_id]:
+                del self._course_slot_users[course_id]
+                del self._course_slots[course_id]
+
+    async def _run_job(self, job_id: int) -> Optional[int]:
+        """
+        Extract and index the file of a job.
+
+        Args:
+            job_id: The ingestion job ID
+
+        Returns:
+            The failed attempt number if the job should be retried, otherwise None
+        """
+        claimed = await asyncio.to_thread(self._claim_job, job_id)
+        if claimed is None:
+            return None
+        course_id, file_id, file_path, filename = claimed
+
+        try:
+            # Chunks left behind by an interrupted attempt are reused or removed by the diff
+            result = await file_service.index_saved_file(
+                file_path=file_path,
+                course_id=course_id,
+                file_id=file_id,
+                filename=filename
+            )
+        except Exception as e:
+            return await asyncio.to_thread(self._fail_job, job_id, str(getattr(e, "detail", e)))
+
+        await asyncio.to_thread(self._complete_job, job_id, course_id, file_id, result)
+        return None
+
+    def _claim_job(self, job_id: int) -> Optional[Tuple[int, int, str, str]]:
+        """
+        Mark a queued job as running.
+
+        Args:
+            job_id: The ingestion job ID
+
+        Returns:
+            Tuple of (course_id, file_id, file_path, original_filename), or None if
+            the job no longer needs to run
+        """
+        db = SessionLocal()
+        try:
+            job_repo = IngestionJobRepository(db)
+            job = job_repo.get_by_id(job_id)
+            # The file (and its jobs) may have been deleted while queued
+            if job is None or job.status != IngestionJobStatus.QUEUED:
+                return None
+
+            job_repo.mark_running(job)
+            return job.course_id, job.file_id, job.file.file_path, job.file.original_filename
+        finally:
+            db.close()
+
+    def _fail_job(self, job_id: int, error: str) -> Optional[int]:
+        """
+        Record a failed attempt.
+
+        Args:
+            job_id: The ingestion job ID
+            error: The error message
+
+        Returns:
+            The failed attempt number if the job should be retried, otherwise None
+        """
+        db = SessionLocal()
+        try:
+            job_repo = IngestionJobRepository(db)
+            job = job_repo.get_by_id(job_id)
+            if job is None:
+                return None
+
+            retry = job.attempts < self._max_attempts
+            job_repo.mark_failed(job, error, retry=retry)
+            with self._lock:
+                if retry:
+                    self._retried += 1
+                else:
+                    self._failed += 1
+            return job.attempts if retry else None
+        finally:
+            db.close()
+
+    def _complete_job(self, job_id: int, course_id: int, file_id: int, result: "IndexingResult") -> None:
+        """
+        Record a successful attempt.
+
+        Args:
+            job_id: The ingestion job ID
+            course_id: The course the job belongs to
+            file_id: The indexed file ID
+            result: Indexing statistics of the attempt
+        """
+        db = SessionLocal()
+        try:
+            job_repo = IngestionJobRepository(db)
+            job = job_repo.get_by_id(job_id)
+            # Discard the chunks if the file was deleted while it was being indexed
+            if job is None:
+                vector_store_service.delete_file_documents(course_id, file_id)
+                return
+
+            CourseMaterialFileRepository(db).set_indexed(
+                job.file,
+                chunk_count=result.chunks_indexed + result.chunks_reused
+            )
+            job_repo.mark_completed(
+                job,
+                chunks_indexed=result.chunks_indexed,
+                chunks_reused=result.chunks_reused,
+                chunks_removed=result.chunks_removed,
+                elapsed_seconds=result.elapsed_seconds,
+                embedding_cache_hits=result.cache_hits,
+                embedding_cache_misses=result.cache_misses
+            )
+            vector_store_service.invalidate_course(course_id)
+            with self._lock:
+                self._completed += 1
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get queue counters since startup.
+
+        Returns:
+            Dictionary with queued, running, completed, failed and retried job counts,
+            and the number of courses with a job running or waiting for a course slot
+        """
+        with self._lock:
+            return {
+                "queued": self._queue.qsize() if self._queue is not None else 0,
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "retried": self._retried,
+                "active_courses": len(self._course_slots),
+                "workers": self._workers
+            }
+
+
+# Singleton instance
+ingestion_queue = IngestionQueue(
+    workers=settings.INGESTION_WORKERS,
+    max_jobs_per_course=settings.INGESTION_MAX_JOBS_PER_COURSE,
+    max_attempts=settings.INGESTION_MAX_ATTEMPTS,
+    retry_delay_seconds=settings.INGESTION_RETRY_DELAY_SECONDS
+)
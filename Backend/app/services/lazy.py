@@ -0,0 +1,33 @@
+"""
+Service singletons that are imported and built on first use.
+
+Their modules pull in llama_index, the vector backend, pypdf and the Ollama
+clients, and build clients at import time. API modules use these stand-ins
+so the application can start and answer /health without any of that.
+"""
+import time
+from app.utils.lazy import LazyImport
+
+vector_store_service = LazyImport("app.services.vector_store", "vector_store_service")
+file_service = LazyImport("app.services.file_service", "file_service")
+context_assembler = LazyImport("app.services.context_assembler", "context_assembler")
+answer_cache = LazyImport("app.services.answer_cache", "answer_cache")
+embedding_cache = LazyImport("app.services.embedding_cache", "embedding_cache")
+query_embedding_cache = LazyImport("app.services.embedding_cache", "query_embedding_cache")
+
+RAG_SERVICES = (vector_store_service, file_service)
+
+
+def preload_services() -> float:
+    """
+    Import and build the RAG services now instead of on first use.
+
+    Meant to run in a worker thread while the application already serves requests.
+
+    Returns:
+        Seconds spent
+    """
+    start = time.perf_counter()
+    for service in RAG_SERVICES:
+        service.load()
+    return time.perf_counter() - start
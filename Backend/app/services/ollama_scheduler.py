@@ -0,0 +1,291 @@
+import asyncio
+import enum
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Callable, Deque, Dict, Hashable, NamedTuple, Optional, Tuple
+from app.config import settings
+
+
+class Priority(enum.IntEnum):
+    """Scheduling priority; lower values are served first."""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class Flow(NamedTuple):
+    """
+    Fair-queuing key of a user's request about a course.
+
+    Slots are shared round-robin between users first, and then between the
+    courses of each user, so asking about many courses at once does not give
+    a user a bigger share.
+    """
+    user_id: Hashable
+    course_id: Optional[Hashable] = None
+
+
+class SchedulerBusyError(Exception):
+    """Raised when an interactive request is rejected because the queue is full."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+def _split_flow(flow: Hashable) -> Tuple[Hashable, Optional[Hashable]]:
+    """Split a flow into the key slots are shared between and the key rotated within it."""
+    if isinstance(flow, Flow):
+        return ("user", flow.user_id), flow.course_id
+    return flow, None
+
+
+class _Ticket:
+    """A request waiting for a slot."""
+
+    __slots__ = ("owner", "subflow", "priority", "enqueued_at", "granted", "wake")
+
+    def __init__(self, flow: Hashable, priority: Priority, wake: Callable[[], None]):
+        self.owner, self.subflow = _split_flow(flow)
+        self.priority = priority
+        self.enqueued_at = time.perf_counter()
+        self.granted = False
+        self.wake = wake
+
+
+class FairScheduler:
+    """
+    Admission control in front of a shared backend such as Ollama.
+
+    At most max_concurrency callers hold a slot at once. Waiting callers are
+    served by priority first and then round-robin across flows, so a single
+    busy flow cannot starve the others. A Flow is keyed by its user and
+    rotates between the user's courses inside it; any other hashable is a
+    flow of its own, such as ("course", course_id) for ingestion. Interactive requests are rejected with SchedulerBusyError once
+    max_queue_depth callers are waiting; background work always queues.
+    Slots can be taken from coroutines and from worker threads.
+    """
+
+    # Number of recent queue waits kept for the latency percentiles
+    WAIT_SAMPLES = 1000
+
+    def __init__(self, name: str, max_concurrency: int, max_queue_depth: int):
+        """
+        Initialize the scheduler.
+
+        Args:
+            name: Name reported in metrics
+            max_concurrency: Maximum number of slots held at once
+            max_queue_depth: Maximum number of waiting interactive callers
+        """
+        self.name = name
+        self._max_concurrency = max_concurrency
+        self._max_queue_depth = max_queue_depth
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiting = 0
+        # priority -> flow owner -> subflow -> waiting tickets, each level in rotation order
+        self._queues: Dict[Priority, "OrderedDict[Hashable, OrderedDict[Hashable, Deque[_Ticket]]]"] = {
+            priority: OrderedDict() for priority in Priority
+        }
+        self._waits: Dict[Priority, Deque[float]] = {
+            priority: deque(maxlen=self.WAIT_SAMPLES) for priority in Priority
+        }
+        self._granted = {priority: 0 for priority in Priority}
+        self._rejected = 0
+        # Moving average of how long a slot is held, for Retry-After estimates
+        self._hold_seconds = 1.0
+
+    def _retry_after(self) -> int:
+        """Estimate when a rejected caller could be served. Caller holds the lock."""
+        backlog = (self._waiting + 1) * self._hold_seconds / self._max_concurrency
+        return max(1, math.ceil(backlog))
+
+    def _grant(self, ticket: _Ticket) -> None:
+        """Give a slot to a ticket. Caller holds the lock."""
+        self._active += 1
+        ticket.granted = True
+        self._granted[ticket.priority] += 1
+        self._waits[ticket.priority].append(time.perf_counter() - ticket.enqueued_at)
+
+    def _submit(self, ticket: _Ticket) -> bool:
+        """
+        Grant a slot right away or queue the ticket.
+
+        Returns:
+            True if the slot was granted immediately
+        """
+        with self._lock:
+            if self._active < self._max_concurrency and self._waiting == 0:
+                self._grant(ticket)
+                return True
+
+            if ticket.priority == Priority.INTERACTIVE and self._waiting >= self._max_queue_depth:
+                self._rejected += 1
+                raise SchedulerBusyError(self._retry_after())
+
+            subflows = self._queues[ticket.priority].setdefault(ticket.owner, OrderedDict())
+            subflows.setdefault(ticket.subflow, deque()).append(ticket)
+            self._waiting += 1
+            return False
+
+    def _dispatch(self) -> None:
+        """Hand free slots to waiting tickets. Caller holds the lock."""
+        while self._active < self._max_concurrency and self._waiting:
+            for priority in Priority:
+                flows = self._queues[priority]
+                if flows:
+                    break
+            # Serve the flow at the front and its next subflow, then move both to
+            # the back of their rotation
+            owner, subflows = next(iter(flows.items()))
+            subflow, tickets = next(iter(subflows.items()))
+            ticket = tickets.popleft()
+            if tickets:
+                subflows.move_to_end(subflow)
+            else:
+                del subflows[subflow]
+            if subflows:
+                flows.move_to_end(owner)
+            else:
+                del flows[owner]
+            self._waiting -= 1
+            self._grant(ticket)
+            ticket.wake()
+
+    def _release(self, held_seconds: float) -> None:
+        """Return a slot and wake the next waiting ticket."""
+        with self._lock:
+            self._active -= 1
+            self._hold_seconds = 0.9 * self._hold_seconds + 0.1 * held_seconds
+            self._dispatch()
+
+    def _withdraw(self, ticket: _Ticket) -> bool:
+        """
+        Remove a ticket whose caller stopped waiting.
+
+        Returns:
+            False if the ticket had already been granted a slot, which the caller must release
+        """
+        with self._lock:
+            if ticket.granted:
+                return False
+            subflows = self._queues[ticket.priority][ticket.owner]
+            tickets = subflows[ticket.subflow]
+            tickets.remove(ticket)
+            if not tickets:
+                del subflows[ticket.subflow]
+            if not subflows:
+                del self._queues[ticket.priority][ticket.owner]
+            self._waiting -= 1
+            return True
+
+    def check_admission(self, priority: Priority = Priority.INTERACTIVE) -> None:
+        """
+        Fail fast if a request of this priority would be rejected right now.
+
+        Raises:
+            SchedulerBusyError: If the queue is full
+        """
+        with self._lock:
+            if priority == Priority.INTERACTIVE and self._waiting >= self._max_queue_depth:
+                self._rejected += 1
+                raise SchedulerBusyError(self._retry_after())
+
+    @asynccontextmanager
+    async def slot(self, flow: Hashable, priority: Priority = Priority.INTERACTIVE):
+        """
+        Hold a slot for the duration of an async block.
+
+        Args:
+            flow: Fair-queuing key, e.g. Flow(user_id, course_id)
+            priority: Scheduling priority
+
+        Raises:
+            SchedulerBusyError: If an interactive request finds the queue full
+        """
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+
+        ticket = _Ticket(flow, priority, wake)
+        if not self._submit(ticket):
+            try:
+                await granted
+            except asyncio.CancelledError:
+                if not self._withdraw(ticket):
+                    self._release(0.0)
+                raise
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release(time.perf_counter() - start)
+
+    @contextmanager
+    def slot_sync(self, flow: Hashable, priority: Priority = Priority.BACKGROUND):
+        """
+        Hold a slot for the duration of a block running in a worker thread.
+
+        Args:
+            flow: Fair-queuing key, e.g. ("course", course_id)
+            priority: Scheduling priority
+
+        Raises:
+            SchedulerBusyError: If an interactive request finds the queue full
+        """
+        granted = threading.Event()
+        ticket = _Ticket(flow, priority, granted.set)
+        if not self._submit(ticket):
+            granted.wait()
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release(time.perf_counter() - start)
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Get scheduler counters and queue wait percentiles per priority.
+
+        Returns:
+            Dictionary with active and waiting counts, rejections and wait times in milliseconds
+        """
+        with self._lock:
+            stats = {
+                "active": self._active,
+                "waiting": self._waiting,
+                "max_concurrency": self._max_concurrency,
+                "max_queue_depth": self._max_queue_depth,
+                "rejected": self._rejected
+            }
+            for priority in Priority:
+                waits = sorted(self._waits[priority])
+                stats[f"{priority.name.lower()}_queue_wait_ms"] = {
+                    "granted": self._granted[priority],
+                    "mean": 1000 * sum(waits) / len(waits) if waits else 0.0,
+                    "p50": 1000 * waits[len(waits) // 2] if waits else 0.0,
+                    "p95": 1000 * waits[max(0, math.ceil(len(waits) * 0.95) - 1)] if waits else 0.0,
+                    "max": 1000 * waits[-1] if waits else 0.0
+                }
+            return stats
+
+
+# Singleton instances
+generation_scheduler = FairScheduler(
+    name="generation",
+    max_concurrency=settings.OLLAMA_MAX_CONCURRENT_GENERATIONS,
+    max_queue_depth=settings.OLLAMA_MAX_QUEUED_GENERATIONS
+)
+
+embedding_scheduler = FairScheduler(
+    name="embedding",
+    max_concurrency=settings.OLLAMA_MAX_CONCURRENT_EMBEDDINGS,
+    max_queue_depth=settings.OLLAMA_MAX_QUEUED_EMBEDDINGS
+)
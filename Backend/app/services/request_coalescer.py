@@ -0,0 +1,147 @@
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class Flight:
+    """
+    A single in-progress computation whose streamed chunks and final result
+    are shared by every request that joined it.
+    """
+
+    def __init__(self):
+        """Initialize an empty flight."""
+        self._chunks: List[str] = []
+        self._changed = asyncio.Event()
+        self._done = False
+        self._result = None
+        self._error: Optional[BaseException] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def publish(self, chunk: str) -> None:
+        """Append a chunk and wake up every subscriber."""
+        self._chunks.append(chunk)
+        self._notify()
+
+    def _finish(self, result, error: Optional[BaseException]) -> None:
+        self._result = result
+        self._error = error
+        self._done = True
+        self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def stream(self) -> AsyncIterator[str]:
+        """
+        Yield every chunk published so far and then new ones as they arrive.
+
+        Raises:
+            Exception: The error the computation failed with, once its chunks are consumed
+        """
+        index = 0
+        while True:
+            changed = self._changed
+            if index < len(self._chunks):
+                chunk = self._chunks[index]
+                index += 1
+                yield chunk
+                continue
+            if self._done:
+                if self._error is not None:
+                    raise self._error
+                return
+            await changed.wait()
+
+    async def result(self):
+        """
+        Wait for the computation to finish.
+
+        Returns:
+            The computation result
+
+        Raises:
+            Exception: The error the computation failed with
+        """
+        # Shielded so a cancelled request does not cancel the shared computation
+        await asyncio.shield(self._task)
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class RequestCoalescer:
+    """
+    Single-flight execution of identical concurrent requests.
+
+    The first request for a key starts the computation in a background task
+    and becomes its leader; requests for the same key arriving before it
+    finishes join the same Flight as followers instead of starting their own.
+    The computation keeps running if the leader disconnects.
+    """
+
+    def __init__(self):
+        """Initialize the coalescer."""
+        self._flights: Dict[Hashable, Flight] = {}
+        self._leaders = 0
+        self._followers = 0
+
+    def join(
+        self,
+        key: Hashable,
+        compute: Callable[[Callable[[str], None]], Awaitable]
+    ) -> Tuple[Flight, bool]:
+        """
+        Join the in-flight computation for a key, starting it if there is none.
+
+        Args:
+            key: Identifies requests that can share a result
+            compute: Coroutine function taking a publish callback for streamed chunks
+                and returning the final result
+
+        Returns:
+            Tuple of (flight, whether this request joined an existing computation)
+        """
+        flight = self._flights.get(key)
+        if flight is not None:
+            self._followers += 1
+            return flight, True
+
+        flight = Flight()
+        self._flights[key] = flight
+        self._leaders += 1
+        flight._task = asyncio.create_task(self._run(key, flight, compute))
+        return flight, False
+
+    async def _run(self, key: Hashable, flight: Flight, compute) -> None:
+        """Run a computation and record its outcome on the flight."""
+        try:
+            result = await compute(flight.publish)
+            flight._finish(result, None)
+        except BaseException as e:
+            flight._finish(None, e)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get coalescing counters.
+
+        Returns:
+            Dictionary with leader and follower counts, the share of coalesced
+            requests and the number of computations in flight
+        """
+        requests = self._leaders + self._followers
+        return {
+            "leaders": self._leaders,
+            "coalesced": self._followers,
+            "coalesced_rate": self._followers / requests if requests else 0.0,
+            "in_flight": len(self._flights)
+        }
+
+
+# Singleton instance
+chat_coalescer = RequestCoalescer()
@@ -0,0 +1,163 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional
+from app.config import settings
+
+
+class StageTimer:
+    """
+    Wall-clock durations of the stages of one request, e.g. query embedding or retrieval.
+
+    A stage timed more than once accumulates its durations.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        """Initialize an empty timer."""
+        self.durations: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block as the given stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float) -> None:
+        """Record a duration measured elsewhere."""
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def merge(self, durations: Optional[Dict[str, float]]) -> None:
+        """Record the durations of another timer."""
+        for name, seconds in (durations or {}).items():
+            self.add(name, seconds)
+
+    def milliseconds(self) -> Dict[str, float]:
+        """Durations in milliseconds, rounded for responses."""
+        return {name: round(1000 * seconds, 3) for name, seconds in self.durations.items()}
+
+    def server_timing(self) -> str:
+        """Format the durations as a Server-Timing header value."""
+        return ", ".join(
+            f"{name};dur={milliseconds}" for name, milliseconds in self.milliseconds().items()
+        )
+
+
+class _DisabledStageTimer(StageTimer):
+    """Timer used when stage timing is off; records nothing."""
+
+    enabled = False
+    _NO_OP = nullcontext()
+
+    def stage(self, name: str):
+        return self._NO_OP
+
+    def add(self, name: str, seconds: float) -> None:
+        pass
+
+    def merge(self, durations: Optional[Dict[str, float]]) -> None:
+        pass
+
+
+# Shared no-op timer, also the default for code paths that are not timed
+disabled_timer = _DisabledStageTimer()
+
+
+def stage_timer() -> StageTimer:
+    """
+    Get a timer for a new request.
+
+    Returns:
+        A fresh StageTimer, or a shared no-op timer if STAGE_TIMING_ENABLED is off
+    """
+    if settings.STAGE_TIMING_ENABLED:
+        return StageTimer()
+    return disabled_timer
+
+
+def timings_exposed(timer: StageTimer) -> bool:
+    """
+    Check whether a request's stage durations are returned to the client.
+
+    They reveal the internals of the pipeline, so besides being recorded for
+    /metrics they are only sent when SERVER_TIMING_ENABLED is on.
+
+    Args:
+        timer: The request's timer
+
+    Returns:
+        Whether to send the Server-Timing header and timings_ms
+    """
+    return timer.enabled and settings.SERVER_TIMING_ENABLED
+
+
+class StageHistograms:
+    """
+    Cumulative latency histograms per pipeline stage.
+
+    Buckets are upper bounds in milliseconds, like Prometheus histograms; the
+    last bucket counts everything slower than the largest bound.
+    """
+
+    BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+    def __init__(self):
+        """Initialize empty histograms."""
+        self._lock = threading.Lock()
+        self._counts: Dict[str, List[int]] = {}
+        self._sums: Dict[str, float] = {}
+
+    def observe(self, endpoint: str, timer: StageTimer) -> None:
+        """
+        Add the stage durations of a finished request.
+
+        Args:
+            endpoint: Name the stages are grouped under, e.g. "chat"
+            timer: The request's timer
+        """
+        if not timer.enabled:
+            return
+        with self._lock:
+            for name, milliseconds in timer.milliseconds().items():
+                key = f"{endpoint}.{name}"
+                counts = self._counts.get(key)
+                if counts is None:
+                    counts = self._counts[key] = [0] * (len(self.BUCKETS_MS) + 1)
+                    self._sums[key] = 0.0
+                counts[bisect.bisect_left(self.BUCKETS_MS, milliseconds)] += 1
+                self._sums[key] += milliseconds
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Get the histograms.
+
+        Returns:
+            Dictionary per endpoint and stage with the observation count, total
+            and mean in milliseconds and cumulative bucket counts
+        """
+        with self._lock:
+            stats = {}
+            for key, counts in sorted(self._counts.items()):
+                total = sum(counts)
+                cumulative = 0
+                buckets = {}
+                for bound, count in zip(self.BUCKETS_MS, counts):
+                    cumulative += count
+                    buckets[f"le_{bound}"] = cumulative
+                buckets["le_inf"] = total
+                stats[key] = {
+                    "count": total,
+                    "sum_ms": self._sums[key],
+                    "mean_ms": self._sums[key] / total if total else 0.0,
+                    "buckets": buckets
+                }
+            return {"enabled": settings.STAGE_TIMING_ENABLED, "stages": stats}
+
+
+# Singleton instance
+stage_histograms = StageHistograms()
@@ -0,0 +1,340 @@
+"""
+CPU-bound text extraction and chunking.
+
+These functions are executed in worker processes, so they only depend on
+their arguments and must not touch the service singletons.
+"""
+import gzip
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from pypdf import PdfReader
+from llama_index.core import Document
+from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core.schema import BaseNode, MetadataMode
+
+
+def extract_text(file_path: str) -> str:
+    """
+    Extract text from a PDF or TXT file.
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        Extracted text content
+
+    Raises:
+        ValueError: If the file type is not supported
+    """
+    file_ext = os.path.splitext(file_path)[1].lower()
+
+    if file_ext == '.pdf':
+        text_content = []
+        with open(file_path, 'rb') as f:
+            pdf_reader = PdfReader(f)
+
+            for page in pdf_reader.pages:
+                text = page.extract_text()
+                if text:
+                    text_content.append(text)
+
+        return '\n\n'.join(text_content)
+
+    if file_ext == '.txt':
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    raise ValueError(f"Unsupported file type: {file_ext}")
+
+
+# Suffix of the gzipped UTF-8 text rendition stored next to an uploaded PDF
+TEXT_RENDITION_SUFFIX = '.txt.gz'
+
+
+def text_rendition_path(file_path: str) -> str:
+    """Path of the text rendition of an uploaded file."""
+    return file_path + TEXT_RENDITION_SUFFIX
+
+
+def split_text(
+    text: str,
+    course_id: int,
+    file_id: int,
+    filename: str,
+    chunk_size: int,
+    chunk_overlap: int
+) -> List[BaseNode]:
+    """
+    Split a document into chunk nodes carrying the file metadata.
+
+    Each node also gets a chunk_hash of its text without metadata, used to
+    find chunks that are unchanged when a file is replaced, even under
+    another filename.
+
+    Args:
+        text: The text content to split
+        course_id: The course ID
+        file_id: The file ID
+        filename: The original filename
+        chunk_size: Chunk size in tokens
+        chunk_overlap: Overlap between consecutive chunks in tokens
+
+    Returns:
+        The chunk nodes, not yet embedded
+    """
+    # IDs and the filename are kept out of the embedded text, so identical chunks share
+    # a cache entry whatever file they come from; the LLM still sees the filename
+    document = Document(
+        text=text,
+        metadata={
+            "course_id": course_id,
+            "file_id": file_id,
+            "filename": filename
+        },
+        excluded_embed_metadata_keys=["course_id", "file_id", "filename", "chunk_hash"],
+        excluded_llm_metadata_keys=["chunk_hash"]
+    )
+
+    text_splitter = SentenceSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap
+    )
+    nodes = text_splitter.get_nodes_from_documents([document])
+    for node in nodes:
+        chunk_text = node.get_content(metadata_mode=MetadataMode.NONE)
+        node.metadata["chunk_hash"] = hashlib.sha256(chunk_text.encode("utf-8")).hexdigest()
+    return nodes
+
+
+@dataclass
+class ExtractionCursor:
+    """
+    Position of a window-by-window extraction of one file.
+
+    Passed to and returned from split_window, so consecutive windows can be
+    processed by any worker process.
+    """
+    # Next page of a PDF, or next byte offset of a TXT file
+    position: int = 0
+    # Text from the start of the last, possibly unfinished chunk, split again with the next window
+    carry: str = ""
+    # Offset of carry in the file's full text
+    carry_offset: int = 0
+    done: bool = False
+
+
+# Reader of the PDF this process extracted last, reused by the following windows
+_pdf_cache: Tuple[Optional[tuple], Optional[PdfReader]] = (None, None)
+# Text rendition this process read last, kept open so the next window only decompresses forward
+_rendition_cache: Tuple[Optional[tuple], Optional[gzip.GzipFile]] = (None, None)
+
+
+def _file_key(file_path: str) -> tuple:
+    """Identity of a file's current content, for the per-process caches."""
+    stat = os.stat(file_path)
+    return file_path, stat.st_size, stat.st_mtime_ns
+
+
+def _open_pdf(file_path: str) -> PdfReader:
+    """
+    Open a PDF, reusing this process's reader if it is the same unchanged file.
+
+    Opening parses the whole page tree, which would otherwise be repeated for every window.
+    """
+    global _pdf_cache
+    key = _file_key(file_path)
+    cached_key, reader = _pdf_cache
+    if cached_key != key:
+        reader = PdfReader(file_path)
+        _pdf_cache = (key, reader)
+    return reader
+
+
+def _open_rendition(file_path: str, position: int) -> gzip.GzipFile:
+    """
+    Open a text rendition at a position of its uncompressed text.
+
+    The open file is reused while windows move forward, as seeking backwards
+    in a gzip file decompresses it again from the start.
+    """
+    global _rendition_cache
+    key = _file_key(file_path)
+    cached_key, rendition = _rendition_cache
+    if cached_key != key or rendition.tell() > position:
+        if rendition is not None:
+            rendition.close()
+        rendition = gzip.open(file_path, 'rb')
+        _rendition_cache = (key, rendition)
+    rendition.seek(position)
+    return rendition
+
+
+def _cut_window(data: bytes) -> bytes:
+    """Cut a window of UTF-8 text after its last line break, or at least not inside a character."""
+    cut = data.rfind(b'\n') + 1
+    if cut == 0:
+        cut = len(data)
+        while cut > 0 and (data[cut - 1] & 0xC0) == 0x80:
+            cut -= 1
+        if cut > 0 and data[cut - 1] >= 0xC0:
+            cut -= 1
+    return data[:cut]
+
+
+def _read_window(file_path: str, position: int, window_pages: int, window_bytes: int) -> Tuple[str, int, bool]:
+    """
+    Read the text of the next window of a file.
+
+    Args:
+        file_path: Path to the file, or to a PDF's text rendition
+        position: First page of a PDF, or byte offset of a TXT file or text rendition
+        window_pages: Pages per window of a PDF
+        window_bytes: Bytes per window of a TXT file or text rendition, cut back to a line end
+
+    Returns:
+        Tuple of (text, position of the next window, whether the file is finished)
+
+    Raises:
+        ValueError: If the file type is not supported
+    """
+    if file_path.endswith(TEXT_RENDITION_SUFFIX):
+        rendition = _open_rendition(file_path, position)
+        data = rendition.read(window_bytes)
+        done = not rendition.peek(1)
+        if not done:
+            data = _cut_window(data)
+        # The rendition holds the extracted text verbatim
+        return data.decode('utf-8'), position + len(data), done
+
+    file_ext = os.path.splitext(file_path)[1].lower()
+
+    if file_ext == '.pdf':
+        pdf_reader = _open_pdf(file_path)
+        end = min(position + window_pages, len(pdf_reader.pages))
+        texts = [text for text in (pdf_reader.pages[i].extract_text() for i in range(position, end)) if text]
+        # Pages are separated by a blank line, as in extract_text
+        text = '\n\n'.join(texts)
+        if position > 0 and text:
+            text = '\n\n' + text
+        return text, end, end >= len(pdf_reader.pages)
+
+    if file_ext == '.txt':
+        with open(file_path, 'rb') as f:
+            f.seek(position)
+            data = f.read(window_bytes)
+            done = not f.read(1)
+        if not done:
+            data = _cut_window(data)
+        # Universal newlines, as when the whole file is read in text mode
+        text = data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+        return text, position + len(data), done
+
+    raise ValueError(f"Unsupported file type: {file_ext}")
+
+
+def split_window(
+    file_path: str,
+    cursor: ExtractionCursor,
+    course_id: int,
+    file_id: int,
+    filename: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    window_pages: int,
+    window_bytes: int
+) -> Tuple[List[BaseNode], ExtractionCursor, str]:
+    """
+    Extract the next window of a file and split it into chunk nodes.
+
+    The window's text is appended to the cursor's carry and split. The last
+    chunk may continue in the next window, so unless the file is finished it
+    is not returned; its text becomes the new carry and is split again with
+    the next window. Memory therefore depends on the window size, not on the
+    size of the file. Character offsets of the nodes are relative to the
+    file's full text.
+
+    Args:
+        file_path: Path to the file, or to a PDF's text rendition
+        cursor: Position returned by the previous call, or a new ExtractionCursor
+        course_id: The course ID
+        file_id: The file ID
+        filename: The original filename
+        chunk_size: Chunk size in tokens
+        chunk_overlap: Overlap between consecutive chunks in tokens
+        window_pages: Pages per window of a PDF
+        window_bytes: Bytes per window of a TXT file or text rendition
+
+    Returns:
+        Tuple of (finished chunk nodes, not yet embedded, cursor for the next call,
+        text extracted from this window)
+
+    Raises:
+        ValueError: If the file type is not supported
+    """
+    window_text, position, done = _read_window(file_path, cursor.position, window_pages, window_bytes)
+    text = cursor.carry + window_text
+    nodes = split_text(text, course_id, file_id, filename, chunk_size, chunk_overlap) if text.strip() else []
+
+    next_cursor = ExtractionCursor(position=position, carry_offset=cursor.carry_offset, done=done)
+    if not done:
+        if len(nodes) < 2:
+            # Not enough text for a finished chunk yet
+            next_cursor.carry = text
+            return [], next_cursor, window_text
+        last = nodes.pop()
+        start = last.start_char_idx
+        if start is None or start < 0:
+            start = max(0, len(text) - len(last.get_content()))
+        next_cursor.carry = text[start:]
+        next_cursor.carry_offset = cursor.carry_offset + start
+
+    for node in nodes:
+        if node.start_char_idx is not None:
+            node.start_char_idx += cursor.carry_offset
+        if node.end_char_idx is not None:
+            node.end_char_idx += cursor.carry_offset
+    return nodes, next_cursor, window_text
+
+
+def write_text_rendition(file_path: str, window_pages: int) -> str:
+    """
+    Extract the text of a PDF window by window into its gzipped text rendition.
+
+    The rendition is written to a temporary file and renamed into place, so
+    readers never see a partial one.
+
+    Args:
+        file_path: Path to the PDF
+        window_pages: Pages extracted at a time
+
+    Returns:
+        Path of the text rendition
+
+    Raises:
+        ValueError: If the file is not a PDF
+    """
+    if os.path.splitext(file_path)[1].lower() != '.pdf':
+        raise ValueError("Text renditions are only stored for PDF files")
+    rendition_path = text_rendition_path(file_path)
+    # A unique temporary file per call, so concurrent writers never share one
+    temp_file = tempfile.NamedTemporaryFile(
+        dir=os.path.dirname(rendition_path) or '.',
+        prefix=os.path.basename(rendition_path) + '.',
+        suffix='.part',
+        delete=False
+    )
+    try:
+        with temp_file, gzip.GzipFile(fileobj=temp_file, mode='wb', compresslevel=6) as rendition:
+            position, done = 0, False
+            while not done:
+                text, position, done = _read_window(file_path, position, window_pages, 0)
+                rendition.write(text.encode('utf-8'))
+        os.replace(temp_file.name, rendition_path)
+    except BaseException:
+        if os.path.exists(temp_file.name):
+            os.remove(temp_file.name)
+        raise
+    return rendition_path
@@ -0,0 +1,40 @@
+"""
+Vector storage backends, selected with the VECTOR_BACKEND setting.
+
+Backends are imported on demand so a deployment only loads the client
+libraries of the backend it uses.
+"""
+from app.config import settings
+from app.services.vector_backends.base import VectorBackend
+
+
+def create_vector_backend(name: str) -> VectorBackend:
+    """
+    Create the vector backend with the given name.
+
+    Args:
+        name: "chroma", "numpy" or "remote"
+
+    Returns:
+        The backend
+
+    Raises:
+        ValueError: If the name is unknown
+    """
+    if name == "chroma":
+        from app.services.vector_backends.chroma import ChromaBackend
+        return ChromaBackend(settings.CHROMA_PERSIST_DIR)
+
+    if name == "numpy":
+        from app.services.vector_backends.numpy_flat import NumpyBackend
+        return NumpyBackend(settings.NUMPY_VECTOR_STORE_DIR)
+
+    if name == "remote":
+        from app.services.vector_backends.remote import RemoteBackend
+        return RemoteBackend(
+            settings.VECTOR_SERVICE_SOCKET,
+            max_connections=settings.VECTOR_SERVICE_MAX_CONNECTIONS,
+            timeout_seconds=settings.VECTOR_SERVICE_TIMEOUT_SECONDS
+        )
+
+    raise ValueError(f"Unknown vector backend: {name}")
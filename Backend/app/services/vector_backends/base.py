@@ -0,0 +1,138 @@
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence, Tuple
+from llama_index.core.schema import NodeWithScore
+from llama_index.core.vector_stores.types import BasePydanticVectorStore
+
+
+class VectorBackend(ABC):
+    """
+    Storage for the chunk embeddings of every course, one store per course.
+
+    Each course gets a llama_index vector store, used to add chunks and to
+    build retrievers, and the backend provides the bulk operations on a
+    course that the llama_index interface does not cover. Stores are opened
+    on first use and kept open.
+    """
+
+    # Value of the VECTOR_BACKEND setting that selects the backend
+    name = ""
+
+    def __init__(self):
+        """Initialize the backend with no open course stores."""
+        self._stores: Dict[int, BasePydanticVectorStore] = {}
+        self._lock = threading.Lock()
+
+    def get_store(self, course_id: int, create: bool = False) -> Optional[BasePydanticVectorStore]:
+        """
+        Get the vector store of a course.
+
+        Args:
+            course_id: The course ID
+            create: Whether to create the store if it does not exist yet
+
+        Returns:
+            The course vector store, or None if the course has no store and create is False
+        """
+        with self._lock:
+            store = self._stores.get(course_id)
+            if store is None:
+                store = self._open_store(course_id, create)
+                if store is not None:
+                    self._stores[course_id] = store
+            return store
+
+    def delete_course(self, course_id: int) -> int:
+        """
+        Delete a course's store with all of its chunks.
+
+        Args:
+            course_id: The course ID
+
+        Returns:
+            Number of chunks deleted
+        """
+        store = self.get_store(course_id)
+        if store is None:
+            return 0
+
+        deleted = self.count(course_id)
+        with self._lock:
+            self._stores.pop(course_id, None)
+            self._drop_store(course_id, store)
+        return deleted
+
+    @abstractmethod
+    def _open_store(self, course_id: int, create: bool) -> Optional[BasePydanticVectorStore]:
+        """Open a course's store, creating it if create is True. Returns None if it does not exist."""
+
+    @abstractmethod
+    def _drop_store(self, course_id: int, store: BasePydanticVectorStore) -> None:
+        """Remove a course's store from storage."""
+
+    @abstractmethod
+    def file_chunks(self, course_id: int, file_id: int) -> List[Tuple[str, str]]:
+        """
+        List the chunks stored for a file.
+
+        Args:
+            course_id: The course ID
+            file_id: The file ID
+
+        Returns:
+            Tuples of (chunk ID, chunk_hash metadata)
+        """
+
+    @abstractmethod
+    def delete_chunks(self, course_id: int, chunk_ids: Sequence[str]) -> None:
+        """
+        Delete chunks by ID.
+
+        Args:
+            course_id: The course ID
+            chunk_ids: IDs of the chunks to delete
+        """
+
+    @abstractmethod
+    def delete_file(self, course_id: int, file_id: int) -> int:
+        """
+        Delete every chunk of a file.
+
+        Args:
+            course_id: The course ID
+            file_id: The file ID
+
+        Returns:
+            Number of chunks deleted
+        """
+
+    @abstractmethod
+    def count(self, course_id: int) -> int:
+        """
+        Count the chunks stored for a course.
+
+        Args:
+            course_id: The course ID
+
+        Returns:
+            Number of chunks, 0 if the course has no store
+        """
+
+    @abstractmethod
+    def query_many(
+        self,
+        course_id: int,
+        embeddings: Sequence[List[float]],
+        top_k: int
+    ) -> List[List[NodeWithScore]]:
+        """
+        Find the most similar chunks for several query embeddings at once.
+
+        Args:
+            course_id: The course ID
+            embeddings: The query embeddings
+            top_k: Number of chunks to return per embedding
+
+        Returns:
+            Chunks with similarity scores, best first, one list per embedding
+        """
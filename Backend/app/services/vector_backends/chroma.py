@@ -0,0 +1,119 @@
+import math
+import os
+from typing import List, Optional, Sequence, Tuple
+import chromadb
+from chromadb.config import Settings as ChromaSettings
+from llama_index.core.schema import NodeWithScore
+from llama_index.core.vector_stores.utils import metadata_dict_to_node
+from llama_index.vector_stores.chroma import ChromaVectorStore
+from app.config import settings
+from app.services.vector_backends.base import VectorBackend
+
+
+def course_collection_name(course_id: int) -> str:
+    """Name of the Chroma collection holding a course's chunks."""
+    return f"{settings.CHROMA_COLLECTION_NAME}_course_{course_id}"
+
+
+class ChromaBackend(VectorBackend):
+    """
+    Vector backend on a persistent ChromaDB client.
+
+    Each course's chunks live in their own collection, created on first upload,
+    so searches never need a course filter and deleting a course drops one collection.
+    """
+
+    name = "chroma"
+
+    def __init__(self, persist_dir: str):
+        """
+        Initialize the backend.
+
+        Args:
+            persist_dir: Directory of the Chroma database
+        """
+        super().__init__()
+        os.makedirs(persist_dir, exist_ok=True)
+        self._client = chromadb.PersistentClient(
+            path=persist_dir,
+            settings=ChromaSettings(
+                anonymized_telemetry=False,
+                allow_reset=True
+            )
+        )
+
+    def _open_store(self, course_id: int, create: bool) -> Optional[ChromaVectorStore]:
+        name = course_collection_name(course_id)
+        if create:
+            collection = self._client.get_or_create_collection(
+                name=name,
+                metadata={"hnsw:space": "cosine"}
+            )
+        else:
+            try:
+                collection = self._client.get_collection(name=name)
+            except Exception:
+                return None
+        return ChromaVectorStore(chroma_collection=collection)
+
+    def _drop_store(self, course_id: int, store: ChromaVectorStore) -> None:
+        self._client.delete_collection(name=course_collection_name(course_id))
+
+    def file_chunks(self, course_id: int, file_id: int) -> List[Tuple[str, str]]:
+        store = self.get_store(course_id)
+        if store is None:
+            return []
+        existing = store.client.get(where={"file_id": file_id}, include=["metadatas"])
+        return [
+            (chunk_id, (metadata or {}).get("chunk_hash", ""))
+            for chunk_id, metadata in zip(existing["ids"], existing["metadatas"])
+        ]
+
+    def delete_chunks(self, course_id: int, chunk_ids: Sequence[str]) -> None:
+        store = self.get_store(course_id)
+        if store is not None and chunk_ids:
+            store.client.delete(ids=list(chunk_ids))
+
+    def delete_file(self, course_id: int, file_id: int) -> int:
+        store = self.get_store(course_id)
+        if store is None:
+            return 0
+        # Collection.delete returns nothing, so fetch just the matching IDs to count them
+        chunk_ids = store.client.get(where={"file_id": file_id}, include=[])["ids"]
+        if chunk_ids:
+            store.client.delete(ids=chunk_ids)
+        return len(chunk_ids)
+
+    def count(self, course_id: int) -> int:
+        store = self.get_store(course_id)
+        return store.client.count() if store is not None else 0
+
+    def query_many(
+        self,
+        course_id: int,
+        embeddings: Sequence[List[float]],
+        top_k: int
+    ) -> List[List[NodeWithScore]]:
+        """Query every embedding in one Chroma call, converting and scoring rows like ChromaVectorStore."""
+        store = self.get_store(course_id)
+        if store is None or not embeddings:
+            return [[] for _ in embeddings]
+
+        results = store.client.query(
+            query_embeddings=list(embeddings),
+            n_results=top_k,
+            include=["documents", "metadatas", "distances"]
+        )
+
+        retrieved = []
+        for texts, metadatas, distances in zip(
+            results["documents"], results["metadatas"], results["distances"]
+        ):
+            retrieved.append([
+                NodeWithScore(
+                    node=metadata_dict_to_node(metadata, text=text),
+                    score=math.exp(-distance)
+                )
+                for text, metadata, distance in zip(texts, metadatas, distances)
+            ])
+        return retrieved
@@ -0,0 +1,487 @@
+import json
+import math
+import os
+import shutil
+import threading
+from typing import Any, BinaryIO, ClassVar, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from llama_index.core.schema import BaseNode, NodeWithScore
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    FilterCondition,
+    FilterOperator,
+    MetadataFilters,
+    VectorStoreQuery,
+    VectorStoreQueryResult
+)
+from llama_index.core.vector_stores.utils import metadata_dict_to_node, node_to_metadata_dict
+from app.services.vector_backends.base import VectorBackend
+
+META_FILE = "meta.json"
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length so dot products are cosine similarities."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class NumpyCourseStore(BasePydanticVectorStore):
+    """
+    Exact cosine search over one course's chunks in a float32 NumPy matrix.
+
+    Embeddings are normalized and appended to a raw float32 file that is
+    memory-mapped for search, so a query is one matrix product. Chunk texts
+    and metadata are appended to a JSON-lines file and read back only for the
+    returned chunks; memory holds just the IDs, course and file IDs, chunk
+    hashes and file offsets, so metadata filters can match on course_id and
+    file_id. Deletes append row numbers to a tombstone log and are
+    masked out of searches. Once more than half of the rows are deleted, the
+    live rows are copied to a new generation of files, which meta.json
+    switches to atomically.
+    """
+
+    stores_text: bool = True
+    flat_metadata: bool = False
+
+    # Deleted rows needed before a compaction is considered
+    COMPACT_MIN_DELETED: ClassVar[int] = 256
+
+    _path: str
+    _lock: Any
+    _generation: int
+    _dimensions: Optional[int]
+    _matrix: Optional[np.ndarray]
+    _alive: np.ndarray
+    _ids: List[str]
+    _rows: Dict[str, int]
+    _course_ids: List[Any]
+    _file_ids: List[Any]
+    _chunk_hashes: List[str]
+    _ref_doc_ids: List[Optional[str]]
+    _offsets: List[int]
+    _lengths: List[int]
+    _deleted: int
+    _chunks_file: Optional[BinaryIO]
+
+    def __init__(self, path: str):
+        """
+        Open the store in a directory, creating it if needed.
+
+        Args:
+            path: Directory holding the store's files
+        """
+        super().__init__(stores_text=True)
+        self._path = path
+        self._lock = threading.RLock()
+        self._chunks_file = None
+        os.makedirs(path, exist_ok=True)
+        self._load()
+
+    @property
+    def client(self) -> Any:
+        """No separate client; the store itself."""
+        return self
+
+    def _file(self, kind: str, generation: Optional[int] = None) -> str:
+        generation = self._generation if generation is None else generation
+        names = {"vectors": "vectors.{}.f32", "chunks": "chunks.{}.jsonl", "tombstones": "tombstones.{}.txt"}
+        return os.path.join(self._path, names[kind].format(generation))
+
+    def _write_meta(self) -> None:
+        """Atomically record the current generation and dimensions."""
+        meta_path = os.path.join(self._path, META_FILE)
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump({"generation": self._generation, "dimensions": self._dimensions}, f)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    def _load(self) -> None:
+        """Read the row index and tombstones, dropping rows left half-written by a crash."""
+        meta_path = os.path.join(self._path, META_FILE)
+        meta = {}
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+        self._generation = meta.get("generation", 0)
+        self._dimensions = meta.get("dimensions")
+        self._ids, self._course_ids, self._file_ids, self._chunk_hashes, self._ref_doc_ids = [], [], [], [], []
+        self._offsets, self._lengths = [], []
+
+        chunks_path = self._file("chunks")
+        if os.path.exists(chunks_path):
+            with open(chunks_path, "rb") as f:
+                offset = 0
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    self._append_row(record["id"], record["metadata"], offset, len(line))
+                    offset += len(line)
+
+        # Vectors are written before their chunk records, so the shorter file wins
+        vectors_path = self._file("vectors")
+        row_bytes = 4 * (self._dimensions or 0)
+        vector_rows = os.path.getsize(vectors_path) // row_bytes if row_bytes and os.path.exists(vectors_path) else 0
+        rows = min(len(self._ids), vector_rows)
+        for values in (self._ids, self._course_ids, self._file_ids, self._chunk_hashes, self._ref_doc_ids, self._offsets, self._lengths):
+            del values[rows:]
+        if os.path.exists(vectors_path):
+            os.truncate(vectors_path, rows * row_bytes)
+        if os.path.exists(chunks_path):
+            os.truncate(chunks_path, self._offsets[-1] + self._lengths[-1] if rows else 0)
+
+        self._alive = np.ones(rows, dtype=bool)
+        self._deleted = 0
+        tombstones_path = self._file("tombstones")
+        if os.path.exists(tombstones_path):
+            with open(tombstones_path) as f:
+                for line in f:
+                    row = int(line) if line.strip().isdigit() else -1
+                    if 0 <= row < rows and self._alive[row]:
+                        self._alive[row] = False
+                        self._deleted += 1
+
+        self._rows = {self._ids[row]: row for row in np.flatnonzero(self._alive)}
+        self._reopen()
+
+    def _append_row(self, chunk_id: str, metadata: Dict[str, Any], offset: int, length: int) -> None:
+        self._ids.append(chunk_id)
+        self._course_ids.append(metadata.get("course_id"))
+        self._file_ids.append(metadata.get("file_id"))
+        self._chunk_hashes.append(metadata.get("chunk_hash", ""))
+        self._ref_doc_ids.append(metadata.get("ref_doc_id"))
+        self._offsets.append(offset)
+        self._lengths.append(length)
+
+    def _reopen(self) -> None:
+        """Memory-map the vectors and reopen the chunk file after they changed."""
+        rows = len(self._ids)
+        self._matrix = None
+        if rows:
+            self._matrix = np.memmap(
+                self._file("vectors"), dtype=np.float32, mode="r", shape=(rows, self._dimensions)
+            )
+        if self._chunks_file is None and os.path.exists(self._file("chunks")):
+            self._chunks_file = open(self._file("chunks"), "rb")
+
+    def close(self) -> None:
+        """Release the memory map and chunk file."""
+        with self._lock:
+            self._matrix = None
+            if self._chunks_file is not None:
+                self._chunks_file.close()
+                self._chunks_file = None
+
+    def drop(self) -> None:
+        """Delete the store's files."""
+        with self._lock:
+            self.close()
+            shutil.rmtree(self._path, ignore_errors=True)
+
+    def add(self, nodes: Sequence[BaseNode], **add_kwargs: Any) -> List[str]:
+        """
+        Append embedded nodes. A node whose ID is already stored replaces it.
+
+        Args:
+            nodes: Nodes with embeddings
+
+        Returns:
+            The node IDs
+        """
+        if not nodes:
+            return []
+        vectors = _normalize(np.asarray([node.get_embedding() for node in nodes], dtype=np.float32))
+        records = [
+            (json.dumps({
+                "id": node.node_id,
+                "text": node.get_content(),
+                "metadata": node_to_metadata_dict(node, remove_text=True, flat_metadata=self.flat_metadata)
+            }) + "\n").encode("utf-8")
+            for node in nodes
+        ]
+
+        with self._lock:
+            if self._dimensions is None:
+                self._dimensions = vectors.shape[1]
+                self._write_meta()
+            elif vectors.shape[1] != self._dimensions:
+                raise ValueError(
+                    f"Embedding has {vectors.shape[1]} dimensions, the store has {self._dimensions}"
+                )
+
+            replaced = [self._rows[node.node_id] for node in nodes if node.node_id in self._rows]
+            if replaced:
+                self._tombstone(replaced)
+
+            with open(self._file("vectors"), "ab") as f:
+                f.write(vectors.tobytes())
+            offset = self._offsets[-1] + self._lengths[-1] if self._ids else 0
+            with open(self._file("chunks"), "ab") as f:
+                f.write(b"".join(records))
+
+            first_row = len(self._ids)
+            for row, (node, record) in enumerate(zip(nodes, records), start=first_row):
+                self._append_row(node.node_id, json.loads(record)["metadata"], offset, len(record))
+                self._rows[node.node_id] = row
+                offset += len(record)
+            self._alive = np.concatenate([self._alive, np.ones(len(nodes), dtype=bool)])
+            self._reopen()
+
+        return [node.node_id for node in nodes]
+
+    def _tombstone(self, rows: Sequence[int]) -> None:
+        """Mark rows deleted and log them. Caller holds the lock."""
+        rows = [row for row in rows if self._alive[row]]
+        if not rows:
+            return
+        with open(self._file("tombstones"), "a") as f:
+            f.write("".join(f"{row}\n" for row in rows))
+        for row in rows:
+            self._alive[row] = False
+            self._rows.pop(self._ids[row], None)
+        self._deleted += len(rows)
+
+    def _maybe_compact(self) -> None:
+        """Rewrite the live rows into a new generation of files if most rows are deleted."""
+        with self._lock:
+            if self._deleted < self.COMPACT_MIN_DELETED or 2 * self._deleted < len(self._ids):
+                return
+
+            keep = np.flatnonzero(self._alive)
+            old_generation = self._generation
+            new_generation = old_generation + 1
+            np.asarray(self._matrix[keep]).tofile(self._file("vectors", new_generation))
+            with open(self._file("chunks", new_generation), "wb") as f:
+                for row in keep:
+                    f.write(self._read_record(row))
+
+            self.close()
+            self._generation = new_generation
+            self._write_meta()
+            for kind in ("vectors", "chunks", "tombstones"):
+                try:
+                    os.remove(self._file(kind, old_generation))
+                except FileNotFoundError:
+                    pass
+            self._load()
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        """Delete the nodes of a source document."""
+        with self._lock:
+            self._tombstone([
+                row for row in np.flatnonzero(self._alive) if self._ref_doc_ids[row] == ref_doc_id
+            ])
+        self._maybe_compact()
+
+    def delete_nodes(
+        self,
+        node_ids: Optional[List[str]] = None,
+        filters: Optional[MetadataFilters] = None,
+        **delete_kwargs: Any
+    ) -> None:
+        """Delete nodes by ID, by metadata filters on course_id and file_id, or both."""
+        with self._lock:
+            if filters is None:
+                rows = [self._rows[node_id] for node_id in node_ids or [] if node_id in self._rows]
+            else:
+                rows = np.flatnonzero(self._alive & self._filter_mask(filters))
+                if node_ids is not None:
+                    wanted = set(node_ids)
+                    rows = [row for row in rows if self._ids[row] in wanted]
+            self._tombstone(rows)
+        self._maybe_compact()
+
+    def delete_file(self, file_id: Any) -> int:
+        """
+        Delete every node of a file.
+
+        Returns:
+            Number of nodes deleted
+        """
+        with self._lock:
+            rows = [row for row in np.flatnonzero(self._alive) if self._file_ids[row] == file_id]
+            self._tombstone(rows)
+        self._maybe_compact()
+        return len(rows)
+
+    def file_chunks(self, file_id: Any) -> List[Tuple[str, str]]:
+        """List (node ID, chunk_hash) of a file's live nodes."""
+        with self._lock:
+            return [
+                (self._ids[row], self._chunk_hashes[row])
+                for row in np.flatnonzero(self._alive)
+                if self._file_ids[row] == file_id
+            ]
+
+    def count(self) -> int:
+        """Number of live nodes."""
+        with self._lock:
+            return len(self._rows)
+
+    def _filter_column(self, key: str) -> List[Any]:
+        """Get the in-memory values of a filterable metadata key. Caller holds the lock."""
+        columns = {"course_id": self._course_ids, "file_id": self._file_ids}
+        if key not in columns:
+            raise ValueError(f"Cannot filter on '{key}', only on {' and '.join(columns)}")
+        return columns[key]
+
+    def _filter_mask(self, filters: MetadataFilters) -> np.ndarray:
+        """
+        Match rows against metadata filters. Caller holds the lock.
+
+        Supports the ==, !=, in and nin operators on course_id and file_id,
+        combined with and/or, including nested filters.
+
+        Args:
+            filters: The metadata filters
+
+        Returns:
+            Boolean mask with one entry per row
+        """
+        masks = []
+        for condition in filters.filters:
+            if isinstance(condition, MetadataFilters):
+                masks.append(self._filter_mask(condition))
+                continue
+
+            values = self._filter_column(condition.key)
+            if condition.operator == FilterOperator.EQ:
+                matches = [value == condition.value for value in values]
+            elif condition.operator == FilterOperator.NE:
+                matches = [value != condition.value for value in values]
+            elif condition.operator == FilterOperator.IN:
+                matches = [value in condition.value for value in values]
+            elif condition.operator == FilterOperator.NIN:
+                matches = [value not in condition.value for value in values]
+            else:
+                raise ValueError(f"Unsupported filter operator '{condition.operator.value}'")
+            masks.append(np.array(matches, dtype=bool))
+
+        if not masks:
+            return np.ones(len(self._ids), dtype=bool)
+        if filters.condition == FilterCondition.OR:
+            return np.logical_or.reduce(masks)
+        if filters.condition in (None, FilterCondition.AND):
+            return np.logical_and.reduce(masks)
+        raise ValueError(f"Unsupported filter condition '{filters.condition.value}'")
+
+    def query_many(
+        self,
+        embeddings: Sequence[List[float]],
+        top_k: int,
+        filters: Optional[MetadataFilters] = None
+    ) -> List[List[NodeWithScore]]:
+        """
+        Find the most similar nodes for several query embeddings with one matrix product.
+
+        Scores are exp(-cosine distance), the same scale ChromaVectorStore reports.
+
+        Args:
+            embeddings: The query embeddings
+            top_k: Number of nodes to return per embedding
+            filters: Optional metadata filters on course_id and file_id
+
+        Returns:
+            Nodes with similarity scores, best first, one list per embedding
+        """
+        if not len(embeddings):
+            return []
+        queries = _normalize(np.asarray(embeddings, dtype=np.float32))
+
+        with self._lock:
+            alive = self._alive if filters is None else self._alive & self._filter_mask(filters)
+            live = int(np.count_nonzero(alive))
+            if self._matrix is None or live == 0 or top_k <= 0:
+                return [[] for _ in range(len(queries))]
+
+            scores = self._matrix @ queries.T
+            scores[~alive] = -np.inf
+            k = min(top_k, live)
+
+            results = []
+            for column in scores.T:
+                top = np.argpartition(-column, k - 1)[:k] if k < len(column) else np.arange(len(column))
+                top = top[np.argsort(-column[top])]
+                results.append([self._read_node(row, float(column[row])) for row in top])
+            return results
+
+    def _read_record(self, row: int) -> bytes:
+        """Read a row's JSON line from the chunk file. Caller holds the lock."""
+        self._chunks_file.seek(self._offsets[row])
+        return self._chunks_file.read(self._lengths[row])
+
+    def _read_node(self, row: int, cosine: float) -> NodeWithScore:
+        """Load a row's node from the chunk file. Caller holds the lock."""
+        record = json.loads(self._read_record(row))
+        node = metadata_dict_to_node(record["metadata"], text=record["text"])
+        return NodeWithScore(node=node, score=math.exp(cosine - 1.0))
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        """Exact top-k cosine search for a llama_index retriever, with optional metadata filters."""
+        if query.query_embedding is None:
+            return VectorStoreQueryResult(nodes=[], similarities=[], ids=[])
+
+        results = self.query_many([query.query_embedding], query.similarity_top_k, query.filters)[0]
+        return VectorStoreQueryResult(
+            nodes=[result.node for result in results],
+            similarities=[result.score for result in results],
+            ids=[result.node.node_id for result in results]
+        )
+
+
+class NumpyBackend(VectorBackend):
+    """Vector backend keeping each course in a NumpyCourseStore directory."""
+
+    name = "numpy"
+
+    def __init__(self, root_dir: str):
+        """
+        Initialize the backend.
+
+        Args:
+            root_dir: Directory holding one subdirectory per course
+        """
+        super().__init__()
+        self._root_dir = root_dir
+        os.makedirs(root_dir, exist_ok=True)
+
+    def _open_store(self, course_id: int, create: bool) -> Optional[NumpyCourseStore]:
+        path = os.path.join(self._root_dir, f"course_{course_id}")
+        if not create and not os.path.isdir(path):
+            return None
+        return NumpyCourseStore(path)
+
+    def _drop_store(self, course_id: int, store: NumpyCourseStore) -> None:
+        store.drop()
+
+    def file_chunks(self, course_id: int, file_id: int) -> List[Tuple[str, str]]:
+        store = self.get_store(course_id)
+        return store.file_chunks(file_id) if store is not None else []
+
+    def delete_chunks(self, course_id: int, chunk_ids: Sequence[str]) -> None:
+        store = self.get_store(course_id)
+        if store is not None and chunk_ids:
+            store.delete_nodes(list(chunk_ids))
+
+    def delete_file(self, course_id: int, file_id: int) -> int:
+        store = self.get_store(course_id)
+        return store.delete_file(file_id) if store is not None else 0
+
+    def count(self, course_id: int) -> int:
+        store = self.get_store(course_id)
+        return store.count() if store is not None else 0
+
+    def query_many(
+        self,
+        course_id: int,
+        embeddings: Sequence[List[float]],
+        top_k: int
+    ) -> List[List[NodeWithScore]]:
+        store = self.get_store(course_id)
+        if store is None:
+            return [[] for _ in embeddings]
+        return store.query_many(embeddings, top_k)
@@ -0,0 +1,137 @@
+"""
+Wire protocol between the remote vector backend and the vector service.
+
+Every request and response is one frame:
+
+    code (u8) | header length (u32) | vector length (u32) | header | vectors
+
+all little-endian. The code is an Op on requests and a Status on responses.
+The header is compact JSON with the operation's arguments or result, and
+the vectors are a row-major float32 matrix with the header's "dimensions"
+columns, so embeddings never go through JSON.
+"""
+import json
+import socket
+import struct
+from enum import IntEnum
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from llama_index.core.schema import BaseNode
+from llama_index.core.vector_stores.utils import metadata_dict_to_node, node_to_metadata_dict
+
+FRAME_HEADER = struct.Struct("<BII")
+
+# Frames larger than this are rejected instead of buffered
+MAX_FRAME_BYTES = 256 * 1024 * 1024
+
+
+class Op(IntEnum):
+    """Operations of the vector service."""
+    PING = 1
+    ADD = 2
+    QUERY = 3
+    DELETE_REF_DOC = 4
+    FILE_CHUNKS = 5
+    DELETE_CHUNKS = 6
+    DELETE_FILE = 7
+    COUNT = 8
+    DELETE_COURSE = 9
+
+
+class Status(IntEnum):
+    """Response codes of the vector service."""
+    OK = 0
+    ERROR = 1
+
+
+class VectorServiceError(RuntimeError):
+    """The vector service failed to run an operation."""
+
+
+def send_frame(
+    sock: socket.socket,
+    code: int,
+    header: Dict[str, Any],
+    vectors: Optional[np.ndarray] = None
+) -> None:
+    """
+    Send one frame.
+
+    Args:
+        sock: Connected socket
+        code: Op of a request or Status of a response
+        header: JSON-serializable arguments or result
+        vectors: Optional 2-D matrix sent as float32
+    """
+    blob = b""
+    if vectors is not None and len(vectors):
+        vectors = np.ascontiguousarray(vectors, dtype="<f4")
+        header = dict(header, dimensions=vectors.shape[1])
+        blob = vectors.tobytes()
+    payload = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    sock.sendall(FRAME_HEADER.pack(code, len(payload), len(blob)) + payload + blob)
+
+
+def recv_frame(sock: socket.socket) -> Optional[Tuple[int, Dict[str, Any], Optional[np.ndarray]]]:
+    """
+    Receive one frame.
+
+    Args:
+        sock: Connected socket
+
+    Returns:
+        Tuple of (code, header, vectors or None), or None if the peer closed the connection
+
+    Raises:
+        ConnectionError: If the connection closes mid-frame or the frame is too large
+    """
+    prefix = _recv_exactly(sock, FRAME_HEADER.size, allow_eof=True)
+    if prefix is None:
+        return None
+    code, header_length, vector_length = FRAME_HEADER.unpack(prefix)
+    if header_length + vector_length > MAX_FRAME_BYTES:
+        raise ConnectionError(f"Frame of {header_length + vector_length} bytes exceeds the limit")
+
+    header = json.loads(_recv_exactly(sock, header_length))
+    vectors = None
+    if vector_length:
+        vectors = np.frombuffer(_recv_exactly(sock, vector_length), dtype="<f4")
+        vectors = vectors.reshape(-1, header["dimensions"])
+    return code, header, vectors
+
+
+def _recv_exactly(sock: socket.socket, size: int, allow_eof: bool = False) -> Optional[bytearray]:
+    """Read exactly size bytes, or return None on a clean EOF before the first byte if allowed."""
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            if allow_eof and received == 0:
+                return None
+            raise ConnectionError("Vector service connection closed mid-frame")
+        received += count
+    return buffer
+
+
+def encode_nodes(nodes: Sequence[BaseNode]) -> List[Dict[str, Any]]:
+    """Serialize nodes without their embeddings, which travel as the frame's vectors."""
+    return [
+        {
+            "text": node.get_content(),
+            "metadata": node_to_metadata_dict(node, remove_text=True, flat_metadata=False)
+        }
+        for node in nodes
+    ]
+
+
+def decode_nodes(records: Sequence[Dict[str, Any]], vectors: Optional[np.ndarray] = None) -> List[BaseNode]:
+    """Rebuild nodes serialized by encode_nodes, attaching embeddings if given."""
+    nodes = []
+    for row, record in enumerate(records):
+        node = metadata_dict_to_node(record["metadata"], text=record["text"])
+        if vectors is not None:
+            node.embedding = vectors[row].tolist()
+        nodes.append(node)
+    return nodes
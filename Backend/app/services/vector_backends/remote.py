@@ -0,0 +1,300 @@
+import queue
+import socket
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from llama_index.core.schema import BaseNode, NodeWithScore
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    MetadataFilters,
+    VectorStoreQuery,
+    VectorStoreQueryResult
+)
+from app.services.vector_backends.base import VectorBackend
+from app.services.vector_backends.protocol import (
+    Op,
+    Status,
+    VectorServiceError,
+    decode_nodes,
+    encode_nodes,
+    recv_frame,
+    send_frame
+)
+
+
+class ConnectionPool:
+    """
+    Blocking connections to the vector service's Unix socket, reused across requests.
+
+    At most max_connections are open; a request waits for an idle one when
+    all are busy. A connection that fails is discarded. When it was dropped
+    (refused, reset or closed by the service), the request is retried once
+    on a new connection so a restarted service is picked up transparently;
+    every operation is idempotent, so the retry is safe. Timeouts and other
+    errors are raised at once, since the service may still be busy with the
+    request.
+    """
+
+    def __init__(self, socket_path: str, max_connections: int, timeout_seconds: float):
+        """
+        Initialize the pool. Connections are opened on demand.
+
+        Args:
+            socket_path: Path of the vector service's Unix socket
+            max_connections: Maximum number of open connections
+            timeout_seconds: Timeout of each socket operation
+        """
+        self._socket_path = socket_path
+        self._timeout_seconds = timeout_seconds
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_connections)
+
+    def request(
+        self,
+        op: Op,
+        header: Dict[str, Any],
+        vectors: Optional[np.ndarray] = None
+    ) -> Tuple[Dict[str, Any], Optional[np.ndarray]]:
+        """
+        Send a request and wait for its response.
+
+        Args:
+            op: The operation
+            header: Arguments of the operation
+            vectors: Embeddings sent with the request
+
+        Returns:
+            Tuple of (result header, result vectors)
+
+        Raises:
+            VectorServiceError: If the service reports an error
+            OSError: If the service cannot be reached or does not answer in time
+        """
+        with self._slots:
+            for attempt in range(2):
+                connection = self._acquire(fresh=attempt > 0)
+                try:
+                    send_frame(connection, op, header, vectors)
+                    frame = recv_frame(connection)
+                    if frame is None:
+                        raise ConnectionError("Vector service closed the connection")
+                except ConnectionError:
+                    connection.close()
+                    if attempt > 0:
+                        raise
+                    continue
+                except OSError:
+                    connection.close()
+                    raise
+                self._idle.put(connection)
+                break
+
+        status, result, result_vectors = frame
+        if status != Status.OK:
+            raise VectorServiceError(result.get("error", "Unknown vector service error"))
+        return result, result_vectors
+
+    def _acquire(self, fresh: bool) -> socket.socket:
+        """Take an idle connection, or open one if there is none or a fresh one is needed."""
+        if not fresh:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.settimeout(self._timeout_seconds)
+        try:
+            connection.connect(self._socket_path)
+        except OSError:
+            connection.close()
+            raise
+        return connection
+
+    def close(self) -> None:
+        """Close the idle connections."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class RemoteCourseStore(BasePydanticVectorStore):
+    """
+    llama_index view of one course's store in the vector service.
+
+    Holds no state besides the course ID: every call is a request to the
+    service, so API workers always see the chunks written by the others.
+    """
+
+    stores_text: bool = True
+    flat_metadata: bool = False
+
+    _course_id: int
+    _pool: Any
+
+    def __init__(self, course_id: int, pool: ConnectionPool):
+        """
+        Initialize the store view.
+
+        Args:
+            course_id: The course ID
+            pool: Connections to the vector service
+        """
+        super().__init__()
+        self._course_id = course_id
+        self._pool = pool
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "RemoteCourseStore"
+
+    @property
+    def client(self) -> Any:
+        return self._pool
+
+    def add(self, nodes: Sequence[BaseNode], **add_kwargs: Any) -> List[str]:
+        """
+        Store embedded nodes. A node whose ID is already stored replaces it.
+
+        Args:
+            nodes: Nodes with embeddings
+
+        Returns:
+            The node IDs
+        """
+        if not nodes:
+            return []
+        vectors = np.asarray([node.get_embedding() for node in nodes], dtype=np.float32)
+        result, _ = self._pool.request(
+            Op.ADD,
+            {"course_id": self._course_id, "nodes": encode_nodes(nodes)},
+            vectors
+        )
+        return result["ids"]
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        """Delete the nodes of a source document."""
+        self._pool.request(Op.DELETE_REF_DOC, {"course_id": self._course_id, "ref_doc_id": ref_doc_id})
+
+    def delete_nodes(
+        self,
+        node_ids: Optional[List[str]] = None,
+        filters: Optional[MetadataFilters] = None,
+        **delete_kwargs: Any
+    ) -> None:
+        """Delete nodes by ID, by metadata filters, or both."""
+        if filters is None and not node_ids:
+            return
+        header = {"course_id": self._course_id, "chunk_ids": list(node_ids) if node_ids is not None else None}
+        if filters is not None:
+            header["filters"] = filters.model_dump(mode="json")
+        self._pool.request(Op.DELETE_CHUNKS, header)
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        """Top-k search in the service for a llama_index retriever, with optional metadata filters."""
+        if query.query_embedding is None:
+            return VectorStoreQueryResult(nodes=[], similarities=[], ids=[])
+
+        results = query_many(
+            self._pool,
+            self._course_id,
+            [query.query_embedding],
+            query.similarity_top_k,
+            query.filters
+        )[0]
+        return VectorStoreQueryResult(
+            nodes=[result.node for result in results],
+            similarities=[result.score for result in results],
+            ids=[result.node.node_id for result in results]
+        )
+
+
+def query_many(
+    pool: ConnectionPool,
+    course_id: int,
+    embeddings: Sequence[List[float]],
+    top_k: int,
+    filters: Optional[MetadataFilters] = None
+) -> List[List[NodeWithScore]]:
+    """Search the service for several query embeddings in one request."""
+    if not len(embeddings):
+        return []
+    header = {"course_id": course_id, "top_k": top_k}
+    if filters is not None:
+        header["filters"] = filters.model_dump(mode="json")
+    result, _ = pool.request(Op.QUERY, header, np.asarray(embeddings, dtype=np.float32))
+    return [
+        [
+            NodeWithScore(node=node, score=score)
+            for node, score in zip(decode_nodes(hits["nodes"]), hits["scores"])
+        ]
+        for hits in result["results"]
+    ]
+
+
+class RemoteBackend(VectorBackend):
+    """
+    Vector backend that forwards every operation to the vector service process.
+
+    The service (python -m app.services.vector_backends.server) owns the
+    actual Chroma or NumPy storage, so any number of API worker processes can
+    share one CHROMA_PERSIST_DIR or NUMPY_VECTOR_STORE_DIR safely. Course
+    stores exist from the workers' point of view as soon as they are asked
+    for; the service creates them on the first add, and searching a course
+    without a store returns no chunks.
+    """
+
+    name = "remote"
+
+    def __init__(self, socket_path: str, max_connections: int, timeout_seconds: float):
+        """
+        Initialize the backend.
+
+        Args:
+            socket_path: Path of the vector service's Unix socket
+            max_connections: Maximum number of pooled connections to the service
+            timeout_seconds: Timeout of each socket operation
+        """
+        super().__init__()
+        self._pool = ConnectionPool(socket_path, max_connections, timeout_seconds)
+
+    def ping(self) -> None:
+        """Check that the service is reachable. Raises OSError if it is not."""
+        self._pool.request(Op.PING, {})
+
+    def _open_store(self, course_id: int, create: bool) -> RemoteCourseStore:
+        return RemoteCourseStore(course_id, self._pool)
+
+    def _drop_store(self, course_id: int, store: RemoteCourseStore) -> None:
+        self._pool.request(Op.DELETE_COURSE, {"course_id": course_id})
+
+    def delete_course(self, course_id: int) -> int:
+        with self._lock:
+            self._stores.pop(course_id, None)
+        result, _ = self._pool.request(Op.DELETE_COURSE, {"course_id": course_id})
+        return result["deleted"]
+
+    def file_chunks(self, course_id: int, file_id: int) -> List[Tuple[str, str]]:
+        result, _ = self._pool.request(Op.FILE_CHUNKS, {"course_id": course_id, "file_id": file_id})
+        return [tuple(chunk) for chunk in result["chunks"]]
+
+    def delete_chunks(self, course_id: int, chunk_ids: Sequence[str]) -> None:
+        if chunk_ids:
+            self._pool.request(Op.DELETE_CHUNKS, {"course_id": course_id, "chunk_ids": list(chunk_ids)})
+
+    def delete_file(self, course_id: int, file_id: int) -> int:
+        result, _ = self._pool.request(Op.DELETE_FILE, {"course_id": course_id, "file_id": file_id})
+        return result["deleted"]
+
+    def count(self, course_id: int) -> int:
+        result, _ = self._pool.request(Op.COUNT, {"course_id": course_id})
+        return result["count"]
+
+    def query_many(
+        self,
+        course_id: int,
+        embeddings: Sequence[List[float]],
+        top_k: int
+    ) -> List[List[NodeWithScore]]:
+        return query_many(self._pool, course_id, embeddings, top_k)
@@ -0,0 +1,211 @@
+"""
+Vector service: one process owning the vector storage for every API worker.
+
+Chroma's PersistentClient and the NumPy store's files must only be written
+by one process. Run this service once per host and set VECTOR_BACKEND=remote
+in the API workers, which then reach it over VECTOR_SERVICE_SOCKET:
+
+    python -m app.services.vector_backends.server --backend chroma
+
+Each connection is served by its own thread, so requests of different
+workers overlap wherever the backend releases the GIL.
+"""
+import argparse
+import os
+import signal
+import socketserver
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from llama_index.core.schema import NodeWithScore
+from llama_index.core.vector_stores.types import MetadataFilters, VectorStoreQuery
+from app.config import settings
+from app.services.vector_backends import create_vector_backend
+from app.services.vector_backends.base import VectorBackend
+from app.services.vector_backends.protocol import (
+    Op,
+    Status,
+    decode_nodes,
+    encode_nodes,
+    recv_frame,
+    send_frame
+)
+
+
+class VectorRequestHandler(socketserver.BaseRequestHandler):
+    """Serves the requests of one connection until the client closes it."""
+
+    server: "VectorServer"
+
+    def handle(self) -> None:
+        while True:
+            try:
+                frame = recv_frame(self.request)
+            except (OSError, ValueError) as e:
+                print(f"Dropping vector service connection: {e}")
+                return
+            if frame is None:
+                return
+
+            code, header, vectors = frame
+            try:
+                result, result_vectors = self.server.dispatch(Op(code), header, vectors)
+                status = Status.OK
+            except Exception as e:
+                print(f"Vector service error in operation {code}: {e}")
+                result, result_vectors, status = {"error": str(e) or type(e).__name__}, None, Status.ERROR
+
+            try:
+                send_frame(self.request, status, result, result_vectors)
+            except OSError:
+                return
+
+
+class VectorServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server running vector operations on a local backend."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, backend: VectorBackend):
+        """
+        Bind the socket, replacing a stale one left by a previous run.
+
+        Args:
+            socket_path: Path of the Unix socket
+            backend: Local backend that stores the vectors
+        """
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+        self.backend = backend
+        self._requests = 0
+        self._requests_lock = threading.Lock()
+        super().__init__(socket_path, VectorRequestHandler)
+
+    def dispatch(
+        self,
+        op: Op,
+        header: Dict[str, Any],
+        vectors: Optional[np.ndarray]
+    ) -> Tuple[Dict[str, Any], Optional[np.ndarray]]:
+        """
+        Run one operation.
+
+        Returns:
+            Tuple of (result header, result vectors)
+        """
+        with self._requests_lock:
+            self._requests += 1
+
+        backend = self.backend
+        if op == Op.PING:
+            return {"backend": backend.name, "requests": self._requests}, None
+
+        course_id = header["course_id"]
+        if op == Op.ADD:
+            store = backend.get_store(course_id, create=True)
+            return {"ids": store.add(decode_nodes(header["nodes"], vectors))}, None
+
+        filters = MetadataFilters.model_validate(header["filters"]) if header.get("filters") else None
+
+        if op == Op.QUERY:
+            if filters is None:
+                results = backend.query_many(course_id, vectors.tolist(), header["top_k"])
+            else:
+                results = self._query_filtered(course_id, vectors.tolist(), header["top_k"], filters)
+            return {
+                "results": [
+                    {
+                        "nodes": encode_nodes([hit.node for hit in hits]),
+                        "scores": [hit.score for hit in hits]
+                    }
+                    for hits in results
+                ]
+            }, None
+
+        if op == Op.DELETE_REF_DOC:
+            store = backend.get_store(course_id)
+            if store is not None:
+                store.delete(header["ref_doc_id"])
+            return {}, None
+
+        if op == Op.FILE_CHUNKS:
+            return {"chunks": backend.file_chunks(course_id, header["file_id"])}, None
+
+        if op == Op.DELETE_CHUNKS:
+            if filters is None:
+                backend.delete_chunks(course_id, header["chunk_ids"])
+            else:
+                store = backend.get_store(course_id)
+                if store is not None:
+                    store.delete_nodes(header["chunk_ids"], filters=filters)
+            return {}, None
+
+        if op == Op.DELETE_FILE:
+            return {"deleted": backend.delete_file(course_id, header["file_id"])}, None
+
+        if op == Op.COUNT:
+            return {"count": backend.count(course_id)}, None
+
+        if op == Op.DELETE_COURSE:
+            return {"deleted": backend.delete_course(course_id)}, None
+
+        raise ValueError(f"Unsupported operation: {op}")
+
+    def _query_filtered(
+        self,
+        course_id: int,
+        embeddings: List[List[float]],
+        top_k: int,
+        filters: MetadataFilters
+    ) -> List[List[NodeWithScore]]:
+        """Search a course's store with metadata filters, one query per embedding."""
+        store = self.backend.get_store(course_id)
+        if store is None:
+            return [[] for _ in embeddings]
+
+        results = []
+        for embedding in embeddings:
+            result = store.query(VectorStoreQuery(
+                query_embedding=embedding,
+                similarity_top_k=top_k,
+                filters=filters
+            ))
+            results.append([
+                NodeWithScore(node=node, score=score)
+                for node, score in zip(result.nodes, result.similarities)
+            ])
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve vector storage to the API workers over a Unix socket.")
+    parser.add_argument("--socket", default=settings.VECTOR_SERVICE_SOCKET, help="Path of the Unix socket")
+    parser.add_argument(
+        "--backend",
+        default=settings.VECTOR_SERVICE_BACKEND,
+        choices=("chroma", "numpy"),
+        help="Local backend storing the vectors"
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    server = VectorServer(args.socket, create_vector_backend(args.backend))
+    print(f"Vector service ({args.backend}) listening on {args.socket} after {time.perf_counter() - start:.2f}s")
+
+    # Stop cleanly on SIGTERM too, so the socket file is removed
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+        print("Vector service stopped")
+
+
+if __name__ == "__main__":
+    main()
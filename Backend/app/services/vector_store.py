@@ -1,17 +1,28 @@
-import os
-from typing import List, Optional
-from warnings import filters
-import chromadb
-from chromadb.config import Settings as ChromaSettings
-from llama_cloud import MetadataFilter, MetadataFilters
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from functools import partial
+from typing import AsyncIterator, Callable, Dict, Hashable, Iterable, List, Optional, Sequence
+import httpx
+from ollama import AsyncClient
 # Add PromptTemplate import
-from llama_index.core import Document, VectorStoreIndex, StorageContext, PromptTemplate
-from llama_index.core.node_parser import SentenceSplitter
-from llama_index.vector_stores.chroma import ChromaVectorStore
+from llama_index.core import VectorStoreIndex, StorageContext, PromptTemplate
+from llama_index.core.schema import BaseNode, MetadataMode, NodeWithScore, QueryBundle
+from llama_index.core.vector_stores.types import BasePydanticVectorStore
 from llama_index.embeddings.ollama import OllamaEmbedding
 from llama_index.llms.ollama import Ollama
 from llama_index.core import Settings
 from app.config import settings as app_settings
+from app.services.answer_cache import answer_cache, normalize_question
+from app.services.context_assembler import AssembledContext, context_assembler
+from app.services.embedding_cache import embedding_cache, query_embedding_cache
+from app.services.ollama_scheduler import Flow, Priority, embedding_scheduler, generation_scheduler
+from app.services.request_coalescer import Flight, chat_coalescer
+from app.services.stage_timing import StageTimer, disabled_timer, stage_timer
+from app.services.text_processing import split_text
+from app.services.vector_backends import create_vector_backend
+from app.utils.lru_cache import LRUCache
 
 # Define the custom prompt template
 QA_PROMPT_TEMPLATE_STR = (
@@ -26,46 +37,85 @@ QA_PROMPT_TEMPLATE_STR = (
     "Answer: "
 )
 
+# Query used to load the models and course indexes at startup
+WARM_UP_QUERY = "warm-up"
+
+
+@dataclass
+class IndexingResult:
+    """Outcome of indexing a single document. chunks_indexed counts newly embedded chunks."""
+    chunks_indexed: int
+    elapsed_seconds: float
+    cache_hits: int = 0
+    cache_misses: int = 0
+    chunks_reused: int = 0
+    chunks_removed: int = 0
+    
+    @property
+    def chunks_per_second(self) -> float:
+        """Ingestion throughput for this document."""
+        if self.elapsed_seconds <= 0:
+            return float(self.chunks_indexed)
+        return self.chunks_indexed / self.elapsed_seconds
+
+
+@dataclass
+class QueryResult:
+    """Outcome of answering a question over course materials."""
+    answer: str
+    retrieved_chunks: int
+    cached: bool = False
+    coalesced: bool = False
+    prompt_tokens_before: Optional[int] = None
+    prompt_tokens_after: Optional[int] = None
+    # Seconds spent in each stage of the generation, when stage timing is enabled
+    timings: Optional[Dict[str, float]] = None
+
+
 class VectorStoreService:
-    """Service for managing vector store operations with ChromaDB."""
+    """
+    Service for managing vector store operations.
+    
+    Chunks are stored by the vector backend chosen with VECTOR_BACKEND
+    (ChromaDB, a memory-mapped NumPy index, or either of them in the shared
+    vector service process), one store per course, created on first upload,
+    so searches never need a course filter and deleting a course drops one
+    store.
+    """
     
     def __init__(self):
         """Initialize vector store service."""
-        self._chroma_client = None
-        self._collection = None
-        self._vector_store = None
+        self._backend = None
         self._embedding_model = None
         self._llm = None
+        self._embedding_executor = None
+        # One index per course, shared by queries of every top_k
+        self._indexes = LRUCache(max_size=app_settings.RETRIEVER_CACHE_SIZE)
         self._initialize()
     
     def _initialize(self):
-        """Initialize ChromaDB, embedding model, and LLM."""
-        # Ensure persist directory exists
-        os.makedirs(app_settings.CHROMA_PERSIST_DIR, exist_ok=True)
-        
-        # Initialize ChromaDB client
-        self._chroma_client = chromadb.PersistentClient(
-            path=app_settings.CHROMA_PERSIST_DIR,
-            settings=ChromaSettings(
-                anonymized_telemetry=False,
-                allow_reset=True
-            )
-        )
+        """Initialize the vector backend, embedding model, and LLM."""
+        self._backend = create_vector_backend(app_settings.VECTOR_BACKEND)
         
-        # Get or create collection
-        self._collection = self._chroma_client.get_or_create_collection(
-            name=app_settings.CHROMA_COLLECTION_NAME,
-            metadata={"hnsw:space": "cosine"}
+        # Allow as many in-flight Ollama requests as concurrent chats we serve
+        ollama_limits = httpx.Limits(
+            max_connections=app_settings.OLLAMA_MAX_CONNECTIONS,
+            max_keepalive_connections=app_settings.OLLAMA_MAX_CONNECTIONS
         )
         
-        # Initialize vector store
-        self._vector_store = ChromaVectorStore(chroma_collection=self._collection)
-        
         # Initialize embedding model
         self._embedding_model = OllamaEmbedding(
             model_name=app_settings.OLLAMA_EMBEDDING_MODEL,
             base_url=app_settings.OLLAMA_BASE_URL,
-            request_timeout=app_settings.OLLAMA_REQUEST_TIMEOUT
+            embed_batch_size=app_settings.EMBEDDING_BATCH_SIZE,
+            request_timeout=app_settings.OLLAMA_REQUEST_TIMEOUT,
+            client_kwargs={"limits": ollama_limits}
+        )
+        
+        # Worker threads used to send embedding batches concurrently
+        self._embedding_executor = ThreadPoolExecutor(
+            max_workers=app_settings.EMBEDDING_CONCURRENCY,
+            thread_name_prefix="embedding"
         )
         
         # Initialize LLM
@@ -73,7 +123,12 @@ class VectorStoreService:
             model=app_settings.OLLAMA_CHAT_MODEL,
             base_url=app_settings.OLLAMA_BASE_URL,
             request_timeout=app_settings.OLLAMA_REQUEST_TIMEOUT,
-            temperature=0.7
+            temperature=0.7,
+            async_client=AsyncClient(
+                host=app_settings.OLLAMA_BASE_URL,
+                timeout=app_settings.OLLAMA_REQUEST_TIMEOUT,
+                limits=ollama_limits
+            )
         )
         
         # Configure global settings
@@ -85,13 +140,26 @@ class VectorStoreService:
         # Initialize Prompt Template
         self._qa_template = PromptTemplate(QA_PROMPT_TEMPLATE_STR)
     
+    def _get_course_store(self, course_id: int, create: bool = False) -> Optional[BasePydanticVectorStore]:
+        """
+        Get the vector store of a course.
+        
+        Args:
+            course_id: The course ID
+            create: Whether to create the store if it does not exist yet
+            
+        Returns:
+            The course vector store, or None if the course has no store and create is False
+        """
+        return self._backend.get_store(course_id, create=create)
+    
     def index_document(
         self,
         text: str,
         course_id: int,
         file_id: int,
         filename: str
-    ) -> int:
+    ) -> IndexingResult:
         """
         Index a document by splitting it into chunks and storing in vector database.
         
@@ -102,138 +170,752 @@ class VectorStoreService:
             filename: The original filename
             
         Returns:
-            Number of chunks indexed
-        """
-        # Create document with metadata
-        document = Document(
-            text=text,
-            metadata={
-                "course_id": course_id,
-                "file_id": file_id,
-                "filename": filename
-            }
-        )
+            IndexingResult with the number of chunks indexed and throughput
+        """
+        start_time = time.perf_counter()
         
-        # Split document into chunks
-        text_splitter = SentenceSplitter(
+        nodes = split_text(
+            text,
+            course_id=course_id,
+            file_id=file_id,
+            filename=filename,
             chunk_size=app_settings.CHUNK_SIZE,
             chunk_overlap=app_settings.CHUNK_OVERLAP
         )
-        nodes = text_splitter.get_nodes_from_documents([document])
+        result = self.index_nodes(nodes, course_id)
+        result.elapsed_seconds = time.perf_counter() - start_time
+        return result
+    
+    def index_nodes(self, nodes: List[BaseNode], course_id: int) -> IndexingResult:
+        """
+        Embed chunk nodes and store them in the course store.
         
-        # Create storage context
-        storage_context = StorageContext.from_defaults(vector_store=self._vector_store)
+        Chunks are embedded in batches of EMBEDDING_BATCH_SIZE, with up to
+        EMBEDDING_CONCURRENCY batch requests in flight, and each embedded batch
+        is written to the store with a single add. Chunks whose text is
+        already in the embedding cache are not sent to the embedding model.
         
-        # Create index and insert nodes
-        index = VectorStoreIndex(
-            nodes=[],
-            storage_context=storage_context,
-            show_progress=False
+        Args:
+            nodes: The chunk nodes, as produced by text_processing.split_text
+            course_id: The course ID
+            
+        Returns:
+            IndexingResult with the number of chunks indexed and throughput
+        """
+        start_time = time.perf_counter()
+        
+        # Embed batches concurrently, writing each one as soon as it is ready
+        batch_size = app_settings.EMBEDDING_BATCH_SIZE
+        batches = [nodes[i:i + batch_size] for i in range(0, len(nodes), batch_size)]
+        cache_hits = 0
+        vector_store = self._get_course_store(course_id, create=True)
+        embed_batch = partial(self._embed_nodes, course_id=course_id)
+        for embedded_batch, batch_hits in self._embedding_executor.map(embed_batch, batches):
+            vector_store.add(embedded_batch)
+            cache_hits += batch_hits
+        
+        return IndexingResult(
+            chunks_indexed=len(nodes),
+            elapsed_seconds=time.perf_counter() - start_time,
+            cache_hits=cache_hits,
+            cache_misses=len(nodes) - cache_hits
         )
+    
+    def reindex_file(
+        self,
+        batches: Iterable[Sequence[BaseNode]],
+        course_id: int,
+        file_id: int
+    ) -> IndexingResult:
+        """
+        Bring a file's stored chunks in line with a new set of chunk nodes.
+        
+        The nodes arrive in batches, e.g. one per extracted window of the file,
+        and each batch is embedded and stored before the next one is consumed,
+        so its chunks are searchable while the rest of the file is processed.
+        Stored chunks are matched to the new nodes by their chunk_hash metadata:
+        matches are kept as they are, only unmatched nodes are embedded and
+        inserted, and stored chunks without a match are deleted after the last
+        batch. For a file with no stored chunks this is a plain index.
+        
+        Args:
+            batches: The file's chunk nodes, as produced by text_processing.split_text
+                or split_window, in one or more batches
+            course_id: The course ID
+            file_id: The file ID
+            
+        Returns:
+            IndexingResult with new, reused and removed chunk counts
+        """
+        start_time = time.perf_counter()
+        
+        # chunk_hash -> IDs of the stored chunks with that content
+        stored: Dict[str, List[str]] = {}
+        for chunk_id, chunk_hash in self._backend.file_chunks(course_id, file_id):
+            stored.setdefault(chunk_hash, []).append(chunk_id)
+        
+        result = IndexingResult(chunks_indexed=0, elapsed_seconds=0.0)
+        for nodes in batches:
+            new_nodes = []
+            for node in nodes:
+                matches = stored.get(node.metadata.get("chunk_hash"))
+                if matches:
+                    matches.pop()
+                    result.chunks_reused += 1
+                else:
+                    new_nodes.append(node)
+            if not new_nodes:
+                continue
+            
+            # Insert before deleting so the course stays answerable throughout
+            batch_result = self.index_nodes(new_nodes, course_id)
+            result.chunks_indexed += batch_result.chunks_indexed
+            result.cache_hits += batch_result.cache_hits
+            result.cache_misses += batch_result.cache_misses
+        
+        removed_ids = [chunk_id for ids in stored.values() for chunk_id in ids]
+        if removed_ids:
+            self._backend.delete_chunks(course_id, removed_ids)
+        
+        result.chunks_removed = len(removed_ids)
+        result.elapsed_seconds = time.perf_counter() - start_time
+        return result
+    
+    def _embed_nodes(self, nodes: List[BaseNode], course_id: int) -> tuple[List[BaseNode], int]:
+        """
+        Embed a batch of nodes, using cached embeddings where available.
         
-        # Insert nodes
-        for node in nodes:
-            index.insert_nodes([node])
+        Distinct cache misses are embedded with a single request and added to the cache.
+        The request waits for a background-priority embedding slot, so chat
+        queries are served first.
         
-        return len(nodes)
+        Args:
+            nodes: The nodes to embed
+            course_id: The course ID, used as the fair-queuing flow
+            
+        Returns:
+            Tuple of (the same nodes with their embeddings set, number of cache hits)
+        """
+        model_name = app_settings.OLLAMA_EMBEDDING_MODEL
+        texts = [node.get_content(metadata_mode=MetadataMode.EMBED) for node in nodes]
+        embeddings = embedding_cache.get_many(model_name, texts)
+        
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            missing_texts = list(dict.fromkeys(texts[i] for i in missing))
+            with embedding_scheduler.slot_sync(("course", course_id), Priority.BACKGROUND):
+                new_embeddings = self._embedding_model.get_text_embedding_batch(missing_texts)
+            embedding_cache.put_many(model_name, missing_texts, new_embeddings)
+            embedded = dict(zip(missing_texts, new_embeddings))
+            for i in missing:
+                embeddings[i] = embedded[texts[i]]
+        
+        for node, embedding in zip(nodes, embeddings):
+            node.embedding = embedding
+        
+        return nodes, len(nodes) - len(missing)
+    
+    def _build_index(self, course_id: int) -> Optional[VectorStoreIndex]:
+        """
+        Build an index over a course's store.
+        
+        Args:
+            course_id: The course ID
+            
+        Returns:
+            The course index, or None if the course has no materials
+        """
+        vector_store = self._get_course_store(course_id)
+        if vector_store is None:
+            return None
+        
+        return VectorStoreIndex.from_vector_store(
+            vector_store=vector_store,
+            storage_context=StorageContext.from_defaults(vector_store=vector_store),
+            embed_model=self._embedding_model
+        )
     
-    def query_course_materials(
+    def _get_retriever(self, course_id: int, top_k: int):
+        """
+        Get a retriever for a course from its cached index, building the index on first use.
+        
+        The index is cached once per course; the retriever itself is a cheap
+        wrapper carrying top_k, so any number of top_k values share one entry.
+        
+        Args:
+            course_id: The course ID
+            top_k: Number of chunks to retrieve
+            
+        Returns:
+            Retriever over the course index, or None if the course has no materials
+        """
+        index = self._indexes.get_or_create(course_id, lambda: self._build_index(course_id))
+        if index is None:
+            return None
+        return index.as_retriever(similarity_top_k=top_k)
+    
+    def invalidate_course(self, course_id: int) -> None:
+        """
+        Drop cached query objects and answers for a course after its materials change.
+        
+        Args:
+            course_id: The course ID
+        """
+        self._indexes.remove_where(lambda key: key == course_id)
+        answer_cache.invalidate(course_id)
+    
+    async def _aembed_query(
         self,
         query: str,
+        flow: Hashable,
+        timer: StageTimer = disabled_timer
+    ) -> List[float]:
+        """
+        Embed a question with the async Ollama client, reusing recent embeddings.
+        
+        Args:
+            query: The user's question
+            flow: Fair-queuing flow of the request, Flow(user_id, course_id)
+            timer: Records the query_embedding stage
+            
+        Returns:
+            The query embedding
+        """
+        model_name = app_settings.OLLAMA_EMBEDDING_MODEL
+        text = query_embedding_cache.normalize(query)
+        
+        with timer.stage("query_embedding"):
+            # The shared query cache lives in SQLite, so lookups run off the event loop
+            embedding = await asyncio.to_thread(query_embedding_cache.get, model_name, text)
+            if embedding is None:
+                async with embedding_scheduler.slot(flow):
+                    embedding = await self._embedding_model.aget_query_embedding(text)
+                await asyncio.to_thread(query_embedding_cache.put, model_name, text, embedding)
+        
+        return embedding
+    
+    async def _aretrieve(
+        self,
+        query: str,
+        embedding: List[float],
         course_id: int,
-        top_k: Optional[int] = None
-    ) -> tuple[str, int]:
+        top_k: int
+    ) -> List[NodeWithScore]:
         """
-        Query course materials using RAG pipeline.
+        Retrieve the most relevant chunks for a question without blocking the event loop.
+        
+        The vector backends are blocking, so the vector search runs in a worker thread.
         
         Args:
             query: The user's question
-            course_id: The course ID to filter by
-            top_k: Number of chunks to retrieve (default from settings)
+            embedding: The query embedding
+            course_id: The course ID
+            top_k: Number of chunks to retrieve
             
         Returns:
-            Tuple of (answer, number of retrieved chunks)
+            Retrieved chunks with similarity scores
         """
-        if top_k is None:
-            top_k = app_settings.TOP_K_RETRIEVAL
+        retriever = self._get_retriever(course_id, top_k)
+        if retriever is None:
+            return []
         
-        # Create storage context
-        storage_context = StorageContext.from_defaults(vector_store=self._vector_store)
+        return await asyncio.to_thread(
+            retriever.retrieve,
+            QueryBundle(query_str=query, embedding=embedding)
+        )
+    
+    async def _aembed_queries(
+        self,
+        queries: Sequence[str],
+        flow: Hashable,
+        priority: Priority = Priority.INTERACTIVE
+    ) -> List[List[float]]:
+        """
+        Embed several questions, sending the ones not cached in a single Ollama call.
+        
+        Args:
+            queries: The questions
+            flow: Fair-queuing flow of the request
+            priority: Scheduling priority of the embedding call
+            
+        Returns:
+            One embedding per question, in order
+        """
+        model_name = app_settings.OLLAMA_EMBEDDING_MODEL
+        texts = [query_embedding_cache.normalize(query) for query in queries]
+        
+        unique_texts = list(dict.fromkeys(texts))
+        cached = await asyncio.to_thread(query_embedding_cache.get_many, model_name, unique_texts)
+        embeddings = dict(zip(unique_texts, cached))
+        missing = [text for text, embedding in embeddings.items() if embedding is None]
+        
+        if missing:
+            # The model has no query instruction, so the normalized texts are embedded
+            # as they are, exactly like aget_query_embedding does for a single question
+            async with embedding_scheduler.slot(flow, priority):
+                computed = await self._embedding_model.aget_general_text_embeddings(missing)
+            await asyncio.to_thread(query_embedding_cache.put_many, model_name, missing, computed)
+            embeddings.update(zip(missing, computed))
+        
+        return [embeddings[text] for text in texts]
+    
+    async def search_course_materials(
+        self,
+        query: str,
+        course_id: int,
+        limit: int,
+        offset: int = 0,
+        user_id: Optional[int] = None
+    ) -> tuple[List[NodeWithScore], bool]:
+        """
+        Find the chunks most relevant to a query without generating an answer.
+        
+        Args:
+            query: The search text
+            course_id: The course ID
+            limit: Maximum number of chunks to return
+            offset: Number of best-ranked chunks to skip
+            user_id: The searching user, used for fair queuing
+            
+        Returns:
+            Tuple of (chunks ranked offset to offset + limit, whether more results follow)
+            
+        Raises:
+            SchedulerBusyError: If the embedding queue is full
+        """
+        embedding = await self._aembed_query(query, Flow(user_id, course_id))
+        
+        # One extra result tells whether there is a next page
+        nodes = await self._aretrieve(query, embedding, course_id, offset + limit + 1)
         
-        # Create index from existing vector store
-        index = VectorStoreIndex.from_vector_store(
-            vector_store=self._vector_store,
-            storage_context=storage_context
+        return nodes[offset:offset + limit], len(nodes) > offset + limit
+    
+    async def _lookup_answer(
+        self,
+        query: str,
+        course_id: int,
+        flow: Hashable,
+        timer: StageTimer = disabled_timer
+    ) -> tuple[Optional[QueryResult], Optional[List[float]]]:
+        """
+        Look up a cached answer, first by normalized text and then by embedding similarity.
+        
+        Args:
+            query: The user's question
+            course_id: The course ID
+            flow: Fair-queuing flow of the request
+            timer: Records the answer_cache and query_embedding stages
+            
+        Returns:
+            Tuple of (cached result or None, query embedding if one was computed)
+        """
+        with timer.stage("answer_cache"):
+            cached = await asyncio.to_thread(answer_cache.get_exact, course_id, query)
+        embedding = None
+        if cached is None:
+            embedding = await self._aembed_query(query, flow, timer)
+            with timer.stage("answer_cache"):
+                cached = await asyncio.to_thread(answer_cache.get_similar, course_id, embedding)
+        
+        if cached is None:
+            return None, embedding
+        
+        result = QueryResult(
+            answer=cached.answer,
+            retrieved_chunks=cached.retrieved_chunks,
+            cached=True
         )
-
-        filters = MetadataFilters(
-            filters=[MetadataFilter(key="course_id", value=course_id)]
+        return result, embedding
+    
+    async def find_cached_answer(
+        self,
+        query: str,
+        course_id: int,
+        user_id: Optional[int] = None,
+        timer: StageTimer = disabled_timer
+    ) -> Optional[QueryResult]:
+        """
+        Get a previously generated answer for this or a near-identical question.
+        
+        Args:
+            query: The user's question
+            course_id: The course ID
+            user_id: The asking user, used for fair queuing
+            timer: Records the answer_cache and query_embedding stages
+            
+        Returns:
+            The cached QueryResult, or None if the question has to be answered
+            
+        Raises:
+            SchedulerBusyError: If the embedding queue is full
+        """
+        result, _ = await self._lookup_answer(query, course_id, Flow(user_id, course_id), timer)
+        return result
+    
+    def check_generation_admission(self) -> None:
+        """
+        Fail fast if a new chat generation would be rejected right now.
+        
+        Raises:
+            SchedulerBusyError: If the generation queue is full
+        """
+        generation_scheduler.check_admission(Priority.INTERACTIVE)
+    
+    def _build_prompt(self, query: str, nodes: List[NodeWithScore]) -> AssembledContext:
+        """
+        Fill the QA prompt template with the retrieved context.
+        
+        Overlapping chunks are merged, near-duplicates dropped and the rest
+        packed up to CONTEXT_TOKEN_BUDGET tokens.
+        
+        Args:
+            query: The user's question
+            nodes: Retrieved chunks
+            
+        Returns:
+            The assembled prompt with its token counts
+        """
+        return context_assembler.assemble(
+            nodes,
+            lambda context_str: self._qa_template.format(context_str=context_str, query_str=query)
         )
-
-        query_engine = index.as_query_engine(
-            similarity_top_k=top_k,
-            filters=filters,
-            text_qa_template=self._qa_template  # Apply the custom prompt
+    
+    async def _generate_answer(
+        self,
+        query: str,
+        course_id: int,
+        top_k: int,
+        embedding: List[float],
+        flow: Hashable,
+        publish: Callable[[str], None],
+        priority: Priority = Priority.INTERACTIVE,
+        nodes: Optional[List[NodeWithScore]] = None,
+        cache_epoch: Optional[int] = None
+    ) -> QueryResult:
+        """
+        Retrieve context, stream the LLM answer and store it in the answer cache.
+        
+        The LLM call waits for a generation slot of the given priority. The
+        durations of the retrieval, prompt_assembly, generation_queue,
+        first_token and generation stages are returned in the result. The
+        answer is not cached if the course's materials changed since its
+        context was retrieved.
+        
+        Args:
+            query: The user's question
+            course_id: The course ID
+            top_k: Number of chunks to retrieve
+            embedding: The query embedding
+            flow: Fair-queuing flow of the request
+            publish: Called with each streamed piece of the answer
+            priority: Scheduling priority of the generation
+            nodes: Chunks already retrieved for the question, if any
+            cache_epoch: Answer cache epoch of the course read before nodes were
+                retrieved; required when nodes are given
+            
+        Returns:
+            QueryResult with the full answer
+        """
+        timer = stage_timer()
+        if cache_epoch is None:
+            cache_epoch = await asyncio.to_thread(answer_cache.epoch, course_id)
+        if nodes is None:
+            with timer.stage("retrieval"):
+                nodes = await self._aretrieve(query, embedding, course_id, top_k)
+        
+        with timer.stage("prompt_assembly"):
+            context = self._build_prompt(query, nodes)
+        
+        chunks = []
+        queued_at = time.perf_counter()
+        async with generation_scheduler.slot(flow, priority):
+            started_at = time.perf_counter()
+            timer.add("generation_queue", started_at - queued_at)
+            response_gen = await self._llm.astream_complete(context.prompt)
+            
+            async for response in response_gen:
+                if response.delta:
+                    if not chunks:
+                        timer.add("first_token", time.perf_counter() - started_at)
+                    chunks.append(response.delta)
+                    publish(response.delta)
+        timer.add("generation", time.perf_counter() - started_at)
+        
+        answer = "".join(chunks)
+        await asyncio.to_thread(
+            answer_cache.put, course_id, query, embedding, answer, len(nodes), cache_epoch
+        )
+        
+        return QueryResult(
+            answer=answer,
+            retrieved_chunks=len(nodes),
+            prompt_tokens_before=context.prompt_tokens_before,
+            prompt_tokens_after=context.prompt_tokens_after,
+            timings=timer.durations if timer.enabled else None
+        )
+    
+    def _join_answer(
+        self,
+        query: str,
+        course_id: int,
+        top_k: int,
+        embedding: List[float],
+        flow: Hashable,
+        priority: Priority = Priority.INTERACTIVE,
+        nodes: Optional[List[NodeWithScore]] = None,
+        cache_epoch: Optional[int] = None
+    ) -> tuple[Flight, bool]:
+        """
+        Attach to the in-flight generation for this question, starting one if needed.
+        
+        Identical concurrent questions (same course, normalized text and top_k)
+        share one retrieval and LLM generation.
+        
+        Returns:
+            Tuple of (flight, whether an existing generation was joined)
+        """
+        return chat_coalescer.join(
+            (course_id, normalize_question(query), top_k),
+            lambda publish: self._generate_answer(
+                query, course_id, top_k, embedding, flow, publish, priority, nodes, cache_epoch
+            )
         )
+    
+    async def query_course_materials(
+        self,
+        query: str,
+        course_id: int,
+        top_k: Optional[int] = None,
+        user_id: Optional[int] = None,
+        timer: StageTimer = disabled_timer
+    ) -> QueryResult:
+        """
+        Query course materials using RAG pipeline.
+        
+        Previously generated answers for the same or a near-identical question
+        are served from the answer cache without calling the LLM, and identical
+        questions asked concurrently share one generation.
         
-        # Execute query
-        response = query_engine.query(query)
+        Args:
+            query: The user's question
+            course_id: The course ID to filter by
+            top_k: Number of chunks to retrieve (default from settings)
+            user_id: The asking user, used for fair queuing
+            timer: Records the stages of this request; a coalesced request
+                gets the generation stages of the request it joined
+            
+        Returns:
+            QueryResult with the answer and number of retrieved chunks
+            
+        Raises:
+            SchedulerBusyError: If the Ollama queues are full
+        """
+        if top_k is None:
+            top_k = app_settings.TOP_K_RETRIEVAL
+        flow = Flow(user_id, course_id)
+        
+        cached, embedding = await self._lookup_answer(query, course_id, flow, timer)
+        if cached is not None:
+            return cached
+        if embedding is None:
+            embedding = await self._aembed_query(query, flow, timer)
         
-        # Count retrieved source nodes
-        retrieved_count = len(response.source_nodes) if hasattr(response, 'source_nodes') else 0
+        flight, coalesced = self._join_answer(query, course_id, top_k, embedding, flow)
+        result = await flight.result()
+        timer.merge(result.timings)
         
-        return str(response), retrieved_count
+        return replace(result, coalesced=coalesced)
     
     async def query_course_materials_streaming(
         self,
         query: str,
         course_id: int,
-        top_k: Optional[int] = None
+        top_k: Optional[int] = None,
+        user_id: Optional[int] = None,
+        timer: StageTimer = disabled_timer
     ):
         """
         Query course materials using RAG pipeline with streaming response.
         
+        The answer cache is not consulted (use find_cached_answer first), but a
+        fully streamed answer is stored in it. Identical questions asked
+        concurrently receive the same token stream from one generation.
+        
         Args:
             query: The user's question
             course_id: The course ID to filter by
             top_k: Number of chunks to retrieve (default from settings)
+            user_id: The asking user, used for fair queuing
+            timer: Records the stages of this request once the stream is complete
             
         Yields:
             Chunks of the response text
         """
         if top_k is None:
             top_k = app_settings.TOP_K_RETRIEVAL
+        flow = Flow(user_id, course_id)
         
-        # Create storage context
-        storage_context = StorageContext.from_defaults(vector_store=self._vector_store)
+        embedding = await self._aembed_query(query, flow, timer)
+        flight, _ = self._join_answer(query, course_id, top_k, embedding, flow)
+        
+        # Stream response
+        async for chunk in flight.stream():
+            yield chunk
         
-        # Create index from existing vector store
-        index = VectorStoreIndex.from_vector_store(
-            vector_store=self._vector_store,
-            storage_context=storage_context
+        result = await flight.result()
+        timer.merge(result.timings)
+    
+    async def answer_questions(
+        self,
+        queries: Sequence[str],
+        course_id: int,
+        top_k: Optional[int] = None,
+        user_id: Optional[int] = None
+    ) -> AsyncIterator[tuple[int, QueryResult | Exception]]:
+        """
+        Answer many questions about a course, yielding each result as soon as it is ready.
+        
+        Cached answers are yielded first. The remaining questions are embedded
+        in one Ollama call and retrieved with one vector store query, then their
+        answers are generated at background priority, at most
+        CHAT_BATCH_CONCURRENCY at a time, so a batch never crowds out
+        interactive chat. Repeated questions share one generation.
+        
+        Args:
+            queries: The questions
+            course_id: The course ID to filter by
+            top_k: Number of chunks to retrieve (default from settings)
+            user_id: The asking user, used for fair queuing
+            
+        Yields:
+            Tuples of (question index, QueryResult or the error it failed with)
+        """
+        if top_k is None:
+            top_k = app_settings.TOP_K_RETRIEVAL
+        flow = Flow(user_id, course_id)
+        
+        cached_answers = await asyncio.to_thread(
+            lambda: [answer_cache.get_exact(course_id, query) for query in queries]
         )
-
-        filters = MetadataFilters(
-            filters=[MetadataFilter(key="course_id", value=course_id)]
+        pending = []
+        for index, cached in enumerate(cached_answers):
+            if cached is None:
+                pending.append(index)
+            else:
+                yield index, QueryResult(
+                    answer=cached.answer,
+                    retrieved_chunks=cached.retrieved_chunks,
+                    cached=True
+                )
+        if not pending:
+            return
+        
+        try:
+            embeddings = await self._aembed_queries(
+                [queries[index] for index in pending], flow, Priority.BACKGROUND
+            )
+        except Exception as e:
+            for index in pending:
+                yield index, e
+            return
+        
+        similar_answers = await asyncio.to_thread(
+            lambda: [answer_cache.get_similar(course_id, embedding) for embedding in embeddings]
         )
-
-        query_engine = index.as_query_engine(
-            similarity_top_k=top_k,
-            filters=filters,
-            streaming=True,
-            text_qa_template=self._qa_template  # Apply the custom prompt
+        to_generate = []
+        for index, embedding, cached in zip(pending, embeddings, similar_answers):
+            if cached is None:
+                to_generate.append((index, embedding))
+            else:
+                yield index, QueryResult(
+                    answer=cached.answer,
+                    retrieved_chunks=cached.retrieved_chunks,
+                    cached=True
+                )
+        if not to_generate:
+            return
+        
+        try:
+            # Read before retrieving, so answers from materials changed meanwhile are not cached
+            cache_epoch = await asyncio.to_thread(answer_cache.epoch, course_id)
+            retrieved = await asyncio.to_thread(
+                self._backend.query_many,
+                course_id,
+                [embedding for _, embedding in to_generate],
+                top_k
+            )
+        except Exception as e:
+            for index, _ in to_generate:
+                yield index, e
+            return
+        
+        concurrency = asyncio.Semaphore(app_settings.CHAT_BATCH_CONCURRENCY)
+        
+        async def answer(index: int, embedding: List[float], nodes: List[NodeWithScore]):
+            async with concurrency:
+                try:
+                    flight, coalesced = self._join_answer(
+                        queries[index], course_id, top_k, embedding, flow,
+                        Priority.BACKGROUND, nodes, cache_epoch
+                    )
+                    result = await flight.result()
+                    return index, replace(result, coalesced=coalesced)
+                except Exception as e:
+                    return index, e
+        
+        tasks = [
+            asyncio.create_task(answer(index, embedding, nodes))
+            for (index, embedding), nodes in zip(to_generate, retrieved)
+        ]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            # Stop waiting for the rest if the client went away
+            for task in tasks:
+                task.cancel()
+    
+    async def warm_up_models(self) -> List[float]:
+        """
+        Make Ollama load the embedding and chat models with tiny requests.
+        
+        A generate request with an empty prompt loads the chat model without
+        generating anything.
+        
+        Returns:
+            The embedding of a short query, for warming up course indexes
+        """
+        embedding, _ = await asyncio.gather(
+            self._embedding_model.aget_query_embedding(WARM_UP_QUERY),
+            self._llm.async_client.generate(
+                model=app_settings.OLLAMA_CHAT_MODEL,
+                prompt="",
+                keep_alive=self._llm.keep_alive
+            )
         )
+        return embedding
+    
+    def warm_up_course(self, course_id: int, embedding: List[float]) -> bool:
+        """
+        Open a course's store and run one search so its index is loaded and cached.
         
-        # Execute query
-        response = query_engine.query(query)
+        Args:
+            course_id: The course ID
+            embedding: Query embedding to search with
         
-        # Stream response
-        for token in response.response_gen:
-            yield token
+        Returns:
+            Whether the course has a store
+        """
+        retriever = self._get_retriever(course_id, app_settings.TOP_K_RETRIEVAL)
+        if retriever is None:
+            return False
+        
+        retriever.retrieve(QueryBundle(query_str=WARM_UP_QUERY, embedding=embedding))
+        return True
     
     def delete_course_documents(self, course_id: int) -> int:
         """
-        Delete all documents associated with a course.
+        Delete all documents associated with a course by dropping its store.
         
         Args:
             course_id: The course ID
@@ -242,50 +924,34 @@ class VectorStoreService:
             Number of documents deleted
         """
         try:
-            # Query all documents for this course
-            results = self._collection.get(
-                where={"course_id": course_id}
-            )
-            
-            if results and results['ids']:
-                # Delete documents by IDs
-                self._collection.delete(ids=results['ids'])
-                return len(results['ids'])
-            
-            return 0
+            return self._backend.delete_course(course_id)
         except Exception as e:
             print(f"Error deleting course documents: {e}")
             return 0
     
-    def delete_file_documents(self, file_id: int) -> int:
+    def delete_file_documents(self, course_id: int, file_id: int) -> int:
         """
         Delete all documents associated with a file.
         
         Args:
+            course_id: The course ID the file belongs to
             file_id: The file ID
             
         Returns:
             Number of documents deleted
         """
         try:
-            # Query all documents for this file
-            results = self._collection.get(
-                where={"file_id": file_id}
-            )
-            
-            if results and results['ids']:
-                # Delete documents by IDs
-                self._collection.delete(ids=results['ids'])
-                return len(results['ids'])
-            
-            return 0
+            return self._backend.delete_file(course_id, file_id)
         except Exception as e:
             print(f"Error deleting file documents: {e}")
             return 0
     
     def get_course_document_count(self, course_id: int) -> int:
         """
-        Get the number of document chunks indexed for a course.
+        Get the number of document chunks stored for a course.
+        
+        Counts the vector store directly; the per-file chunk_count columns are
+        the cheaper source for statistics.
         
         Args:
             course_id: The course ID
@@ -294,10 +960,7 @@ class VectorStoreService:
             Number of document chunks
         """
         try:
-            results = self._collection.get(
-                where={"course_id": course_id}
-            )
-            return len(results['ids']) if results and results['ids'] else 0
+            return self._backend.count(course_id)
         except Exception:
             return 0
 
@@ -0,0 +1,148 @@
+import asyncio
+import time
+from typing import Dict, List, Optional
+from sqlalchemy.pool import QueuePool
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.repositories.file_repository import CourseMaterialFileRepository
+from app.services.lazy import preload_services, vector_store_service
+
+
+class WarmupService:
+    """
+    Startup warm-up that gates readiness.
+
+    After a deploy the first requests would otherwise pay for opening database
+    connections, building the RAG services, Ollama loading the models and the
+    vector backend loading course indexes. The warm-up does all of that in the
+    background while the application already answers /health, and /ready
+    reports 503 until it has finished.
+
+    Every step is attempted even if an earlier one fails; failures are reported
+    in the status but do not keep the application unready, so an unreachable
+    Ollama does not take down the parts of the API that do not need it.
+    """
+
+    def __init__(self, max_courses: int, timeout_seconds: float):
+        """
+        Initialize the warm-up.
+
+        Args:
+            max_courses: Number of most recently indexed courses whose indexes are loaded
+            timeout_seconds: Time allowed for Ollama to load the models
+        """
+        self._max_courses = max_courses
+        self._timeout_seconds = timeout_seconds
+        self._ready = False
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+        self._steps: Dict[str, dict] = {}
+
+    @property
+    def ready(self) -> bool:
+        """Whether the warm-up has finished."""
+        return self._ready
+
+    def mark_ready(self) -> None:
+        """Mark the application ready without warming up, when warm-up is disabled."""
+        self._ready = True
+
+    async def run(self) -> None:
+        """Run every warm-up step in order, then mark the application ready."""
+        self._started_at = time.perf_counter()
+        try:
+            await self._step("database_pool", asyncio.to_thread(self._fill_database_pool))
+            await self._step("services", asyncio.to_thread(preload_services))
+            embedding = await self._step(
+                "models",
+                asyncio.wait_for(vector_store_service.warm_up_models(), self._timeout_seconds)
+            )
+            if embedding is not None:
+                await self._step("course_indexes", asyncio.to_thread(self._load_course_indexes, embedding))
+            else:
+                self._steps["course_indexes"] = {"status": "skipped", "error": "no warm-up embedding"}
+        finally:
+            self._finished_at = time.perf_counter()
+            self._ready = True
+
+    async def _step(self, name: str, awaitable):
+        """
+        Run one warm-up step, recording its duration and outcome.
+
+        Returns:
+            The step's result, or None if it failed
+        """
+        self._steps[name] = {"status": "running"}
+        start = time.perf_counter()
+        try:
+            result = await awaitable
+        except Exception as e:
+            self._steps[name] = {
+                "status": "failed",
+                "seconds": round(time.perf_counter() - start, 3),
+                "error": str(e) or type(e).__name__
+            }
+            print(f"Warm-up step {name} failed: {e}")
+            return None
+        self._steps[name] = {"status": "done", "seconds": round(time.perf_counter() - start, 3)}
+        return result
+
+    def _fill_database_pool(self) -> int:
+        """
+        Open as many database connections as the pool keeps, then return them to it.
+
+        Returns:
+            Number of connections opened
+        """
+        size = engine.pool.size() if isinstance(engine.pool, QueuePool) else 1
+        connections = []
+        try:
+            for _ in range(size):
+                connection = engine.raw_connection()
+                connections.append(connection)
+                cursor = connection.cursor()
+                cursor.execute("SELECT 1")
+                cursor.close()
+        finally:
+            for connection in connections:
+                connection.close()
+        return len(connections)
+
+    def _load_course_indexes(self, embedding: List[float]) -> int:
+        """
+        Open the stores of the most recently indexed courses and search each once.
+
+        Returns:
+            Number of course indexes loaded
+        """
+        db = SessionLocal()
+        try:
+            course_ids = CourseMaterialFileRepository(db).get_recently_indexed_course_ids(self._max_courses)
+        finally:
+            db.close()
+
+        return sum(vector_store_service.warm_up_course(course_id, embedding) for course_id in course_ids)
+
+    def status(self) -> dict:
+        """
+        Get the readiness status and the outcome of each warm-up step.
+
+        Returns:
+            Dictionary with ready, elapsed seconds and per-step status
+        """
+        elapsed = None
+        if self._started_at is not None:
+            elapsed = round((self._finished_at or time.perf_counter()) - self._started_at, 3)
+        return {
+            "status": "ready" if self._ready else "warming_up",
+            "ready": self._ready,
+            "warmup_seconds": elapsed,
+            "steps": dict(self._steps)
+        }
+
+
+# Singleton instance
+warmup_service = WarmupService(
+    max_courses=settings.WARMUP_MAX_COURSES,
+    timeout_seconds=settings.WARMUP_TIMEOUT_SECONDS
+)
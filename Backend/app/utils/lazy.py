@@ -0,0 +1,52 @@
+import importlib
+import threading
+from typing import Any
+
+
+class LazyImport:
+    """
+    Stand-in for a module-level object that is imported on first use.
+
+    Attribute access is forwarded to the object, importing its module the
+    first time. Used for service singletons whose modules pull in heavy
+    dependencies, so importing the API does not build them.
+    """
+
+    def __init__(self, module_name: str, attribute: str):
+        """
+        Initialize the stand-in.
+
+        Args:
+            module_name: Module defining the object, e.g. "app.services.vector_store"
+            attribute: Name of the object in the module
+        """
+        self._module_name = module_name
+        self._attribute = attribute
+        self._target = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the object has been imported."""
+        return self._target is not None
+
+    def load(self) -> Any:
+        """
+        Import the object if needed.
+
+        Returns:
+            The object
+        """
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    module = importlib.import_module(self._module_name)
+                    self._target = getattr(module, self._attribute)
+        return self._target
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.load(), name)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<LazyImport {self._module_name}.{self._attribute} ({state})>"
@@ -6,8 +6,10 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from app.config import settings
-from app.database import get_db
+from app.database import SessionLocal, get_db
 from app.models.user import User, UserRole
+from app.repositories.course_repository import CourseRepository
+from app.repositories.enrollment_repository import EnrollmentRepository
 from app.schemas.user import TokenData
 
 # We keep the OAuth2 scheme to reuse the Bearer token extraction logic provided by FastAPI
@@ -66,16 +68,24 @@ def decode_access_token(token: str) -> TokenData:
         raise credentials_exception
 
 
-async def get_current_user(
+def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
 ) -> User:
-    """Get current authenticated user."""
+    """
+    Get current authenticated user.
+    
+    Declared sync so FastAPI runs the blocking user lookup in its threadpool
+    instead of on the event loop.
+    """
     # This calls our unsecured decode function
     token_data = decode_access_token(token)
     
-    # We still fetch the user from DB to ensure they exist return the ORM object
-    user = db.query(User).filter(User.id == token_data.user_id).first()
+    # We still fetch the user from DB to ensure they exist return the ORM object.
+    # The lookup uses its own short-lived session, closed right away, so the
+    # request session does not hold a pooled connection for the rest of the request.
+    with SessionLocal() as auth_db:
+        user = auth_db.query(User).filter(User.id == token_data.user_id).first()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -83,7 +93,8 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    return user
+    # Attach the loaded user to the request session without querying it again
+    return db.merge(user, load=False)
 
 
 async def get_current_teacher(current_user: User = Depends(get_current_user)) -> User:
@@ -106,6 +117,44 @@ async def get_current_student(current_user: User = Depends(get_current_user)) ->
     return current_user
 
 
+def ensure_enrolled(db: Session, user_id: int, course_id: int, action: str) -> None:
+    """
+    Check that the course exists and the user is enrolled in it.
+    
+    Blocking; run it in the threadpool. The session is closed afterwards so its
+    pooled connection is not held during the slow work that follows the check.
+    
+    Args:
+        db: The request's database session
+        user_id: The user ID
+        course_id: The course ID
+        action: What enrollment allows, completing "You must be enrolled in this course to ..."
+    
+    Raises:
+        HTTPException: If the course does not exist or the user is not enrolled
+    """
+    try:
+        course_repo = CourseRepository(db)
+        enrollment_repo = EnrollmentRepository(db)
+        
+        # Check if course exists
+        course = course_repo.get_by_id(course_id)
+        if not course:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Course not found"
+            )
+        
+        # Check if student is enrolled
+        if not enrollment_repo.is_student_enrolled(user_id, course_id):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"You must be enrolled in this course to {action}"
+            )
+    finally:
+        db.close()
+
+
 def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
     """Authenticate a user by username and password."""
     user = db.query(User).filter(User.username == username).first()
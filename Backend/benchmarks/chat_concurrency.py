@@ -0,0 +1,154 @@
+"""
+Concurrency benchmark for the /chat endpoint against a stub LLM.
+
+Boots the application in-process on a temporary SQLite database, Chroma
+directory and embedding cache, points it at the stub Ollama server, and fires
+batches of concurrent chat requests through a single event loop. With a fully
+async query path the wall time of a batch stays close to one generation,
+whereas a path that holds a threadpool slot per request serializes batches
+larger than the AnyIO threadpool (40 slots).
+
+Usage (from the Backend directory):
+    python -m benchmarks.chat_concurrency --concurrency 1,50,200,400
+"""
+import argparse
+import asyncio
+import math
+import os
+import statistics
+import tempfile
+import time
+from benchmarks.stub_ollama import StubOllamaServer, create_app
+
+ANYIO_THREADPOOL_SIZE = 40
+
+
+def configure_environment(stub_url: str, work_dir: str) -> None:
+    """Point the application settings at the stub and a scratch directory."""
+    os.environ["OLLAMA_BASE_URL"] = stub_url
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(work_dir, 'bench.db')}"
+    os.environ["CHROMA_PERSIST_DIR"] = os.path.join(work_dir, "chroma_db")
+    os.environ["UPLOAD_DIR"] = os.path.join(work_dir, "uploads")
+    os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(work_dir, "embedding_cache", "embeddings.db")
+    os.environ["ANSWER_CACHE_PATH"] = os.path.join(work_dir, "answer_cache", "answers.db")
+    os.environ["DEBUG"] = "false"
+
+
+async def wait_for_job(client, job_id: int, headers: dict) -> dict:
+    """Poll an ingestion job until it completes or fails."""
+    while True:
+        response = await client.get(f"/api/v1/files/jobs/{job_id}", headers=headers)
+        job = response.json()
+        if job["status"] in ("completed", "failed"):
+            return job
+        await asyncio.sleep(0.05)
+
+
+async def prepare_course(client) -> tuple[int, dict]:
+    """Create a teacher, a course with one material file and an enrolled student."""
+    prefix = "/api/v1"
+    
+    async def register(username: str, role: str) -> dict:
+        await client.post(f"{prefix}/auth/register", json={
+            "email": f"{username}@example.com",
+            "username": username,
+            "password": "password123",
+            "role": role
+        })
+        response = await client.post(f"{prefix}/auth/login", data={
+            "username": username,
+            "password": "password123"
+        })
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+    
+    teacher = await register("bench_teacher", "teacher")
+    student = await register("bench_student", "student")
+    
+    response = await client.post(f"{prefix}/courses/", json={"title": "Benchmark"}, headers=teacher)
+    course_id = response.json()["id"]
+    
+    with open(os.path.join("seed_content", "ml_101_nn.txt"), "rb") as f:
+        content = f.read()
+    response = await client.post(
+        f"{prefix}/files/upload/{course_id}",
+        files=[("files", ("ml_101_nn.txt", content, "text/plain"))],
+        headers=teacher
+    )
+    for job in response.json()["jobs"]:
+        await wait_for_job(client, job["id"], teacher)
+    await client.post(f"{prefix}/enrollments/", json={"course_id": course_id}, headers=student)
+    
+    return course_id, student
+
+
+async def run_level(client, course_id: int, headers: dict, concurrency: int) -> dict:
+    """Send concurrency chat requests at once and collect latencies."""
+    async def one_request(i: int) -> float:
+        start = time.perf_counter()
+        response = await client.post(
+            "/api/v1/chat/",
+            json={
+                "course_id": course_id,
+                "question": f"What is a neural network? (run {concurrency}, request {i})"
+            },
+            headers=headers
+        )
+        response.raise_for_status()
+        return time.perf_counter() - start
+    
+    start = time.perf_counter()
+    latencies = sorted(await asyncio.gather(*(one_request(i) for i in range(concurrency))))
+    wall_time = time.perf_counter() - start
+    
+    return {
+        "concurrency": concurrency,
+        "wall_time": wall_time,
+        "throughput": concurrency / wall_time,
+        "p50": statistics.median(latencies),
+        "p95": latencies[max(0, math.ceil(len(latencies) * 0.95) - 1)]
+    }
+
+
+async def main_async(levels: list[int], generation_latency: float) -> None:
+    import httpx
+    from app.database import init_db
+    import main
+    
+    init_db()
+    transport = httpx.ASGITransport(app=main.app)
+    # ASGITransport does not run the lifespan, which starts the ingestion workers
+    async with main.app.router.lifespan_context(main.app), \
+            httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        course_id, headers = await prepare_course(client)
+        
+        print(f"stub generation latency: {generation_latency:.2f}s")
+        print(f"{'concurrency':>11} {'wall(s)':>8} {'req/s':>8} {'p50(s)':>7} {'p95(s)':>7} {'threadpool-bound wall(s)':>25}")
+        for concurrency in levels:
+            result = await run_level(client, course_id, headers, concurrency)
+            serialized = math.ceil(concurrency / ANYIO_THREADPOOL_SIZE) * generation_latency
+            print(
+                f"{result['concurrency']:>11} {result['wall_time']:>8.2f} {result['throughput']:>8.1f} "
+                f"{result['p50']:>7.2f} {result['p95']:>7.2f} {serialized:>25.2f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent /chat requests against a stub LLM.")
+    parser.add_argument("--concurrency", default="1,50,200,400",
+                        help="Comma-separated numbers of concurrent requests")
+    parser.add_argument("--generation-latency", type=float, default=0.5,
+                        help="Seconds the stub LLM spends on each answer")
+    args = parser.parse_args()
+    
+    server = StubOllamaServer(create_app(generation_latency=args.generation_latency)).start()
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            configure_environment(server.url, work_dir)
+            levels = [int(level) for level in args.concurrency.split(",")]
+            asyncio.run(main_async(levels, args.generation_latency))
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Benchmark a filtered global Chroma collection against per-course collections.
+
+Builds both layouts in a temporary directory from the same synthetic,
+clustered embeddings, then runs the same queries against each one. Each
+query is restricted to a single course: the global layout uses a
+course_id where filter, and the sharded layout queries that course's own
+collection. The script reports latency percentiles and recall@k, measured
+against exact brute-force search within the course. Ollama is not needed.
+
+Usage (from the Backend directory):
+    python -m benchmarks.collection_sharding --courses 1000 --chunks 20
+"""
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+import chromadb
+import numpy as np
+from chromadb.config import Settings as ChromaSettings
+
+
+def make_corpus(courses: int, chunks: int, dimensions: int, seed: int):
+    """Create clustered, unit-normalized embeddings for every course."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(courses, dimensions)).astype(np.float32)
+    vectors = centers[:, None, :] + 0.5 * rng.normal(size=(courses, chunks, dimensions)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=2, keepdims=True)
+    return vectors
+
+
+def build_global(client, vectors, batch_size: int):
+    """Store every chunk in one collection with course_id metadata."""
+    collection = client.create_collection(name="global", metadata={"hnsw:space": "cosine"})
+    courses, chunks, _ = vectors.shape
+    ids, embeddings, metadatas = [], [], []
+    for course_id in range(courses):
+        for chunk in range(chunks):
+            ids.append(f"{course_id}-{chunk}")
+            embeddings.append(vectors[course_id, chunk])
+            metadatas.append({"course_id": course_id})
+    for start in range(0, len(ids), batch_size):
+        end = start + batch_size
+        collection.add(ids=ids[start:end], embeddings=embeddings[start:end], metadatas=metadatas[start:end])
+    return collection
+
+
+def build_sharded(client, vectors):
+    """Store each course's chunks in its own collection."""
+    collections = []
+    courses, chunks, _ = vectors.shape
+    for course_id in range(courses):
+        collection = client.create_collection(
+            name=f"course_{course_id}",
+            metadata={"hnsw:space": "cosine"}
+        )
+        collection.add(
+            ids=[f"{course_id}-{chunk}" for chunk in range(chunks)],
+            embeddings=list(vectors[course_id]),
+            metadatas=[{"course_id": course_id}] * chunks
+        )
+        collections.append(collection)
+    return collections
+
+
+def run(label: str, search, queries, truth, top_k: int) -> None:
+    """Time search over the queries and print latency and recall."""
+    samples = []
+    recalls = []
+    for (course_id, query), expected in zip(queries, truth):
+        start = time.perf_counter()
+        ids = search(course_id, query)
+        samples.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(set(ids) & expected) / top_k)
+
+    samples.sort()
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(
+        f"{label:<16} mean={statistics.mean(samples):8.3f}ms "
+        f"p50={statistics.median(samples):8.3f}ms p95={p95:8.3f}ms "
+        f"recall@{top_k}={statistics.mean(recalls):.3f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--courses", type=int, default=1000)
+    parser.add_argument("--chunks", type=int, default=20, help="Chunks per course")
+    parser.add_argument("--dimensions", type=int, default=64)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    vectors = make_corpus(args.courses, args.chunks, args.dimensions, args.seed)
+    rng = np.random.default_rng(args.seed + 1)
+    queries = []
+    truth = []
+    for _ in range(args.queries):
+        course_id = int(rng.integers(args.courses))
+        query = vectors[course_id, rng.integers(args.chunks)] + 0.3 * rng.normal(size=args.dimensions)
+        query = (query / np.linalg.norm(query)).astype(np.float32)
+        best = np.argsort(-(vectors[course_id] @ query))[:args.top_k]
+        queries.append((course_id, query))
+        truth.append({f"{course_id}-{chunk}" for chunk in best})
+
+    work_dir = tempfile.mkdtemp(prefix="chroma-sharding-")
+    try:
+        client = chromadb.PersistentClient(
+            path=work_dir,
+            settings=ChromaSettings(anonymized_telemetry=False)
+        )
+
+        start = time.perf_counter()
+        global_collection = build_global(client, vectors, client.get_max_batch_size())
+        print(f"built global collection in {time.perf_counter() - start:.1f}s")
+        start = time.perf_counter()
+        course_collections = build_sharded(client, vectors)
+        print(f"built {args.courses} course collections in {time.perf_counter() - start:.1f}s")
+
+        def search_global(course_id, query):
+            result = global_collection.query(
+                query_embeddings=[query],
+                n_results=args.top_k,
+                where={"course_id": course_id}
+            )
+            return result["ids"][0]
+
+        def search_sharded(course_id, query):
+            result = course_collections[course_id].query(
+                query_embeddings=[query],
+                n_results=args.top_k
+            )
+            return result["ids"][0]
+
+        print(
+            f"{args.courses} courses x {args.chunks} chunks, "
+            f"{args.queries} queries, dim={args.dimensions}"
+        )
+        run("filtered-global", search_global, queries, truth, args.top_k)
+        run("per-course", search_sharded, queries, truth, args.top_k)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Peak memory and time to first chunks of extracting and chunking a large PDF.
+
+Writes a synthetic PDF with the given number of text pages, then in fresh
+processes either extracts the whole text and splits it at once (the former
+pipeline) or walks it with text_processing.split_window like the ingestion
+workers do. For each it reports the peak RSS growth over the imports, the
+time until the first chunks are available, the total time, and checks that
+both produce the same chunks.
+
+Usage (from the Backend directory):
+    python -m benchmarks.extraction_memory --pages 1000
+"""
+import argparse
+import json
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import os
+
+WORDS = (
+    "gradient descent updates the weights of a neural network in the direction that "
+    "reduces the loss function while the learning rate controls the size of each step "
+    "and regularization keeps the model from overfitting the training data"
+).split()
+
+
+def pdf_escape(text: str) -> str:
+    """Escape a string for a PDF literal string."""
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: str, pages: int, lines_per_page: int = 45) -> None:
+    """Write a PDF whose pages hold pseudo-random sentences in Helvetica."""
+    rng = random.Random(0)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # The page tree, written once the page objects are numbered
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    ]
+    page_ids = []
+    for page in range(pages):
+        lines = [
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 14))).capitalize() + "."
+            for _ in range(lines_per_page)
+        ]
+        lines[0] = f"Page {page + 1}. " + lines[0]
+        content = "BT /F1 10 Tf 40 800 Td 16 TL " + " ".join(f"({pdf_escape(line)}) '" for line in lines) + " ET"
+        stream = content.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(objects))
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids).encode("ascii")
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % pages
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def worker(mode: str, path: str, window_pages: int) -> dict:
+    """Extract and chunk the PDF in this process."""
+    from app.config import settings
+    from app.services import text_processing
+
+    # Load the tokenizer and pypdf's lazily imported modules before the baseline
+    text_processing.split_text("Warm-up sentence.", 1, 1, "warmup.txt", settings.CHUNK_SIZE, settings.CHUNK_OVERLAP)
+    text_processing.PdfReader(path).pages[0].extract_text()
+
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    first_chunks = None
+    hashes = []
+
+    if mode == "whole":
+        text = text_processing.extract_text(path)
+        nodes = text_processing.split_text(text, 1, 1, "large.pdf", settings.CHUNK_SIZE, settings.CHUNK_OVERLAP)
+        first_chunks = time.perf_counter() - start
+        hashes = [node.metadata["chunk_hash"] for node in nodes]
+    else:
+        cursor = text_processing.ExtractionCursor()
+        while not cursor.done:
+            nodes, cursor, _ = text_processing.split_window(
+                path, cursor, 1, 1, "large.pdf", settings.CHUNK_SIZE, settings.CHUNK_OVERLAP,
+                window_pages, settings.EXTRACTION_WINDOW_BYTES
+            )
+            if nodes and first_chunks is None:
+                first_chunks = time.perf_counter() - start
+            hashes.extend(node.metadata["chunk_hash"] for node in nodes)
+
+    return {
+        "mode": mode,
+        "seconds": time.perf_counter() - start,
+        "first_chunks_seconds": first_chunks,
+        "peak_rss_growth_mb": peak_rss_mb() - baseline,
+        "chunks": len(hashes),
+        "hashes": hashes
+    }
+
+
+def run_worker(mode: str, path: str, window_pages: int) -> dict:
+    """Run one measurement in a fresh process."""
+    command = [
+        sys.executable, "-m", "benchmarks.extraction_memory",
+        "--worker", mode, "--path", path, "--window-pages", str(window_pages)
+    ]
+    env = dict(os.environ, DATABASE_URL=os.environ.get("DATABASE_URL", "sqlite:///:memory:"))
+    output = subprocess.run(command, capture_output=True, text=True, check=True, env=env).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare whole-file and windowed extraction of a large PDF.")
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--window-pages", type=int, default=16)
+    parser.add_argument("--worker", choices=("whole", "windowed"), help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(args.worker, args.path, args.window_pages)))
+        return
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, "large.pdf")
+        write_pdf(path, args.pages)
+        print(f"{args.pages} pages, {os.path.getsize(path) / 2 ** 20:.1f} MiB PDF, windows of {args.window_pages} pages")
+        results = [run_worker(mode, path, args.window_pages) for mode in ("whole", "windowed")]
+
+    print(f"{'mode':>9} {'total(s)':>9} {'first(s)':>9} {'peak RSS +MiB':>14} {'chunks':>7}")
+    for result in results:
+        print(
+            f"{result['mode']:>9} {result['seconds']:>9.2f} {result['first_chunks_seconds']:>9.2f} "
+            f"{result['peak_rss_growth_mb']:>14.1f} {result['chunks']:>7}"
+        )
+    same = results[0]["hashes"] == results[1]["hashes"]
+    print("identical chunks" if same else "WARNING: the windowed chunks differ from the whole-file chunks")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Import-time budget check for application startup.
+
+Imports main in fresh interpreters and fails (exit status 1) if the median
+import time exceeds the budget, or if any of the heavy RAG dependencies is
+imported before first use. The slowest imports are listed to show where the
+time goes. tests/test_import_budget.py runs the same check in the test suite,
+so startup regressions fail CI; there the budget is read from the
+IMPORT_BUDGET_MS environment variable, 0 skipping the timing check.
+
+Usage (from the Backend directory):
+    python -m benchmarks.import_budget --budget-ms 1000 --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Directory main is imported from, whatever the current directory
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_BUDGET_MS = 1000.0
+
+# Modules that must only be imported when the RAG services are first used
+HEAVY_MODULES = (
+    "llama_index.core",
+    "chromadb",
+    "ollama",
+    "pypdf",
+    "tiktoken",
+    "numpy"
+)
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "import_ms": 1000 * elapsed,
+    "heavy": [name for name in {heavy!r} if name in sys.modules]
+}}))
+"""
+
+
+def probe_environment() -> dict:
+    """Environment for the probes: a throwaway database so no server is needed."""
+    env = dict(os.environ)
+    env["DATABASE_URL"] = "sqlite:///:memory:"
+    return env
+
+
+def measure() -> dict:
+    """Import main in a fresh interpreter."""
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(heavy=HEAVY_MODULES)],
+        capture_output=True, text=True, check=True, env=probe_environment(), cwd=BACKEND_DIR
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_imports(count: int) -> list[tuple[str, float]]:
+    """Modules imported directly by main with the largest cumulative import time, from -X importtime."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        capture_output=True, text=True, check=True, env=probe_environment(), cwd=BACKEND_DIR
+    ).stderr
+    # Lines are in completion order and indented two spaces per nesting level,
+    # so main's direct imports are the depth-1 lines right before "main" itself
+    children = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        if depth == 1:
+            children.append((name.strip(), int(cumulative) / 1000))
+        elif depth == 0:
+            if name.strip() == "main":
+                return sorted(children, key=lambda item: item[1], reverse=True)[:count]
+            children = []
+    return []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if importing the application exceeds a time budget.")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="Maximum median import time of main")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters to measure")
+    args = parser.parse_args()
+
+    results = [measure() for _ in range(args.runs)]
+    median = statistics.median(result["import_ms"] for result in results)
+    heavy = sorted({name for result in results for name in result["heavy"]})
+
+    print(f"import main: median {median:.0f}ms over {args.runs} runs (budget {args.budget_ms:.0f}ms)")
+    print("slowest imports:")
+    for name, milliseconds in slowest_imports(10):
+        print(f"  {milliseconds:8.1f}ms  {name}")
+
+    failed = False
+    if median > args.budget_ms:
+        print(f"FAIL: import time {median:.0f}ms exceeds the {args.budget_ms:.0f}ms budget")
+        failed = True
+    if heavy:
+        print(f"FAIL: heavy modules imported at startup: {', '.join(heavy)}")
+        failed = True
+    if not failed:
+        print("OK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
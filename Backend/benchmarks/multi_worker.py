@@ -0,0 +1,262 @@
+"""
+Multi-worker load test with the shared vector service.
+
+Starts the stub Ollama server and one vector service process, then for each
+worker count boots uvicorn with that many API workers (VECTOR_BACKEND=remote,
+so all of them share the service) and measures throughput and latency of
+distinct requests sent by concurrent clients. The course is seeded once
+through the first deployment and reused by the later ones, which also
+checks that every worker sees the chunks indexed by another.
+
+The default endpoint, /search, is retrieval only (authentication,
+enrollment check, query embedding, vector search, serialization), so its
+throughput is bound by the API workers' CPU and should scale with the
+worker count up to the number of cores. /chat adds the stub generation.
+
+Usage (from the Backend directory):
+    python -m benchmarks.multi_worker --workers 1,2,4 --concurrency 64 --requests 2000
+    python -m benchmarks.multi_worker --endpoint chat --vector-backend numpy
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from benchmarks.chat_concurrency import configure_environment
+from benchmarks.rag_suite import PREFIX, bench_ingestion, git_commit, register, summarize
+
+
+def free_port() -> int:
+    """A TCP port that is currently free on localhost."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until(check, timeout_seconds: float, what: str) -> None:
+    """Poll check() until it returns True, or fail after the timeout."""
+    deadline = time.monotonic() + timeout_seconds
+    while not check():
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Timed out waiting for {what}")
+        time.sleep(0.1)
+
+
+def http_status(url: str) -> int | None:
+    """Status code of a GET request, or None if the server is not reachable."""
+    import httpx
+
+    try:
+        return httpx.get(url, timeout=2).status_code
+    except httpx.HTTPError:
+        return None
+
+
+def start_api(workers: int, env: dict) -> tuple[subprocess.Popen, str]:
+    """Start uvicorn with the given number of workers and wait until they are all ready."""
+    port = free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning"
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL
+    )
+    url = f"http://127.0.0.1:{port}"
+    # Requests are spread over the workers, so several ready answers in a row
+    # make it likely every worker has finished its warm-up
+    ready_in_a_row = 0
+
+    def all_ready() -> bool:
+        nonlocal ready_in_a_row
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with status {process.returncode}")
+        ready_in_a_row = ready_in_a_row + 1 if http_status(f"{url}/ready") == 200 else 0
+        return ready_in_a_row >= 4 * workers
+
+    try:
+        wait_until(all_ready, 120, f"{workers} API workers")
+    except BaseException:
+        stop_process(process)
+        raise
+    return process, url
+
+
+def stop_process(process: subprocess.Popen) -> None:
+    """Terminate a process and wait for it to exit."""
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+async def seed(url: str, ingest_copies: int) -> dict:
+    """Create a teacher, a course with the seed materials and an enrolled student."""
+    import httpx
+
+    async with httpx.AsyncClient(base_url=url, timeout=None) as client:
+        teacher = await register(client, "load_teacher", "teacher")
+        student = await register(client, "load_student", "student")
+        response = await client.post(f"{PREFIX}/courses/", json={"title": "Load test"}, headers=teacher)
+        course_id = response.json()["id"]
+        await client.post(f"{PREFIX}/enrollments/", json={"course_id": course_id}, headers=student)
+        ingestion = await bench_ingestion(client, course_id, teacher, ingest_copies)
+    return {"course_id": course_id, "student": student, "ingestion": ingestion}
+
+
+async def run_load(url: str, endpoint: str, course_id: int, student: dict, requests: int, concurrency: int, run: int) -> dict:
+    """Send distinct requests from concurrent clients and measure throughput and latency."""
+    import httpx
+
+    path = f"{PREFIX}/search/" if endpoint == "search" else f"{PREFIX}/chat/"
+    latencies = []
+    statuses: dict[int, int] = {}
+    next_request = 0
+
+    async def client_loop(client):
+        nonlocal next_request
+        while next_request < requests:
+            i = next_request
+            next_request += 1
+            # Distinct texts keep the query embedding and answer caches out of the measurement
+            text = f"How are neural networks trained? (run {run}, request {i})"
+            body = {"course_id": course_id, "query": text} if endpoint == "search" else {"course_id": course_id, "question": text}
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, json=body, headers=student)
+                status_code = response.status_code
+            except httpx.HTTPError:
+                status_code = 0
+            statuses[status_code] = statuses.get(status_code, 0) + 1
+            if status_code == 200:
+                latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=120, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        wall_time = time.perf_counter() - start
+
+    return {
+        "requests": requests,
+        "succeeded": len(latencies),
+        "errors": sum(count for code, count in statuses.items() if code != 200),
+        "wall_seconds": wall_time,
+        "throughput_rps": len(latencies) / wall_time,
+        "latency": summarize(latencies)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test several API workers sharing the vector service.")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated API worker counts")
+    parser.add_argument("--endpoint", choices=("search", "chat"), default="search")
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per worker count")
+    parser.add_argument("--concurrency", type=int, default=64, help="Concurrent clients")
+    parser.add_argument("--vector-backend", choices=("chroma", "numpy"), default="chroma",
+                        help="Backend of the vector service")
+    parser.add_argument("--ingest-copies", type=int, default=2, help="Times the seed files are uploaded")
+    parser.add_argument("--generation-latency", type=float, default=0.05, help="Stub seconds per answer")
+    parser.add_argument("--output", default=None, help="Path of the JSON report")
+    args = parser.parse_args()
+    worker_counts = [int(count) for count in args.workers.split(",")]
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        stub_port = free_port()
+        configure_environment(f"http://127.0.0.1:{stub_port}", work_dir)
+        env = dict(
+            os.environ,
+            VECTOR_BACKEND="remote",
+            VECTOR_SERVICE_BACKEND=args.vector_backend,
+            VECTOR_SERVICE_SOCKET=os.path.join(work_dir, "vector_service.sock"),
+            NUMPY_VECTOR_STORE_DIR=os.path.join(work_dir, "numpy_vector_store")
+        )
+
+        # Create the tables once, rather than racing in every worker's startup
+        subprocess.run(
+            [sys.executable, "-c", "from app.database import init_db; init_db()"],
+            env=env, check=True
+        )
+
+        processes = []
+        try:
+            processes.append(subprocess.Popen(
+                [
+                    sys.executable, "-m", "benchmarks.stub_ollama", "--port", str(stub_port),
+                    "--generation-latency", str(args.generation_latency)
+                ],
+                env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            ))
+            processes.append(subprocess.Popen(
+                [sys.executable, "-m", "app.services.vector_backends.server"],
+                env=env, stdout=subprocess.DEVNULL
+            ))
+            wait_until(lambda: http_status(f"http://127.0.0.1:{stub_port}/calls") == 200, 30, "the stub Ollama")
+            wait_until(lambda: os.path.exists(env["VECTOR_SERVICE_SOCKET"]), 60, "the vector service")
+
+            seeded = None
+            results = []
+            print(f"{'workers':>7} {'req/s':>8} {'p50(ms)':>8} {'p95(ms)':>8} {'p99(ms)':>8} {'errors':>7} {'speedup':>8}")
+            for run, workers in enumerate(worker_counts):
+                api, url = start_api(workers, env)
+                try:
+                    if seeded is None:
+                        print(f"seeding through {workers} worker(s)...")
+                        seeded = asyncio.run(seed(url, args.ingest_copies))
+                    load = asyncio.run(run_load(
+                        url, args.endpoint, seeded["course_id"], seeded["student"],
+                        args.requests, args.concurrency, run
+                    ))
+                finally:
+                    stop_process(api)
+
+                result = {"workers": workers, **load}
+                results.append(result)
+                speedup = result["throughput_rps"] / results[0]["throughput_rps"] if results[0]["throughput_rps"] else 0.0
+                latency = result["latency"]
+                print(
+                    f"{workers:>7} {result['throughput_rps']:>8.1f} {latency.get('p50_ms', 0):>8.1f} "
+                    f"{latency.get('p95_ms', 0):>8.1f} {latency.get('p99_ms', 0):>8.1f} "
+                    f"{result['errors']:>7} {speedup:>7.2f}x"
+                )
+        finally:
+            for process in reversed(processes):
+                stop_process(process)
+
+    if os.cpu_count() and max(worker_counts) > os.cpu_count():
+        print(f"\nnote: only {os.cpu_count()} CPUs, worker counts above that cannot scale")
+
+    report = {
+        "benchmark": "multi_worker",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "parameters": {
+            "endpoint": args.endpoint,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "vector_backend": args.vector_backend,
+            "generation_latency": args.generation_latency
+        },
+        "ingestion": seeded["ingestion"] if seeded else None,
+        "results": results
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
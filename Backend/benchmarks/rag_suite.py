@@ -0,0 +1,338 @@
+"""
+End-to-end RAG benchmark suite against the stub Ollama server.
+
+Boots the application with uvicorn on a temporary SQLite database, Chroma
+directory and caches, points it at the stub Ollama server and measures:
+
+- ingestion throughput: the seed_content files, uploaded several times with
+  distinct content, indexed by the ingestion workers
+- /chat latency percentiles for sequential, distinct questions
+- time to first token and total time of /chat/stream
+- /chat throughput and latency at several concurrency levels
+
+Every question is distinct so neither the answer cache nor request
+coalescing hides the generation cost. The results are printed and written
+as JSON for regression tracking.
+
+Usage (from the Backend directory):
+    python -m benchmarks.rag_suite --output rag_suite.json
+    python -m benchmarks.rag_suite --tokens-per-second 40 --concurrency 1,8,32
+"""
+import argparse
+import asyncio
+import glob
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from benchmarks.chat_concurrency import configure_environment, wait_for_job
+from benchmarks.stub_ollama import StubOllamaServer, create_app
+
+PREFIX = "/api/v1"
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(len(ordered) * q) - 1)]
+
+
+def summarize(latencies: list[float]) -> dict:
+    """Latency statistics in milliseconds."""
+    if not latencies:
+        return {"count": 0}
+    return {
+        "count": len(latencies),
+        "mean_ms": 1000 * statistics.fmean(latencies),
+        "p50_ms": 1000 * percentile(latencies, 0.50),
+        "p95_ms": 1000 * percentile(latencies, 0.95),
+        "p99_ms": 1000 * percentile(latencies, 0.99),
+        "max_ms": 1000 * max(latencies)
+    }
+
+
+def git_commit() -> str | None:
+    """Commit the benchmark ran against, if known."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def register(client, username: str, role: str) -> dict:
+    """Register and log in a user, returning the auth headers."""
+    await client.post(f"{PREFIX}/auth/register", json={
+        "email": f"{username}@example.com",
+        "username": username,
+        "password": "password123",
+        "role": role
+    })
+    response = await client.post(f"{PREFIX}/auth/login", data={
+        "username": username,
+        "password": "password123"
+    })
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def bench_ingestion(client, course_id: int, teacher: dict, copies: int) -> dict:
+    """Upload every seed file copies times and wait until all of them are indexed."""
+    paths = sorted(glob.glob(os.path.join("seed_content", "*.txt")))
+    contents = []
+    for path in paths:
+        with open(path, "rb") as f:
+            contents.append((os.path.basename(path), f.read()))
+
+    start = time.perf_counter()
+    jobs = []
+    for copy in range(copies):
+        # A distinct first line keeps copies from being served by the embedding cache
+        files = [
+            ("files", (f"{copy}_{name}", f"Revision {copy}\n".encode("utf-8") + content, "text/plain"))
+            for name, content in contents
+        ]
+        response = await client.post(f"{PREFIX}/files/upload/{course_id}", files=files, headers=teacher)
+        response.raise_for_status()
+        jobs.extend(response.json()["jobs"])
+
+    finished = await asyncio.gather(*(wait_for_job(client, job["id"], teacher) for job in jobs))
+    elapsed = time.perf_counter() - start
+
+    chunks = sum(job["chunks_indexed"] + job["chunks_reused"] for job in finished)
+    size = sum(len(content) for _, content in contents) * copies
+    return {
+        "files": len(finished),
+        "failed_files": sum(job["status"] == "failed" for job in finished),
+        "chunks": chunks,
+        "bytes": size,
+        "elapsed_seconds": elapsed,
+        "files_per_second": len(finished) / elapsed,
+        "chunks_per_second": chunks / elapsed,
+        "embedding_cache_hits": sum(job["embedding_cache_hits"] for job in finished),
+        "embedding_cache_misses": sum(job["embedding_cache_misses"] for job in finished)
+    }
+
+
+async def ask(client, course_id: int, student: dict, question: str) -> tuple[float, int]:
+    """Send one /chat request, returning its latency and status code."""
+    start = time.perf_counter()
+    response = await client.post(
+        f"{PREFIX}/chat/",
+        json={"course_id": course_id, "question": question},
+        headers=student
+    )
+    return time.perf_counter() - start, response.status_code
+
+
+async def bench_chat_latency(client, course_id: int, student: dict, requests: int) -> dict:
+    """Sequential /chat requests with distinct questions."""
+    latencies = []
+    for i in range(requests):
+        latency, status_code = await ask(
+            client, course_id, student, f"What is a neural network? (latency run, question {i})"
+        )
+        if status_code == 200:
+            latencies.append(latency)
+    return summarize(latencies)
+
+
+async def bench_stream(client, course_id: int, student: dict, requests: int) -> dict:
+    """Sequential /chat/stream requests, timing the first token and the full answer."""
+    first_token = []
+    total = []
+    for i in range(requests):
+        start = time.perf_counter()
+        async with client.stream(
+            "POST",
+            f"{PREFIX}/chat/stream",
+            json={"course_id": course_id, "question": f"What is a neural network? (stream run, question {i})"},
+            headers=student
+        ) as response:
+            if response.status_code != 200:
+                continue
+            seen_first = False
+            async for chunk in response.aiter_raw():
+                if chunk and not seen_first:
+                    first_token.append(time.perf_counter() - start)
+                    seen_first = True
+        total.append(time.perf_counter() - start)
+    return {"time_to_first_token": summarize(first_token), "total": summarize(total)}
+
+
+async def bench_throughput(client, course_id: int, student: dict, concurrency: int, rounds: int) -> dict:
+    """concurrency clients each sending rounds /chat requests back to back."""
+    latencies = []
+    statuses: dict[int, int] = {}
+
+    async def worker(worker_id: int):
+        for round_number in range(rounds):
+            latency, status_code = await ask(
+                client, course_id, student,
+                f"What is a neural network? (concurrency {concurrency}, client {worker_id}, round {round_number})"
+            )
+            statuses[status_code] = statuses.get(status_code, 0) + 1
+            if status_code == 200:
+                latencies.append(latency)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    wall_time = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": concurrency * rounds,
+        "succeeded": len(latencies),
+        "rejected": statuses.get(429, 0),
+        "errors": sum(count for code, count in statuses.items() if code not in (200, 429)),
+        "wall_seconds": wall_time,
+        "throughput_rps": len(latencies) / wall_time,
+        "latency": summarize(latencies)
+    }
+
+
+async def run_suite(app_url: str, args) -> dict:
+    import httpx
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=app_url, timeout=None, limits=limits) as client:
+        # Measure the warmed-up application, not the startup warm-up
+        while (await client.get("/ready")).status_code != 200:
+            await asyncio.sleep(0.1)
+        teacher = await register(client, "bench_teacher", "teacher")
+        student = await register(client, "bench_student", "student")
+        response = await client.post(f"{PREFIX}/courses/", json={"title": "Benchmark"}, headers=teacher)
+        course_id = response.json()["id"]
+        await client.post(f"{PREFIX}/enrollments/", json={"course_id": course_id}, headers=student)
+
+        print("ingestion...")
+        ingestion = await bench_ingestion(client, course_id, teacher, args.ingest_copies)
+        print("chat latency...")
+        chat_latency = await bench_chat_latency(client, course_id, student, args.requests)
+        print("streaming...")
+        stream = await bench_stream(client, course_id, student, args.requests)
+        throughput = []
+        for level in args.concurrency:
+            print(f"throughput at concurrency {level}...")
+            throughput.append(await bench_throughput(client, course_id, student, level, args.rounds))
+
+        metrics = (await client.get(f"{PREFIX}/metrics/")).json()
+
+    return {
+        "ingestion": ingestion,
+        "chat_latency": chat_latency,
+        "chat_stream": stream,
+        "throughput": throughput,
+        "server_metrics": metrics
+    }
+
+
+def print_report(report: dict) -> None:
+    ingestion = report["ingestion"]
+    print()
+    print(
+        f"ingestion: {ingestion['files']} files, {ingestion['chunks']} chunks in "
+        f"{ingestion['elapsed_seconds']:.2f}s ({ingestion['chunks_per_second']:.1f} chunks/s)"
+    )
+
+    def line(name: str, stats: dict) -> str:
+        if not stats["count"]:
+            return f"{name:<24} no successful requests"
+        return (
+            f"{name:<24} p50 {stats['p50_ms']:8.1f}ms  p95 {stats['p95_ms']:8.1f}ms  "
+            f"p99 {stats['p99_ms']:8.1f}ms"
+        )
+
+    print(line("chat latency", report["chat_latency"]))
+    print(line("stream first token", report["chat_stream"]["time_to_first_token"]))
+    print(line("stream total", report["chat_stream"]["total"]))
+    print(f"{'concurrency':>11} {'req/s':>8} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9} {'rejected':>9} {'errors':>7}")
+    for level in report["throughput"]:
+        latency = level["latency"]
+        print(
+            f"{level['concurrency']:>11} {level['throughput_rps']:>8.1f} "
+            f"{latency.get('p50_ms', 0.0):>9.1f} {latency.get('p95_ms', 0.0):>9.1f} "
+            f"{latency.get('p99_ms', 0.0):>9.1f} {level['rejected']:>9} {level['errors']:>7}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end RAG benchmark suite against a stub Ollama.")
+    parser.add_argument("--output", default=None, help="Path of the JSON report")
+    parser.add_argument("--ingest-copies", type=int, default=2,
+                        help="How many times each seed file is uploaded")
+    parser.add_argument("--requests", type=int, default=30,
+                        help="Sequential requests for the latency and streaming runs")
+    parser.add_argument("--concurrency", default="1,4,16,64",
+                        help="Comma-separated concurrency levels for the throughput runs")
+    parser.add_argument("--rounds", type=int, default=3,
+                        help="Requests each concurrent client sends in the throughput runs")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--first-token-latency", type=float, default=0.05)
+    parser.add_argument("--answer-words", type=int, default=40)
+    parser.add_argument("--embedding-latency", type=float, default=0.01)
+    parser.add_argument("--embedding-latency-per-text", type=float, default=0.001)
+    args = parser.parse_args()
+    args.concurrency = [int(level) for level in args.concurrency.split(",")]
+
+    stub_config = {
+        "tokens_per_second": args.tokens_per_second,
+        "first_token_latency": args.first_token_latency,
+        "answer_words": args.answer_words,
+        "embedding_latency": args.embedding_latency,
+        "embedding_latency_per_text": args.embedding_latency_per_text
+    }
+    stub = StubOllamaServer(create_app(**stub_config)).start()
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            configure_environment(stub.url, work_dir)
+            from app.config import settings
+            from app.database import init_db
+            import main as application
+
+            init_db()
+            server = StubOllamaServer(application.app).start()
+            try:
+                results = asyncio.run(run_suite(server.url, args))
+            finally:
+                server.stop()
+    finally:
+        stub.stop()
+
+    report = {
+        "benchmark": "rag_suite",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "stub": dict(stub_config, calls=stub.app.state.calls),
+        "settings": {
+            "chunk_size": settings.CHUNK_SIZE,
+            "top_k": settings.TOP_K_RETRIEVAL,
+            "ingestion_workers": settings.INGESTION_WORKERS,
+            "max_concurrent_generations": settings.OLLAMA_MAX_CONCURRENT_GENERATIONS,
+            "max_queued_generations": settings.OLLAMA_MAX_QUEUED_GENERATIONS
+        },
+        "parameters": {
+            "ingest_copies": args.ingest_copies,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "rounds": args.rounds
+        },
+        **results
+    }
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nreport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Microbenchmark for per-request retrieval setup.
+
+Compares rebuilding the storage context, index, filters and query engine on
+every chat request (the original behaviour) with fetching the cached
+per-course retriever from VectorStoreService. Only setup is timed and no
+query is executed, but the first engine build asks Ollama for the chat
+model's context window, so OLLAMA_BASE_URL must be reachable.
+
+Usage (from the Backend directory):
+    python -m benchmarks.retriever_cache --iterations 200
+"""
+import argparse
+import statistics
+import time
+from llama_index.core import StorageContext, VectorStoreIndex
+from app.config import settings
+from app.services.vector_store import vector_store_service
+
+
+def build_uncached(course_id: int, top_k: int):
+    """Replicate the per-request setup done before engines were cached."""
+    vector_store = vector_store_service._get_course_store(course_id, create=True)
+    storage_context = StorageContext.from_defaults(vector_store=vector_store)
+    index = VectorStoreIndex.from_vector_store(
+        vector_store=vector_store,
+        storage_context=storage_context
+    )
+    return index.as_query_engine(
+        similarity_top_k=top_k,
+        text_qa_template=vector_store_service._qa_template
+    )
+
+
+def get_cached(course_id: int, top_k: int):
+    """Fetch the retriever through the service cache."""
+    return vector_store_service._get_retriever(course_id, top_k)
+
+
+def measure(label: str, factory, iterations: int, course_ids: list[int]) -> None:
+    """Time factory over the given courses and print latency percentiles."""
+    samples = []
+    for i in range(iterations):
+        course_id = course_ids[i % len(course_ids)]
+        start = time.perf_counter()
+        factory(course_id, settings.TOP_K_RETRIEVAL)
+        samples.append((time.perf_counter() - start) * 1000)
+    
+    samples.sort()
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(
+        f"{label:<10} mean={statistics.mean(samples):8.3f}ms "
+        f"p50={statistics.median(samples):8.3f}ms p95={p95:8.3f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--courses", type=int, default=10)
+    args = parser.parse_args()
+    
+    course_ids = list(range(1, args.courses + 1))
+    measure("uncached", build_uncached, args.iterations, course_ids)
+    measure("cached", get_cached, args.iterations, course_ids)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Minimal stand-in for the Ollama HTTP API, for benchmarks.
+
+Implements the endpoints the backend calls (/api/embed, /api/chat,
+/api/generate and /api/show) with configurable latency and token rate and
+deterministic embeddings, so RAG performance can be measured without a GPU
+or real models. GET /calls reports how many requests each endpoint served.
+
+Can also be run on its own to serve a real backend process:
+    python -m benchmarks.stub_ollama --port 11434 --tokens-per-second 40
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import socket
+import threading
+import time
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+STUB_ANSWER = "According to the course materials, this is a generated stub answer."
+
+
+def deterministic_embedding(text: str, dimensions: int) -> list[float]:
+    """Derive a stable pseudo-random unit vector from the text."""
+    values = []
+    counter = 0
+    while len(values) < dimensions:
+        digest = hashlib.sha256(f"{counter}:{text}".encode("utf-8")).digest()
+        values.extend(byte / 127.5 - 1.0 for byte in digest)
+        counter += 1
+    values = values[:dimensions]
+    norm = sum(value * value for value in values) ** 0.5 or 1.0
+    return [value / norm for value in values]
+
+
+def create_app(
+    generation_latency: float = 0.5,
+    embedding_latency: float = 0.01,
+    dimensions: int = 256,
+    tokens_per_second: float | None = None,
+    first_token_latency: float = 0.0,
+    answer_words: int | None = None,
+    embedding_latency_per_text: float = 0.0
+) -> FastAPI:
+    """
+    Build the stub application.
+    
+    Args:
+        generation_latency: Seconds spent producing each answer when tokens_per_second is not set
+        embedding_latency: Seconds spent per embedding request
+        dimensions: Embedding vector size
+        tokens_per_second: Rate at which answer tokens (words) are streamed
+        first_token_latency: Seconds before the first answer token, like prompt processing
+        answer_words: Length of each answer in words (default: the stub sentence)
+        embedding_latency_per_text: Extra seconds per input text of an embedding request
+    """
+    app = FastAPI()
+    app.state.calls = {"embed": 0, "chat": 0, "generate": 0}
+    
+    words = STUB_ANSWER.split(" ")
+    if answer_words is not None:
+        words = [words[i % len(words)] for i in range(answer_words)]
+    answer = " ".join(words)
+    token_delay = 1 / tokens_per_second if tokens_per_second else generation_latency / len(words)
+    
+    async def stream_words(message):
+        """Yield NDJSON lines of the answer at the configured pace."""
+        await asyncio.sleep(first_token_latency)
+        for i, word in enumerate(words):
+            await asyncio.sleep(token_delay)
+            content = word if i == 0 else " " + word
+            yield json.dumps(message(content, done=False)) + "\n"
+        yield json.dumps(message("", done=True)) + "\n"
+    
+    def stats(payload: dict, prompt: str) -> dict:
+        payload["done_reason"] = "stop"
+        payload["prompt_eval_count"] = len(prompt.split())
+        payload["eval_count"] = len(words)
+        return payload
+    
+    @app.get("/calls")
+    async def calls():
+        return app.state.calls
+    
+    @app.post("/api/embed")
+    async def embed(request: Request):
+        body = await request.json()
+        app.state.calls["embed"] += 1
+        inputs = body["input"]
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        await asyncio.sleep(embedding_latency + embedding_latency_per_text * len(inputs))
+        return {
+            "model": body["model"],
+            "embeddings": [deterministic_embedding(text, dimensions) for text in inputs]
+        }
+    
+    @app.post("/api/show")
+    async def show(request: Request):
+        return {
+            "modelfile": "",
+            "parameters": "",
+            "template": "",
+            "details": {"format": "gguf", "family": "stub"},
+            "model_info": {"general.architecture": "stub", "stub.context_length": 32768},
+            "modified_at": "2024-01-01T00:00:00Z"
+        }
+    
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        body = await request.json()
+        app.state.calls["chat"] += 1
+        prompt = " ".join(message.get("content", "") for message in body.get("messages", []))
+        
+        def message(content: str, done: bool) -> dict:
+            payload = {
+                "model": body["model"],
+                "created_at": "2024-01-01T00:00:00Z",
+                "message": {"role": "assistant", "content": content},
+                "done": done
+            }
+            return stats(payload, prompt) if done else payload
+        
+        if not body.get("stream", True):
+            await asyncio.sleep(first_token_latency + token_delay * len(words))
+            return message(answer, done=True)
+        
+        return StreamingResponse(stream_words(message), media_type="application/x-ndjson")
+    
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        body = await request.json()
+        app.state.calls["generate"] += 1
+        prompt = body.get("prompt", "")
+        
+        def message(content: str, done: bool) -> dict:
+            payload = {
+                "model": body["model"],
+                "created_at": "2024-01-01T00:00:00Z",
+                "response": content,
+                "done": done
+            }
+            return stats(payload, prompt) if done else payload
+        
+        if not body.get("stream", True):
+            await asyncio.sleep(first_token_latency + token_delay * len(words))
+            return message(answer, done=True)
+        
+        return StreamingResponse(stream_words(message), media_type="application/x-ndjson")
+    
+    return app
+
+
+class StubOllamaServer:
+    """Runs an application, usually the stub, with uvicorn in a background thread."""
+    
+    def __init__(self, app: FastAPI, port: int = 0):
+        if port == 0:
+            with socket.socket() as sock:
+                sock.bind(("127.0.0.1", 0))
+                port = sock.getsockname()[1]
+        self.app = app
+        self.url = f"http://127.0.0.1:{port}"
+        self._server = uvicorn.Server(
+            uvicorn.Config(
+                app,
+                host="127.0.0.1",
+                port=port,
+                log_level="warning",
+                timeout_keep_alive=120
+            )
+        )
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+    
+    def start(self) -> "StubOllamaServer":
+        """Start serving and wait until the socket accepts connections."""
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+    
+    def stop(self) -> None:
+        """Stop serving."""
+        self._server.should_exit = True
+        self._thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a stub Ollama API.")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--generation-latency", type=float, default=0.5,
+                        help="Seconds spent on each answer when --tokens-per-second is not set")
+    parser.add_argument("--tokens-per-second", type=float, default=None)
+    parser.add_argument("--first-token-latency", type=float, default=0.0)
+    parser.add_argument("--answer-words", type=int, default=None)
+    parser.add_argument("--embedding-latency", type=float, default=0.01)
+    parser.add_argument("--embedding-latency-per-text", type=float, default=0.0)
+    parser.add_argument("--dimensions", type=int, default=256)
+    args = parser.parse_args()
+    
+    app = create_app(
+        generation_latency=args.generation_latency,
+        embedding_latency=args.embedding_latency,
+        dimensions=args.dimensions,
+        tokens_per_second=args.tokens_per_second,
+        first_token_latency=args.first_token_latency,
+        answer_words=args.answer_words,
+        embedding_latency_per_text=args.embedding_latency_per_text
+    )
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning", timeout_keep_alive=120)
+
+
+if __name__ == "__main__":
+    main()
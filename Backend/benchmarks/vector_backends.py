@@ -0,0 +1,195 @@
+"""
+Compare the Chroma and NumPy vector backends.
+
+For each corpus size, synthetic chunks with random unit embeddings are
+written to a fresh store of each backend. Every measurement runs in its own
+process so peak RSS and cold start are not skewed by the other backend:
+
+- build: time to add all chunks in batches, and peak RSS
+- cold start: time to import the backend, open the store and return the
+  first query in a new process
+- query latency: p50/p95 of single queries through the llama_index
+  interface, and the time of one query_many call for all queries
+- recall@k of each backend against exact search (the NumPy backend is exact,
+  Chroma's HNSW index is approximate)
+
+Usage (from the Backend directory):
+    python -m benchmarks.vector_backends --chunks 2000,20000 --output vector_backends.json
+"""
+import argparse
+import json
+import math
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKENDS = ("chroma", "numpy")
+COURSE_ID = 1
+CHUNK_TEXT = (
+    "Gradient descent updates the weights of a model in the direction that reduces the loss. "
+    "The learning rate controls the size of each step. "
+) * 6
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def open_backend(name: str, work_dir: str):
+    """Create a backend storing its data under work_dir."""
+    if name == "chroma":
+        from app.services.vector_backends.chroma import ChromaBackend
+        return ChromaBackend(os.path.join(work_dir, "chroma"))
+    from app.services.vector_backends.numpy_flat import NumpyBackend
+    return NumpyBackend(os.path.join(work_dir, "numpy"))
+
+
+def corpus(chunks: int, dimensions: int):
+    """Deterministic unit embeddings for the corpus and the queries."""
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(chunks, dimensions)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    # Queries are noisy copies of stored chunks, like questions about a passage
+    picks = rng.integers(0, chunks, size=1000)
+    queries = vectors[picks] + 0.5 * rng.normal(size=(1000, dimensions)).astype(np.float32) / math.sqrt(dimensions)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return vectors, queries
+
+
+def worker_build(args) -> dict:
+    """Add the synthetic corpus to a new store."""
+    from llama_index.core.schema import TextNode
+
+    vectors, _ = corpus(args.chunks, args.dimensions)
+    backend = open_backend(args.backend, args.work_dir)
+    store = backend.get_store(COURSE_ID, create=True)
+
+    start = time.perf_counter()
+    batch_size = 256
+    for first in range(0, args.chunks, batch_size):
+        store.add([
+            TextNode(
+                id_=f"chunk-{i}",
+                text=CHUNK_TEXT,
+                metadata={"course_id": COURSE_ID, "file_id": i // 20, "filename": f"file_{i // 20}.txt", "chunk_hash": str(i)},
+                embedding=vectors[i].tolist()
+            )
+            for i in range(first, min(first + batch_size, args.chunks))
+        ])
+    return {"build_seconds": time.perf_counter() - start, "build_peak_rss_mb": peak_rss_mb()}
+
+
+def worker_query(args) -> dict:
+    """Open the store built by worker_build and time searches."""
+    _, queries = corpus(args.chunks, args.dimensions)
+    queries = queries[:args.queries]
+
+    # Cold start: importing the backend, opening the store and the first search
+    start = time.perf_counter()
+    from llama_index.core.vector_stores.types import VectorStoreQuery
+    backend = open_backend(args.backend, args.work_dir)
+    store = backend.get_store(COURSE_ID)
+    store.query(VectorStoreQuery(query_embedding=queries[0].tolist(), similarity_top_k=args.top_k))
+    cold_start = time.perf_counter() - start
+
+    latencies = []
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        result = store.query(VectorStoreQuery(query_embedding=query.tolist(), similarity_top_k=args.top_k))
+        latencies.append(time.perf_counter() - start)
+        results.append(result.ids)
+
+    start = time.perf_counter()
+    backend.query_many(COURSE_ID, [query.tolist() for query in queries], args.top_k)
+    batch_seconds = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "cold_start_seconds": cold_start,
+        "query_p50_ms": 1000 * statistics.median(latencies),
+        "query_p95_ms": 1000 * latencies[max(0, math.ceil(len(latencies) * 0.95) - 1)],
+        "query_many_ms": 1000 * batch_seconds,
+        "query_peak_rss_mb": peak_rss_mb(),
+        "ids": results
+    }
+
+
+def exact_ids(chunks: int, dimensions: int, count: int, top_k: int) -> list[list[str]]:
+    """IDs of the true top_k chunks of each query."""
+    import numpy as np
+
+    vectors, queries = corpus(chunks, dimensions)
+    scores = vectors @ queries[:count].T
+    top = np.argsort(-scores, axis=0)[:top_k].T
+    return [[f"chunk-{i}" for i in row] for row in top]
+
+
+def run_worker(mode: str, backend: str, work_dir: str, args) -> dict:
+    """Run a build or query measurement in a fresh process."""
+    command = [
+        sys.executable, "-m", "benchmarks.vector_backends",
+        "--worker", mode, "--backend", backend, "--work-dir", work_dir,
+        "--chunks", str(args.chunks), "--dimensions", str(args.dimensions),
+        "--queries", str(args.queries), "--top-k", str(args.top_k)
+    ]
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the Chroma and NumPy vector backends.")
+    parser.add_argument("--chunks", default="2000,20000", help="Comma-separated corpus sizes")
+    parser.add_argument("--dimensions", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--output", default=None, help="Path of the JSON report")
+    parser.add_argument("--worker", choices=("build", "query"), help=argparse.SUPPRESS)
+    parser.add_argument("--backend", choices=BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument("--work-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        args.chunks = int(args.chunks)
+        result = worker_build(args) if args.worker == "build" else worker_query(args)
+        print(json.dumps(result))
+        return
+
+    report = {"dimensions": args.dimensions, "queries": args.queries, "top_k": args.top_k, "results": []}
+    print(f"{'chunks':>7} {'backend':>7} {'build(s)':>9} {'cold(s)':>8} {'p50(ms)':>8} {'p95(ms)':>8} "
+          f"{'batch(ms)':>10} {'rss(MiB)':>9} {'recall':>7}")
+    for chunks in [int(size) for size in args.chunks.split(",")]:
+        run_args = argparse.Namespace(**{**vars(args), "chunks": chunks})
+        expected = exact_ids(chunks, args.dimensions, args.queries, args.top_k)
+        for backend in BACKENDS:
+            with tempfile.TemporaryDirectory() as work_dir:
+                build = run_worker("build", backend, work_dir, run_args)
+                query = run_worker("query", backend, work_dir, run_args)
+
+            ids = query.pop("ids")
+            recall = statistics.fmean(
+                len(set(found) & set(wanted)) / len(wanted) for found, wanted in zip(ids, expected)
+            )
+            result = {"chunks": chunks, "backend": backend, **build, **query, "recall_at_k": recall}
+            report["results"].append(result)
+            print(
+                f"{chunks:>7} {backend:>7} {result['build_seconds']:>9.2f} {result['cold_start_seconds']:>8.2f} "
+                f"{result['query_p50_ms']:>8.2f} {result['query_p95_ms']:>8.2f} {result['query_many_ms']:>10.1f} "
+                f"{result['query_peak_rss_mb']:>9.0f} {recall:>7.3f}"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nreport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,11 @@
-from fastapi import FastAPI
+import asyncio
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.config import settings
 from app.database import init_db
-from app.api import auth, users, courses, enrollments, files, chat
+from app.services.warmup import warmup_service
+from app.api import auth, users, courses, enrollments, files, chat, metrics, search
 
 
 @asynccontextmanager
@@ -14,14 +16,43 @@ async def lifespan(app: FastAPI):
     init_db()
     print("Database initialized successfully!")
     
-    print("Initializing vector store...")
-    from app.services.vector_store import vector_store_service
-    print("Vector store initialized successfully!")
+    # Warm up in the background so /health answers while models and indexes load
+    from app.services.lazy import file_service
+    warmup = None
+    if settings.WARMUP_ENABLED:
+        print("Warming up services, models and course indexes in the background...")
+        warmup = asyncio.create_task(warmup_service.run())
+        warmup.add_done_callback(_report_warmup)
+    else:
+        warmup_service.mark_ready()
+    
+    print("Starting ingestion workers...")
+    from app.services.ingestion_queue import ingestion_queue
+    resumed = await ingestion_queue.start()
+    print(f"Ingestion workers started ({resumed} pending jobs)")
     
     yield
     
     # Shutdown
     print("Shutting down application...")
+    await ingestion_queue.stop()
+    if warmup is not None:
+        warmup.cancel()
+        await asyncio.gather(warmup, return_exceptions=True)
+    if file_service.loaded:
+        file_service.shutdown()
+
+
+def _report_warmup(task: asyncio.Task) -> None:
+    """Log the outcome of the startup warm-up."""
+    if task.cancelled():
+        return
+    status = warmup_service.status()
+    failed = [name for name, step in status["steps"].items() if step["status"] != "done"]
+    if failed:
+        print(f"Warm-up finished in {status['warmup_seconds']:.2f}s with incomplete steps: {', '.join(failed)}")
+    else:
+        print(f"Warm-up finished successfully in {status['warmup_seconds']:.2f}s!")
 
 
 app = FastAPI(
@@ -47,6 +78,8 @@ app.include_router(courses.router, prefix=settings.API_V1_PREFIX)
 app.include_router(enrollments.router, prefix=settings.API_V1_PREFIX)
 app.include_router(files.router, prefix=settings.API_V1_PREFIX)
 app.include_router(chat.router, prefix=settings.API_V1_PREFIX)
+app.include_router(search.router, prefix=settings.API_V1_PREFIX)
+app.include_router(metrics.router, prefix=settings.API_V1_PREFIX)
 
 
 @app.get("/")
@@ -66,6 +99,15 @@ def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/ready")
+def readiness_check(response: Response):
+    """Readiness endpoint: 503 until the startup warm-up has finished."""
+    status = warmup_service.status()
+    if not status["ready"]:
+        response.status_code = 503
+    return status
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -0,0 +1,93 @@
+"""
+Split the legacy global Chroma collection into one collection per course.
+
+Chunks are copied with their stored embeddings, so nothing is re-embedded.
+Re-running the script is safe: chunks are upserted by ID. Pass --drop-source
+to delete the global collection once every chunk has been copied.
+
+Usage (from the Backend directory):
+    python migrate_course_collections.py [--batch-size 1000] [--drop-source]
+"""
+import argparse
+from collections import defaultdict
+import chromadb
+from chromadb.config import Settings as ChromaSettings
+from app.config import settings
+from app.services.vector_backends.chroma import course_collection_name
+
+
+def migrate(batch_size: int, drop_source: bool) -> None:
+    client = chromadb.PersistentClient(
+        path=settings.CHROMA_PERSIST_DIR,
+        settings=ChromaSettings(anonymized_telemetry=False, allow_reset=True)
+    )
+
+    try:
+        source = client.get_collection(name=settings.CHROMA_COLLECTION_NAME)
+    except Exception:
+        print(f"No collection named '{settings.CHROMA_COLLECTION_NAME}', nothing to migrate.")
+        return
+
+    total = source.count()
+    print(f"Migrating {total} chunks from '{settings.CHROMA_COLLECTION_NAME}'...")
+
+    targets = {}
+    per_course = defaultdict(int)
+    skipped = 0
+    offset = 0
+    while offset < total:
+        page = source.get(
+            limit=batch_size,
+            offset=offset,
+            include=["embeddings", "documents", "metadatas"]
+        )
+        offset += batch_size
+        if not page["ids"]:
+            break
+
+        # Group the page by course so each target collection gets one upsert
+        groups = defaultdict(lambda: {"ids": [], "embeddings": [], "documents": [], "metadatas": []})
+        for i, chunk_id in enumerate(page["ids"]):
+            metadata = page["metadatas"][i] or {}
+            course_id = metadata.get("course_id")
+            if course_id is None:
+                skipped += 1
+                continue
+            group = groups[int(course_id)]
+            group["ids"].append(chunk_id)
+            group["embeddings"].append(page["embeddings"][i])
+            group["documents"].append(page["documents"][i])
+            group["metadatas"].append(metadata)
+
+        for course_id, group in groups.items():
+            if course_id not in targets:
+                targets[course_id] = client.get_or_create_collection(
+                    name=course_collection_name(course_id),
+                    metadata={"hnsw:space": "cosine"}
+                )
+            targets[course_id].upsert(**group)
+            per_course[course_id] += len(group["ids"])
+
+        print(f"  {min(offset, total)}/{total}")
+
+    for course_id in sorted(per_course):
+        print(f"  course {course_id}: {per_course[course_id]} chunks")
+    if skipped:
+        print(f"Skipped {skipped} chunks without a course_id.")
+
+    if drop_source:
+        if skipped:
+            print("Keeping the source collection because some chunks were not migrated.")
+        else:
+            client.delete_collection(name=settings.CHROMA_COLLECTION_NAME)
+            print(f"Dropped '{settings.CHROMA_COLLECTION_NAME}'.")
+
+    print(f"Migrated {sum(per_course.values())} chunks into {len(per_course)} course collections.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Split the global Chroma collection per course")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--drop-source", action="store_true")
+    args = parser.parse_args()
+    migrate(args.batch_size, args.drop_source)
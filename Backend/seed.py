@@ -163,16 +163,20 @@ async def seed_data_async():
                 try:
                     # Use the service to process, save, and index
                     print(f"  Indexing {filename} for course {course.id}...")
-                    file_path, unique_filename, file_size, chunks = await file_service.process_and_index_file(  
+                    file_path, unique_filename, file_size, indexing_result = await file_service.process_and_index_file(  
                         file=upload_file,
                         course_id=course.id,
                         file_id=db_file.id
                     )
                     
+                    print(f"    {indexing_result.chunks_indexed} chunks at {indexing_result.chunks_per_second:.1f} chunks/sec")
+
                     # Update DB record
                     db_file.filename = unique_filename
                     db_file.file_path = file_path
                     db_file.file_size = file_size
+                    db_file.chunk_count = indexing_result.chunks_indexed + indexing_result.chunks_reused
+                    db_file.indexed_at = datetime.utcnow()
                     db.commit()
                 except Exception as e:
                     print(f"  Error processing {filename}: {e}")
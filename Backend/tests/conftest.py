@@ -0,0 +1,62 @@
+"""
+Fixtures running the application against the stub Ollama server.
+
+The settings are read when the application is first imported, so the
+environment points at the stub and a scratch directory before any test
+module is collected.
+"""
+import os
+import shutil
+import tempfile
+import pytest
+from benchmarks.stub_ollama import StubOllamaServer, create_app
+from tests.helpers import API_PREFIX, register
+
+
+def configure_environment(ollama_url: str, work_dir: str) -> None:
+    """Point the settings at the stub Ollama and keep every file the application writes in work_dir."""
+    os.environ["OLLAMA_BASE_URL"] = ollama_url
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(work_dir, 'tests.db')}"
+    os.environ["UPLOAD_DIR"] = os.path.join(work_dir, "uploads")
+    os.environ["CHROMA_PERSIST_DIR"] = os.path.join(work_dir, "chroma_db")
+    os.environ["NUMPY_VECTOR_STORE_DIR"] = os.path.join(work_dir, "numpy_vector_store")
+    os.environ["VECTOR_SERVICE_SOCKET"] = os.path.join(work_dir, "vector_service.sock")
+    os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(work_dir, "embedding_cache", "embeddings.db")
+    os.environ["ANSWER_CACHE_PATH"] = os.path.join(work_dir, "answer_cache", "answers.db")
+    os.environ["DEBUG"] = "false"
+
+
+WORK_DIR = tempfile.mkdtemp(prefix="backend-tests-")
+stub_ollama = StubOllamaServer(create_app(generation_latency=0.0))
+configure_environment(stub_ollama.url, WORK_DIR)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def client():
+    """A TestClient of the application, served by the stub Ollama."""
+    from fastapi.testclient import TestClient
+    import main
+
+    stub_ollama.start()
+    try:
+        with TestClient(main.app) as test_client:
+            yield test_client
+    finally:
+        stub_ollama.stop()
+
+
+@pytest.fixture(scope="session")
+def teacher(client) -> dict:
+    """Authorization headers of a teacher."""
+    return register(client, "test_teacher", "teacher")
+
+
+@pytest.fixture
+def course_id(client, teacher) -> int:
+    """A new course of the teacher."""
+    response = client.post(f"{API_PREFIX}/courses/", json={"title": "Test course"}, headers=teacher)
+    return response.json()["id"]
@@ -0,0 +1,26 @@
+"""Helpers for tests calling the API through the client fixture."""
+import time
+
+API_PREFIX = "/api/v1"
+
+
+def register(client, username: str, role: str) -> dict:
+    """Register and log in a user, returning the authorization headers."""
+    client.post(f"{API_PREFIX}/auth/register", json={
+        "email": f"{username}@example.com",
+        "username": username,
+        "password": "password123",
+        "role": role
+    })
+    response = client.post(f"{API_PREFIX}/auth/login", data={"username": username, "password": "password123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def wait_for_job(client, job_id: int, headers: dict, timeout_seconds: float = 60) -> dict:
+    """Poll an ingestion job until it completes or fails."""
+    deadline = time.monotonic() + timeout_seconds
+    while True:
+        job = client.get(f"{API_PREFIX}/files/jobs/{job_id}", headers=headers).json()
+        if job["status"] in ("completed", "failed") or time.monotonic() > deadline:
+            return job
+        time.sleep(0.05)
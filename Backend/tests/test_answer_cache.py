@@ -0,0 +1,80 @@
+import pytest
+from app.services.answer_cache import AnswerCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AnswerCache(
+        path=str(tmp_path / "answers.db"),
+        max_entries_per_course=10,
+        ttl_seconds=3600,
+        similarity_threshold=0.95,
+        embedding_model="embedder"
+    )
+
+
+def test_put_stores_answer_of_current_epoch(cache):
+    epoch = cache.epoch(1)
+    assert cache.put(1, "What is a layer?", [1.0, 0.0], "A layer is...", 3, epoch)
+
+    cached = cache.get_exact(1, "what is a layer")
+    assert cached is not None and cached.answer == "A layer is..."
+    assert cache.get_similar(1, [0.99, 0.01]) is not None
+
+
+def test_put_skips_answer_generated_across_an_invalidation(cache):
+    # A generation reads the epoch, then the materials change before it finishes
+    epoch = cache.epoch(1)
+    cache.invalidate(1)
+
+    assert not cache.put(1, "What is a layer?", [1.0, 0.0], "Outdated answer", 3, epoch)
+    assert cache.get_exact(1, "What is a layer?") is None
+    assert cache.stats()["stale_puts"] == 1
+
+    # Other courses are unaffected
+    assert cache.put(2, "What is a layer?", None, "Other course", 1, cache.epoch(2))
+
+
+def test_epoch_is_shared_through_the_database(cache, tmp_path):
+    other_process = AnswerCache(
+        path=str(tmp_path / "answers.db"),
+        max_entries_per_course=10,
+        ttl_seconds=3600,
+        similarity_threshold=0.95,
+        embedding_model="embedder"
+    )
+    epoch = cache.epoch(1)
+    other_process.invalidate(1)
+
+    assert not cache.put(1, "What is a layer?", None, "Outdated answer", 3, epoch)
+
+
+def test_similar_lookups_ignore_embeddings_of_another_model(cache, tmp_path):
+    cache.put(1, "What is a layer?", [1.0, 0.0, 0.0], "A layer is...", 3, cache.epoch(1))
+
+    # The embedding model changed, and with it the number of dimensions
+    new_model = AnswerCache(
+        path=str(tmp_path / "answers.db"),
+        max_entries_per_course=10,
+        ttl_seconds=3600,
+        similarity_threshold=0.95,
+        embedding_model="bigger-embedder"
+    )
+    assert new_model.get_similar(1, [1.0, 0.0]) is None
+    assert new_model.put(1, "What is a loss?", [0.0, 1.0], "A loss is...", 2, new_model.epoch(1))
+    assert new_model.get_similar(1, [0.0, 1.0]).answer == "A loss is..."
+
+    # Exact matches do not depend on the embeddings
+    assert new_model.get_exact(1, "What is a layer?").answer == "A layer is..."
+
+
+def test_expired_entries_do_not_shadow_a_live_similar_one(cache, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("app.services.answer_cache.time.time", lambda: clock[0])
+    cache.put(1, "What is a layer?", [1.0, 0.0], "Old answer", 3, cache.epoch(1))
+    clock[0] += 3000
+    cache.put(1, "What's a layer?", [0.98, 0.02], "Recent answer", 3, cache.epoch(1))
+    clock[0] += 1000
+
+    # The expired entry is the closer one, but the live one must be found
+    assert cache.get_similar(1, [1.0, 0.0]).answer == "Recent answer"
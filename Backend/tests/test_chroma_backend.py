@@ -0,0 +1,16 @@
+from llama_index.core.schema import TextNode
+from app.services.vector_backends.chroma import ChromaBackend
+
+
+def test_delete_file_reports_the_number_of_deleted_chunks(tmp_path):
+    backend = ChromaBackend(str(tmp_path / "chroma"))
+    backend.get_store(1, create=True).add([
+        TextNode(id_=f"chunk-{number}", text=f"Chunk {number}", embedding=[1.0, float(number)],
+                 metadata={"file_id": number % 2})
+        for number in range(5)
+    ])
+
+    assert backend.delete_file(1, 0) == 3
+    assert backend.count(1) == 2
+    assert backend.delete_file(1, 0) == 0
+    assert backend.delete_file(2, 0) == 0
@@ -0,0 +1,38 @@
+from app.services.embedding_cache import EmbeddingCache, QueryEmbeddingCache
+
+
+def test_eviction_runs_in_batches_down_to_the_low_water_mark(tmp_path):
+    cache = EmbeddingCache(path=str(tmp_path / "embeddings.db"), max_entries=10)
+
+    for number in range(10):
+        cache.put_many("model", [f"chunk {number}"], [[float(number)]])
+    assert cache.stats()["evictions"] == 0
+
+    cache.put_many("model", ["chunk 10"], [[10.0]])
+    stats = cache.stats()
+    assert stats["entries"] == 9
+    assert stats["evictions"] == 2
+
+    # The least recently used chunks went first
+    assert cache.get_many("model", ["chunk 0", "chunk 1", "chunk 10"]) == [None, None, [10.0]]
+
+
+def test_entry_count_survives_reopening(tmp_path):
+    path = str(tmp_path / "embeddings.db")
+    cache = EmbeddingCache(path=path, max_entries=10)
+    cache.put_many("model", [f"chunk {number}" for number in range(10)], [[0.0]] * 10)
+
+    reopened = EmbeddingCache(path=path, max_entries=10)
+    reopened.put_many("model", ["one more"], [[1.0]])
+    assert reopened.stats()["entries"] == 9
+
+
+def test_query_embeddings_are_shared_through_the_persistent_cache(tmp_path):
+    shared = EmbeddingCache(path=str(tmp_path / "embeddings.db"), max_entries=10)
+    worker = QueryEmbeddingCache(max_size=10, shared=shared)
+    worker.put_many("model", ["what is a layer", "what is a loss"], [[1.0], [2.0]])
+
+    other_worker = QueryEmbeddingCache(max_size=10, shared=shared)
+    assert other_worker.get_many("model", ["what is a loss", "unknown"]) == [[2.0], None]
+    # Query entries stay apart from document chunks with the same text
+    assert shared.get_many("model", ["what is a loss"]) == [None]
@@ -0,0 +1,56 @@
+from tests.helpers import API_PREFIX, wait_for_job
+
+PARAGRAPHS = [
+    f"Lecture {number}. Gradient descent updates the weights of a neural network in the "
+    f"direction that reduces the loss, and the learning rate of lecture {number} controls "
+    f"the size of each step while regularization keeps the model from overfitting."
+    for number in range(60)
+]
+
+
+def upload(client, course_id: int, headers: dict, filename: str, text: str) -> dict:
+    """Upload a text file and wait for its ingestion job."""
+    response = client.post(
+        f"{API_PREFIX}/files/upload/{course_id}",
+        files=[("files", (filename, text.encode("utf-8"), "text/plain"))],
+        headers=headers
+    )
+    assert response.status_code == 202
+    body = response.json()
+    job = wait_for_job(client, body["jobs"][0]["id"], headers)
+    assert job["status"] == "completed"
+    return {"file": body["uploaded_files"][0], "job": job}
+
+
+def test_replace_under_another_filename_reuses_unchanged_chunks(client, teacher, course_id):
+    text = "\n\n".join(PARAGRAPHS)
+    uploaded = upload(client, course_id, teacher, "lecture.txt", text)
+    chunk_count = uploaded["job"]["chunks_indexed"]
+    assert chunk_count > 2
+
+    # Same text with one more paragraph, under a new name: only the last chunk changes
+    response = client.put(
+        f"{API_PREFIX}/files/{uploaded['file']['id']}",
+        files={"file": ("lecture-v2.txt", (text + "\n\nOne more closing paragraph.").encode("utf-8"), "text/plain")},
+        headers=teacher
+    )
+    assert response.status_code == 202
+    assert response.json()["file"]["original_filename"] == "lecture-v2.txt"
+
+    job = wait_for_job(client, response.json()["job"]["id"], teacher)
+    assert job["status"] == "completed"
+    assert job["chunks_reused"] >= chunk_count - 1
+    assert job["chunks_indexed"] <= 1
+    assert job["chunks_removed"] <= 1
+
+
+def test_replace_with_identical_content_is_unchanged(client, teacher, course_id):
+    uploaded = upload(client, course_id, teacher, "notes.txt", "\n\n".join(PARAGRAPHS[:5]))
+
+    response = client.put(
+        f"{API_PREFIX}/files/{uploaded['file']['id']}",
+        files={"file": ("renamed.txt", "\n\n".join(PARAGRAPHS[:5]).encode("utf-8"), "text/plain")},
+        headers=teacher
+    )
+    assert response.status_code == 200
+    assert response.json()["unchanged"] is True
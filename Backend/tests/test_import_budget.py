@@ -0,0 +1,26 @@
+import os
+import statistics
+import pytest
+from benchmarks.import_budget import DEFAULT_BUDGET_MS, measure
+
+RUNS = 3
+
+
+def test_heavy_modules_are_not_imported_at_startup():
+    heavy = measure()["heavy"]
+    assert heavy == [], f"heavy modules imported at startup: {', '.join(heavy)}"
+
+
+def test_cold_import_of_main_is_within_budget():
+    # Wall-clock times depend on the machine; slow CI runners can raise the
+    # budget with IMPORT_BUDGET_MS, or set it to 0 to skip this check
+    budget_ms = float(os.environ.get("IMPORT_BUDGET_MS", DEFAULT_BUDGET_MS))
+    if budget_ms <= 0:
+        pytest.skip("IMPORT_BUDGET_MS is 0")
+
+    results = [measure() for _ in range(RUNS)]
+    median = statistics.median(result["import_ms"] for result in results)
+    assert median <= budget_ms, (
+        f"import main took {median:.0f}ms (median of {RUNS}), over the {budget_ms:.0f}ms budget; "
+        "run python -m benchmarks.import_budget to see the slowest imports"
+    )
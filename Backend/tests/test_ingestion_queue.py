@@ -0,0 +1,34 @@
+import asyncio
+import pytest
+from app.services.ingestion_queue import IngestionQueue
+
+
+@pytest.mark.asyncio
+async def test_jobs_of_a_course_are_limited_and_idle_courses_are_forgotten(client):
+    queue = IngestionQueue(workers=3, max_jobs_per_course=1, max_attempts=1, retry_delay_seconds=0)
+    running = {}
+    most_running = {}
+
+    async def run_job(job_id):
+        course_id = job_id // 100
+        running[course_id] = running.get(course_id, 0) + 1
+        most_running[course_id] = max(most_running.get(course_id, 0), running[course_id])
+        await asyncio.sleep(0.01)
+        running[course_id] -= 1
+        return None
+
+    queue._run_job = run_job
+    await queue.start()
+    try:
+        for job_id in (101, 102, 103, 201, 301):
+            queue.enqueue(job_id, job_id // 100)
+
+        for _ in range(500):
+            stats = queue.stats()
+            if stats["queued"] == 0 and stats["running"] == 0 and stats["active_courses"] == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert most_running == {1: 1, 2: 1, 3: 1}
+        assert queue.stats()["active_courses"] == 0
+    finally:
+        await queue.stop()
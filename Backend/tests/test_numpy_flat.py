@@ -0,0 +1,134 @@
+import os
+import pytest
+from llama_index.core.schema import TextNode
+from llama_index.core.vector_stores.types import (
+    FilterOperator,
+    MetadataFilter,
+    MetadataFilters,
+    VectorStoreQuery
+)
+from app.services.vector_backends.numpy_flat import NumpyCourseStore
+
+
+def make_node(number: int, file_id: int, embedding: list) -> TextNode:
+    return TextNode(
+        id_=f"chunk-{number}",
+        text=f"Chunk {number} of file {file_id}",
+        embedding=embedding,
+        metadata={"course_id": 1, "file_id": file_id, "chunk_hash": f"hash-{number}"}
+    )
+
+
+def file_filter(file_id: int, operator: FilterOperator = FilterOperator.EQ) -> MetadataFilters:
+    return MetadataFilters(filters=[MetadataFilter(key="file_id", value=file_id, operator=operator)])
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = NumpyCourseStore(str(tmp_path / "course_1"))
+    store.add([
+        make_node(0, 1, [1.0, 0.0, 0.0]),
+        make_node(1, 1, [0.9, 0.1, 0.0]),
+        make_node(2, 1, [0.8, 0.2, 0.0]),
+        make_node(3, 1, [0.7, 0.3, 0.0]),
+        make_node(4, 2, [0.0, 1.0, 0.0]),
+        make_node(5, 2, [0.0, 0.0, 1.0])
+    ])
+    yield store
+    store.close()
+
+
+def test_query_returns_nearest_chunks_with_their_text(store):
+    results = store.query_many([[1.0, 0.0, 0.0]], top_k=2)[0]
+
+    assert [result.node.node_id for result in results] == ["chunk-0", "chunk-1"]
+    assert results[0].node.get_content() == "Chunk 0 of file 1"
+    assert results[0].node.metadata["file_id"] == 1
+
+
+def test_filters_match_on_file_id(store):
+    result = store.query(VectorStoreQuery(
+        query_embedding=[1.0, 0.0, 0.0],
+        similarity_top_k=10,
+        filters=file_filter(2)
+    ))
+    assert sorted(result.ids) == ["chunk-4", "chunk-5"]
+
+    store.delete_nodes(filters=file_filter(2, FilterOperator.NE))
+    assert store.file_chunks(1) == []
+    assert store.count() == 2
+
+
+def test_filters_on_other_keys_are_rejected(store):
+    filters = MetadataFilters(filters=[MetadataFilter(key="filename", value="notes.txt")])
+    with pytest.raises(ValueError):
+        store.query(VectorStoreQuery(query_embedding=[1.0, 0.0, 0.0], similarity_top_k=1, filters=filters))
+
+
+def test_deleting_most_rows_compacts_into_a_new_generation(store, monkeypatch, tmp_path):
+    monkeypatch.setattr(NumpyCourseStore, "COMPACT_MIN_DELETED", 2)
+
+    assert store.delete_file(1) == 4
+
+    files = sorted(os.listdir(tmp_path / "course_1"))
+    assert files == ["chunks.1.jsonl", "meta.json", "vectors.1.f32"]
+    assert os.path.getsize(tmp_path / "course_1" / "vectors.1.f32") == 2 * 3 * 4
+    results = store.query_many([[0.0, 1.0, 0.0]], top_k=10)[0]
+    assert [result.node.node_id for result in results] == ["chunk-4", "chunk-5"]
+    assert results[0].node.get_content() == "Chunk 4 of file 2"
+
+
+def test_rows_written_after_a_delete_survive_reopening(store, monkeypatch, tmp_path):
+    monkeypatch.setattr(NumpyCourseStore, "COMPACT_MIN_DELETED", 2)
+    store.delete_file(1)
+
+    # Re-add one chunk of the deleted file and replace a live one
+    store.add([make_node(0, 1, [1.0, 0.0, 0.0]), make_node(5, 2, [0.0, 0.5, 0.5])])
+    store.close()
+
+    reopened = NumpyCourseStore(str(tmp_path / "course_1"))
+    assert reopened.count() == 3
+    assert reopened.file_chunks(1) == [("chunk-0", "hash-0")]
+    results = reopened.query_many([[0.0, 0.5, 0.5]], top_k=1)[0]
+    assert results[0].node.node_id == "chunk-5"
+    assert results[0].score == pytest.approx(1.0)
+    reopened.close()
+
+
+def test_recovers_from_a_crash_in_the_middle_of_an_append(store, tmp_path):
+    store.delete_nodes(["chunk-3"])
+    store.close()
+    path = tmp_path / "course_1"
+
+    # The vectors of the next batch were written, its chunk records only partly
+    with open(path / "vectors.0.f32", "ab") as f:
+        f.write(b"\x00" * 4 * 3 * 2)
+    with open(path / "chunks.0.jsonl", "ab") as f:
+        f.write(b'{"id": "chunk-6", "text": "Chunk 6')
+
+    reopened = NumpyCourseStore(str(path))
+    assert reopened.count() == 5
+    assert os.path.getsize(path / "vectors.0.f32") == 6 * 3 * 4
+    assert "chunk-3" not in [chunk_id for chunk_id, _ in reopened.file_chunks(1)]
+
+    # Appending continues after the last complete row
+    reopened.add([make_node(6, 2, [0.0, 0.0, 1.0])])
+    reopened.close()
+    reopened = NumpyCourseStore(str(path))
+    results = reopened.query_many([[0.0, 0.0, 1.0]], top_k=2)[0]
+    assert sorted(result.node.node_id for result in results) == ["chunk-5", "chunk-6"]
+    assert "Chunk 6 of file 2" in [result.node.get_content() for result in results]
+    reopened.close()
+
+
+def test_a_compaction_interrupted_before_switching_generations_is_ignored(store, tmp_path):
+    store.close()
+    path = tmp_path / "course_1"
+
+    # Files of a generation that meta.json never switched to
+    (path / "vectors.1.f32").write_bytes(b"\x00" * 7)
+    (path / "chunks.1.jsonl").write_bytes(b'{"id": "partial')
+
+    reopened = NumpyCourseStore(str(path))
+    assert reopened.count() == 6
+    reopened.close()
@@ -0,0 +1,127 @@
+import asyncio
+import pytest
+import app.services.vector_store as vector_store_module
+from app.services.ollama_scheduler import FairScheduler, Flow, Priority, SchedulerBusyError
+from tests.helpers import API_PREFIX, register
+
+
+async def run_queued(scheduler: FairScheduler, requests) -> list:
+    """Queue requests behind a held slot, release it, and return the order they were served in."""
+    served = []
+
+    async def request(name, flow, priority):
+        async with scheduler.slot(flow, priority):
+            served.append(name)
+
+    async with scheduler.slot("blocker"):
+        tasks = []
+        for name, flow, priority in requests:
+            tasks.append(asyncio.create_task(request(name, flow, priority)))
+            # Let the request queue up before the next one
+            await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    return served
+
+
+@pytest.mark.asyncio
+async def test_users_share_slots_fairly_whatever_their_number_of_courses():
+    scheduler = FairScheduler("test", max_concurrency=1, max_queue_depth=10)
+    served = await run_queued(scheduler, [
+        ("a1", Flow(1, 10), Priority.INTERACTIVE),
+        ("a2", Flow(1, 10), Priority.INTERACTIVE),
+        ("a3", Flow(1, 11), Priority.INTERACTIVE),
+        ("a4", Flow(1, 12), Priority.INTERACTIVE),
+        ("b1", Flow(2, 10), Priority.INTERACTIVE)
+    ])
+
+    # User 2 is served second although user 1 queued in three courses,
+    # and user 1 rotates between its courses
+    assert served == ["a1", "b1", "a3", "a4", "a2"]
+
+
+@pytest.mark.asyncio
+async def test_interactive_requests_are_served_before_background_work():
+    scheduler = FairScheduler("test", max_concurrency=1, max_queue_depth=10)
+    served = await run_queued(scheduler, [
+        ("ingest1", ("course", 10), Priority.BACKGROUND),
+        ("ingest2", ("course", 10), Priority.BACKGROUND),
+        ("chat", Flow(1, 10), Priority.INTERACTIVE)
+    ])
+
+    assert served == ["chat", "ingest1", "ingest2"]
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_interactive_requests_but_queues_background_work():
+    scheduler = FairScheduler("test", max_concurrency=1, max_queue_depth=2)
+
+    async def wait_for_slot(flow, priority=Priority.INTERACTIVE):
+        async with scheduler.slot(flow, priority):
+            pass
+
+    async with scheduler.slot("blocker"):
+        waiting = [asyncio.create_task(wait_for_slot(Flow(user_id, 10))) for user_id in (1, 2)]
+        await asyncio.sleep(0)
+
+        with pytest.raises(SchedulerBusyError) as busy:
+            await wait_for_slot(Flow(3, 10))
+        assert busy.value.retry_after >= 1
+        with pytest.raises(SchedulerBusyError):
+            scheduler.check_admission()
+
+        waiting.append(asyncio.create_task(wait_for_slot(("course", 10), Priority.BACKGROUND)))
+        await asyncio.sleep(0)
+        assert scheduler.stats()["waiting"] == 3
+
+    await asyncio.gather(*waiting)
+    stats = scheduler.stats()
+    assert stats["rejected"] == 2
+    assert stats["active"] == 0 and stats["waiting"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiters_leave_the_queue():
+    scheduler = FairScheduler("test", max_concurrency=1, max_queue_depth=1)
+
+    async def wait_for_slot(flow):
+        async with scheduler.slot(flow):
+            pass
+
+    async with scheduler.slot("blocker"):
+        waiter = asyncio.create_task(wait_for_slot(Flow(1, 10)))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        # The freed queue place can be taken again
+        other = asyncio.create_task(wait_for_slot(Flow(2, 10)))
+        await asyncio.sleep(0)
+    await other
+    assert scheduler.stats()["waiting"] == 0
+
+
+def test_busy_generation_queue_answers_429_with_retry_after(client, teacher, course_id, monkeypatch):
+    student = register(client, "busy_student", "student")
+    client.post(f"{API_PREFIX}/enrollments/", json={"course_id": course_id}, headers=student)
+
+    # A generation queue with no room left, whose only slot is taken
+    busy = FairScheduler("generation", max_concurrency=1, max_queue_depth=0)
+    monkeypatch.setattr(vector_store_module, "generation_scheduler", busy)
+
+    with busy.slot_sync("another request"):
+        for path in ("/chat/", "/chat/stream"):
+            response = client.post(
+                f"{API_PREFIX}{path}",
+                json={"course_id": course_id, "question": f"Uncached question for {path}?"},
+                headers=student
+            )
+            assert response.status_code == 429
+            assert int(response.headers["Retry-After"]) >= 1
+
+    response = client.post(
+        f"{API_PREFIX}/chat/",
+        json={"course_id": course_id, "question": "Uncached question for /chat/?"},
+        headers=student
+    )
+    assert response.status_code == 200
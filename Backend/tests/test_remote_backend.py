@@ -0,0 +1,130 @@
+import shutil
+import socket
+import tempfile
+import threading
+import pytest
+from llama_index.core.schema import TextNode
+from llama_index.core.vector_stores.types import MetadataFilter, MetadataFilters, VectorStoreQuery
+from app.services.vector_backends.numpy_flat import NumpyBackend
+from app.services.vector_backends.remote import RemoteBackend
+from app.services.vector_backends.server import VectorServer
+
+
+@pytest.fixture
+def socket_dir():
+    # Unix socket paths are limited to about 100 characters, too short for tmp_path
+    path = tempfile.mkdtemp(prefix="vs-")
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+
+class StoppableServer(VectorServer):
+    """VectorServer whose connections are closed when it stops, like when its process exits."""
+
+    def __init__(self, socket_path: str, backend):
+        super().__init__(socket_path, backend)
+        self.connections = []
+
+    def process_request(self, request, client_address):
+        self.connections.append(request)
+        super().process_request(request, client_address)
+
+
+def start_server(socket_path: str, store_dir: str) -> StoppableServer:
+    server = StoppableServer(socket_path, NumpyBackend(store_dir))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def stop_server(server: StoppableServer) -> None:
+    server.shutdown()
+    server.server_close()
+    for connection in server.connections:
+        try:
+            connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+def make_node(number: int, file_id: int, embedding: list) -> TextNode:
+    return TextNode(
+        id_=f"chunk-{number}",
+        text=f"Chunk {number} of file {file_id}",
+        embedding=embedding,
+        metadata={"course_id": 7, "file_id": file_id, "chunk_hash": f"hash-{number}"}
+    )
+
+
+def test_operations_round_trip_through_the_service(socket_dir):
+    socket_path = f"{socket_dir}/vectors.sock"
+    server = start_server(socket_path, f"{socket_dir}/store")
+    backend = RemoteBackend(socket_path, max_connections=2, timeout_seconds=5)
+    try:
+        backend.ping()
+        store = backend.get_store(7, create=True)
+        assert store.add([
+            make_node(0, 1, [1.0, 0.0]),
+            make_node(1, 1, [0.8, 0.2]),
+            make_node(2, 2, [0.0, 1.0])
+        ]) == ["chunk-0", "chunk-1", "chunk-2"]
+
+        assert backend.count(7) == 3
+        assert backend.file_chunks(7, 1) == [("chunk-0", "hash-0"), ("chunk-1", "hash-1")]
+
+        results = backend.query_many(7, [[1.0, 0.0], [0.0, 1.0]], top_k=1)
+        assert [[hit.node.node_id for hit in hits] for hits in results] == [["chunk-0"], ["chunk-2"]]
+        assert results[0][0].node.get_content() == "Chunk 0 of file 1"
+        assert results[0][0].node.metadata["file_id"] == 1
+        assert results[0][0].score == pytest.approx(1.0)
+
+        file_2 = MetadataFilters(filters=[MetadataFilter(key="file_id", value=2)])
+        result = store.query(VectorStoreQuery(query_embedding=[1.0, 0.0], similarity_top_k=3, filters=file_2))
+        assert result.ids == ["chunk-2"]
+
+        store.delete_nodes(filters=file_2)
+        assert backend.count(7) == 2
+        assert backend.delete_file(7, 1) == 2
+        assert backend.query_many(7, [[1.0, 0.0]], top_k=3) == [[]]
+
+        store.add([make_node(3, 3, [1.0, 1.0])])
+        assert backend.delete_course(7) == 1
+        assert backend.count(7) == 0
+    finally:
+        backend._pool.close()
+        stop_server(server)
+
+
+def test_requests_reconnect_to_a_restarted_service(socket_dir):
+    socket_path = f"{socket_dir}/vectors.sock"
+    server = start_server(socket_path, f"{socket_dir}/store")
+    backend = RemoteBackend(socket_path, max_connections=1, timeout_seconds=5)
+    try:
+        backend.get_store(7, create=True).add([make_node(0, 1, [1.0, 0.0])])
+        stop_server(server)
+
+        # The pooled connection was closed by the stopped service
+        server = start_server(socket_path, f"{socket_dir}/store")
+        assert backend.count(7) == 1
+        assert len(server.connections) == 1
+    finally:
+        backend._pool.close()
+        stop_server(server)
+
+
+def test_timeouts_are_not_retried(socket_dir):
+    socket_path = f"{socket_dir}/silent.sock"
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(4)
+    backend = RemoteBackend(socket_path, max_connections=1, timeout_seconds=0.2)
+    try:
+        # A service that accepts requests but never answers
+        with pytest.raises(TimeoutError):
+            backend.count(7)
+
+        listener.settimeout(0.5)
+        listener.accept()[0].close()
+        with pytest.raises(socket.timeout):
+            listener.accept()
+    finally:
+        listener.close()
@@ -0,0 +1,95 @@
+import asyncio
+import pytest
+from app.services.request_coalescer import RequestCoalescer
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_requests_share_one_computation():
+    coalescer = RequestCoalescer()
+    calls = []
+    release = asyncio.Event()
+
+    async def compute(publish):
+        calls.append(1)
+        publish("Gradient ")
+        await release.wait()
+        publish("descent")
+        return "Gradient descent"
+
+    joined = [coalescer.join("question", compute) for _ in range(10)]
+    assert [coalesced for _, coalesced in joined] == [False] + [True] * 9
+    assert len({id(flight) for flight, _ in joined}) == 1
+
+    async def read(flight):
+        return "".join([chunk async for chunk in flight.stream()])
+
+    readers = [asyncio.create_task(read(flight)) for flight, _ in joined]
+    await asyncio.sleep(0)
+    release.set()
+    assert await asyncio.gather(*readers) == ["Gradient descent"] * 10
+    assert await joined[0][0].result() == "Gradient descent"
+    assert len(calls) == 1
+
+    stats = coalescer.stats()
+    assert stats["coalesced"] == 9
+    assert stats["coalesced_rate"] == pytest.approx(0.9)
+    assert stats["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_distinct_and_later_requests_compute_again():
+    coalescer = RequestCoalescer()
+    calls = []
+
+    async def compute(publish):
+        calls.append(1)
+        return len(calls)
+
+    first, _ = coalescer.join("question 1", compute)
+    other, coalesced = coalescer.join("question 2", compute)
+    assert not coalesced
+    assert sorted([await first.result(), await other.result()]) == [1, 2]
+
+    # The finished flight is gone, so the same question computes again
+    again, coalesced = coalescer.join("question 1", compute)
+    assert not coalesced
+    assert await again.result() == 3
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_request_of_the_flight():
+    coalescer = RequestCoalescer()
+
+    async def compute(publish):
+        publish("partial")
+        await asyncio.sleep(0)
+        raise RuntimeError("Ollama failed")
+
+    leader, _ = coalescer.join("question", compute)
+    follower, coalesced = coalescer.join("question", compute)
+    assert coalesced
+
+    with pytest.raises(RuntimeError, match="Ollama failed"):
+        await leader.result()
+    with pytest.raises(RuntimeError, match="Ollama failed"):
+        async for chunk in follower.stream():
+            assert chunk == "partial"
+
+
+@pytest.mark.asyncio
+async def test_a_cancelled_request_does_not_cancel_the_shared_computation():
+    coalescer = RequestCoalescer()
+    release = asyncio.Event()
+
+    async def compute(publish):
+        await release.wait()
+        return "answer"
+
+    leader, _ = coalescer.join("question", compute)
+    follower, _ = coalescer.join("question", compute)
+    waiting = asyncio.create_task(leader.result())
+    await asyncio.sleep(0)
+    waiting.cancel()
+
+    release.set()
+    assert await follower.result() == "answer"
@@ -0,0 +1,52 @@
+from tests.helpers import API_PREFIX, register
+from tests.test_file_replace import PARAGRAPHS, upload
+
+QUERY = "What does the learning rate control?"
+
+
+def search(client, headers: dict, course_id: int, limit: int, offset: int) -> dict:
+    response = client.post(
+        f"{API_PREFIX}/search/",
+        json={"course_id": course_id, "query": QUERY, "limit": limit, "offset": offset},
+        headers=headers
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_search_pages_follow_one_ranking_whatever_the_page_size(client, teacher, course_id):
+    upload(client, course_id, teacher, "lecture.txt", "\n\n".join(PARAGRAPHS * 4))
+    student = register(client, "search_student", "student")
+    client.post(f"{API_PREFIX}/enrollments/", json={"course_id": course_id}, headers=student)
+
+    first_ten = search(client, student, course_id, limit=10, offset=0)
+    ranking = [hit["chunk_id"] for hit in first_ten["hits"]]
+    assert len(ranking) == 10
+    assert first_ten["has_more"] is True
+
+    # Smaller pages, asked for after the larger one, slice the same ranking
+    for limit, offset in ((5, 0), (5, 5), (3, 2)):
+        page = search(client, student, course_id, limit=limit, offset=offset)
+        assert [hit["chunk_id"] for hit in page["hits"]] == ranking[offset:offset + limit]
+        assert page["has_more"] is True
+
+    # A chat in between does not change the results of a search
+    response = client.post(
+        f"{API_PREFIX}/chat/",
+        json={"course_id": course_id, "question": QUERY},
+        headers=student
+    )
+    assert response.status_code == 200
+    assert search(client, student, course_id, limit=10, offset=0)["hits"] == first_ten["hits"]
+
+
+def test_search_requires_enrollment(client, teacher, course_id):
+    outsider = register(client, "search_outsider", "student")
+
+    response = client.post(
+        f"{API_PREFIX}/search/",
+        json={"course_id": course_id, "query": QUERY, "limit": 5, "offset": 0},
+        headers=outsider
+    )
+    assert response.status_code == 403
+    assert response.json()["detail"] == "You must be enrolled in this course to search its materials"
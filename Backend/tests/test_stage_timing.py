@@ -0,0 +1,32 @@
+from app.config import settings
+from tests.helpers import API_PREFIX, register
+from tests.test_file_replace import PARAGRAPHS, upload
+
+
+def chat(client, headers: dict, course_id: int, question: str):
+    response = client.post(
+        f"{API_PREFIX}/chat/",
+        json={"course_id": course_id, "question": question},
+        headers=headers
+    )
+    assert response.status_code == 200
+    return response
+
+
+def test_stage_timings_go_to_metrics_and_to_clients_only_when_enabled(client, teacher, course_id, monkeypatch):
+    upload(client, course_id, teacher, "lecture.txt", "\n\n".join(PARAGRAPHS[:10]))
+    student = register(client, "timing_student", "student")
+    client.post(f"{API_PREFIX}/enrollments/", json={"course_id": course_id}, headers=student)
+
+    before = client.get(f"{API_PREFIX}/metrics/").json()["stage_timings"]["stages"]
+    response = chat(client, student, course_id, "What does gradient descent update?")
+    assert "Server-Timing" not in response.headers
+    assert response.json()["timings_ms"] is None
+
+    stages = client.get(f"{API_PREFIX}/metrics/").json()["stage_timings"]["stages"]
+    assert stages["chat.total"]["count"] == before.get("chat.total", {}).get("count", 0) + 1
+
+    monkeypatch.setattr(settings, "SERVER_TIMING_ENABLED", True)
+    response = chat(client, student, course_id, "What does regularization prevent?")
+    assert "total;dur=" in response.headers["Server-Timing"]
+    assert "total" in response.json()["timings_ms"]
@@ -98,6 +98,11 @@ interface ApiService {
         @Path("id") materialId: Int
     ): Response<okhttp3.ResponseBody>
 
+    @GET("files/download/{id}/text")
+    suspend fun downloadMaterialText(
+        @Path("id") materialId: Int
+    ): Response<okhttp3.ResponseBody>
+
     // Chat endpoints
     @POST("chat/")
     suspend fun sendChatMessage(